@@ -0,0 +1,96 @@
+"""
+Deep Q-learning components: epsilon-greedy action selection and the
+learner update with a periodically refreshed target network.
+"""
+
+import numpy as np
+
+from environment.moves import NUM_MOVES
+from .network import QNetwork, Adam
+
+
+def epsilon_greedy(network, states, epsilon, rng):
+    """
+    Pick one move per state, random with probability epsilon, greedy otherwise.
+
+    Args:
+        network: QNetwork
+        states: (N, 54) array of sticker colors
+        epsilon: exploration probability
+        rng: numpy Generator
+
+    Returns:
+        np.ndarray: (N,) move indices
+    """
+    actions = np.argmax(network.forward(states), axis=1)
+    explore = rng.random(len(states)) < epsilon
+    actions[explore] = rng.integers(0, NUM_MOVES, size=int(explore.sum()))
+    return actions
+
+
+class DQNLearner:
+    """Online/target Q-network pair trained on replayed transitions."""
+
+    def __init__(self, hidden_sizes=(256, 256), learning_rate=1e-3, gamma=0.9,
+                 target_update_interval=500, seed=None):
+        """
+        Args:
+            hidden_sizes: hidden layer widths of the Q-network
+            learning_rate: Adam learning rate
+            gamma: discount factor
+            target_update_interval: updates between target network refreshes
+            seed: seed for the weight initialization
+        """
+        self.network = QNetwork(hidden_sizes, seed=seed)
+        self.target_network = QNetwork(hidden_sizes, seed=seed)
+        self.target_network.copy_from(self.network)
+        self.optimizer = Adam(learning_rate)
+        self.gamma = gamma
+        self.target_update_interval = target_update_interval
+        self.updates = 0
+
+    def update(self, states, actions, rewards, next_states, dones):
+        """
+        Run one Q-learning update on a batch of transitions.
+
+        Returns:
+            float: training loss
+        """
+        next_values = self.target_network.forward(next_states).max(axis=1)
+        targets = rewards + self.gamma * next_values * (~dones)
+        loss = self.network.train_step(states, actions, targets.astype(np.float32), self.optimizer)
+
+        self.updates += 1
+        if self.updates % self.target_update_interval == 0:
+            self.target_network.copy_from(self.network)
+
+        return loss
+
+    def state_dict(self):
+        """
+        Return everything needed to continue training exactly.
+
+        Returns:
+            tuple: (metadata dict, dict of arrays)
+        """
+        optimizer_meta, optimizer_arrays = self.optimizer.state_dict()
+        meta = {
+            'updates': self.updates,
+            'hidden_sizes': list(self.network.hidden_sizes),
+            'optimizer': optimizer_meta,
+        }
+        arrays = {
+            'network': self.network.get_flat_parameters(),
+            'target_network': self.target_network.get_flat_parameters(),
+        }
+        arrays.update({f"optimizer_{name}": array for name, array in optimizer_arrays.items()})
+        return meta, arrays
+
+    def load_state_dict(self, meta, arrays):
+        """Restore a state produced by state_dict."""
+        self.updates = meta['updates']
+        self.network.set_flat_parameters(arrays['network'])
+        self.target_network.set_flat_parameters(arrays['target_network'])
+        optimizer_arrays = {name[len('optimizer_'):]: array for name, array in arrays.items()
+                            if name.startswith('optimizer_')}
+        self.optimizer.load_state_dict(meta['optimizer'], optimizer_arrays, self.network.parameters())
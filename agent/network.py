@@ -0,0 +1,195 @@
+"""
+NumPy multilayer perceptron used as the Q-network of the DQN agent.
+
+States are fed as one-hot sticker colors (54 * 6 inputs) and the network
+outputs one Q-value per move in environment.moves order.
+"""
+
+import numpy as np
+
+from environment.moves import NUM_MOVES
+
+NUM_COLORS = 6
+INPUT_SIZE = 54 * NUM_COLORS
+
+_ONE_HOT_OFFSETS = np.arange(54) * NUM_COLORS
+
+
+def one_hot_states(states):
+    """
+    Encode sticker states as one-hot float vectors.
+
+    Args:
+        states: (N, 54) array of sticker colors
+
+    Returns:
+        np.ndarray: (N, 324) float32 array
+    """
+    states = np.asarray(states, dtype=np.intp)
+    encoded = np.zeros((len(states), INPUT_SIZE), dtype=np.float32)
+    encoded[np.arange(len(states))[:, None], _ONE_HOT_OFFSETS + states] = 1.0
+    return encoded
+
+
+class QNetwork:
+    """Fully connected ReLU network mapping sticker states to move Q-values."""
+
+    def __init__(self, hidden_sizes=(256, 256), seed=None):
+        """
+        Args:
+            hidden_sizes: width of each hidden layer
+            seed: seed for the weight initialization
+        """
+        self.hidden_sizes = tuple(hidden_sizes)
+        rng = np.random.default_rng(seed)
+        sizes = [INPUT_SIZE, *self.hidden_sizes, NUM_MOVES]
+
+        self.weights = []
+        self.biases = []
+        for fan_in, fan_out in zip(sizes[:-1], sizes[1:]):
+            self.weights.append((rng.standard_normal((fan_in, fan_out)) * np.sqrt(2.0 / fan_in)).astype(np.float32))
+            self.biases.append(np.zeros(fan_out, dtype=np.float32))
+
+    def parameters(self):
+        """Return the parameter arrays as [W0, b0, W1, b1, ...]."""
+        params = []
+        for weight, bias in zip(self.weights, self.biases):
+            params.extend([weight, bias])
+        return params
+
+    def num_parameters(self):
+        return sum(param.size for param in self.parameters())
+
+    def get_flat_parameters(self):
+        """Return all parameters concatenated into one float32 vector."""
+        return np.concatenate([param.ravel() for param in self.parameters()])
+
+    def set_flat_parameters(self, flat):
+        """Load parameters from a vector produced by get_flat_parameters."""
+        offset = 0
+        for param in self.parameters():
+            param[...] = flat[offset:offset + param.size].reshape(param.shape)
+            offset += param.size
+
+    def copy_from(self, other):
+        for param, source in zip(self.parameters(), other.parameters()):
+            param[...] = source
+
+    def forward(self, states):
+        """
+        Compute Q-values for a batch of states.
+
+        Args:
+            states: (N, 54) array of sticker colors
+
+        Returns:
+            np.ndarray: (N, 18) float32 Q-values
+        """
+        hidden = one_hot_states(states)
+        for layer, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            hidden = hidden @ weight + bias
+            if layer < len(self.weights) - 1:
+                np.maximum(hidden, 0.0, out=hidden)
+        return hidden
+
+    def train_step(self, states, actions, targets, optimizer):
+        """
+        Take one optimizer step on the squared error of Q(s, a) against targets.
+
+        Args:
+            states: (N, 54) array of sticker colors
+            actions: (N,) move indices
+            targets: (N,) regression targets for Q(s, a)
+            optimizer: optimizer with a step(params, grads) method
+
+        Returns:
+            float: mean squared error before the update
+        """
+        activations = [one_hot_states(states)]
+        for layer, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            output = activations[-1] @ weight + bias
+            if layer < len(self.weights) - 1:
+                np.maximum(output, 0.0, out=output)
+            activations.append(output)
+
+        rows = np.arange(len(actions))
+        errors = activations[-1][rows, actions] - targets
+        loss = float(np.mean(errors ** 2))
+
+        grad_output = np.zeros_like(activations[-1])
+        grad_output[rows, actions] = 2.0 * errors / len(actions)
+
+        grads = [None] * (2 * len(self.weights))
+        for layer in range(len(self.weights) - 1, -1, -1):
+            grads[2 * layer] = activations[layer].T @ grad_output
+            grads[2 * layer + 1] = grad_output.sum(axis=0)
+            if layer > 0:
+                grad_output = (grad_output @ self.weights[layer].T) * (activations[layer] > 0)
+
+        optimizer.step(self.parameters(), grads)
+        return loss
+
+
+class Adam:
+    """Adam optimizer operating in place on lists of NumPy arrays."""
+
+    def __init__(self, learning_rate=1e-3, beta1=0.9, beta2=0.999, epsilon=1e-8):
+        self.learning_rate = learning_rate
+        self.beta1 = beta1
+        self.beta2 = beta2
+        self.epsilon = epsilon
+        self.step_count = 0
+        self.first_moments = None
+        self.second_moments = None
+
+    def step(self, params, grads):
+        if self.first_moments is None:
+            self.first_moments = [np.zeros_like(param) for param in params]
+            self.second_moments = [np.zeros_like(param) for param in params]
+
+        self.step_count += 1
+        correction1 = 1.0 - self.beta1 ** self.step_count
+        correction2 = 1.0 - self.beta2 ** self.step_count
+
+        for param, grad, m, v in zip(params, grads, self.first_moments, self.second_moments):
+            m *= self.beta1
+            m += (1.0 - self.beta1) * grad
+            v *= self.beta2
+            v += (1.0 - self.beta2) * grad * grad
+            param -= (self.learning_rate * (m / correction1) / (np.sqrt(v / correction2) + self.epsilon)).astype(param.dtype)
+
+    def state_dict(self):
+        """
+        Return the optimizer state.
+
+        Returns:
+            tuple: (metadata dict, dict of arrays)
+        """
+        meta = {'step_count': self.step_count}
+        arrays = {}
+        if self.first_moments is not None:
+            arrays['first_moments'] = np.concatenate([m.ravel() for m in self.first_moments])
+            arrays['second_moments'] = np.concatenate([v.ravel() for v in self.second_moments])
+        return meta, arrays
+
+    def load_state_dict(self, meta, arrays, params):
+        """
+        Restore a state produced by state_dict.
+
+        Args:
+            meta, arrays: output of state_dict
+            params: parameter arrays the moments belong to
+        """
+        self.step_count = meta['step_count']
+        if 'first_moments' not in arrays:
+            self.first_moments = None
+            self.second_moments = None
+            return
+
+        self.first_moments = []
+        self.second_moments = []
+        offset = 0
+        for param in params:
+            self.first_moments.append(np.array(arrays['first_moments'][offset:offset + param.size]).reshape(param.shape))
+            self.second_moments.append(np.array(arrays['second_moments'][offset:offset + param.size]).reshape(param.shape))
+            offset += param.size
@@ -0,0 +1,261 @@
+"""
+Quantized inference for a trained QNetwork.
+
+QuantizedNetwork is a drop-in replacement for QNetwork.forward in search,
+evaluation and serving. Its weights are stored in one of two formats:
+
+    int8      symmetric int8 weights with one float32 scale per output
+              channel; hidden activations are quantized per state to int8
+              (they are ReLU outputs, so [0, 127]) and every layer is an
+              integer matmul rescaled by row scale x channel scale
+    float16   half-precision weights, computed in float32
+
+The one-hot input is fused into the first layer. The centers' home
+colors are folded into the bias; the six colors of a sticker sum to one,
+so each sticker's last color row is folded into the bias as well. That
+leaves 48 x 5 = 240 binary inputs instead of 324, and the first integer
+matmul needs no activation scale. States whose centers are away from home
+(after slices or rotations) get their centers' rows added back exactly,
+so the Q-values match QNetwork.forward for any input.
+
+NumPy has no int8 or float16 GEMM kernels (its integer matmul is a plain
+loop, 20-60x slower than float32 BLAS here), so every matmul runs on
+float32 BLAS, casting one layer's stored weights at a time. For int8 this
+is exact: int8 x int8 products summed over a fan-in of at most 1040 stay
+below 2 ** 24, so the result is bit-for-bit the int32 matmul.
+
+The point of quantizing here is memory, not speed. A (256, 256) network
+object holds about 4x (int8) or 2x (float16) fewer bytes than the float32
+QNetwork, and only one layer at a time is expanded to float32 during a
+forward pass. Scoring is slower than float32, about 0.5-0.9x on one core:
+the casts, and for int8 the activation quantization, cost passes that
+native low-precision kernels would avoid. measure_throughput reports the
+rates on a given machine.
+"""
+
+import time
+
+import numpy as np
+
+from .network import NUM_COLORS
+
+QUANTIZATION_MODES = ('int8', 'float16')
+INT8_MAX = 127
+MAX_EXACT_FAN_IN = (1 << 24) // (INT8_MAX * INT8_MAX)     # integer sums exact in float32
+
+_CENTERS = np.arange(4, 54, 9)
+_STICKERS = np.setdiff1d(np.arange(54), _CENTERS)
+FUSED_INPUT_SIZE = len(_STICKERS) * (NUM_COLORS - 1)
+_FUSED_OFFSETS = np.arange(len(_STICKERS)) * (NUM_COLORS - 1)
+
+
+def fused_inputs(states):
+    """
+    Encode sticker states as the binary inputs of the fused first layer.
+
+    Args:
+        states: (N, 54) array of sticker colors with the centers at home
+
+    Returns:
+        np.ndarray: (N, 240) float32 array, one input per (non-center
+        sticker, color 0-4); color 5 is the all-zero encoding
+    """
+    colors = np.asarray(states, dtype=np.intp)[:, _STICKERS]
+    encoded = np.zeros((len(colors), FUSED_INPUT_SIZE + 1), dtype=np.float32)
+    # Color 5 of every sticker lands in the spare last column, which is dropped
+    columns = np.where(colors < NUM_COLORS - 1, _FUSED_OFFSETS + colors, FUSED_INPUT_SIZE)
+    encoded[np.arange(len(colors))[:, None], columns] = 1.0
+    return encoded[:, :FUSED_INPUT_SIZE]
+
+
+def fuse_first_layer(weight, bias):
+    """
+    Fold the home-colored centers and each sticker's last color into the bias.
+
+    Args:
+        weight: (324, H) first-layer weights over the one-hot input
+        bias: (H,) first-layer bias
+
+    Returns:
+        tuple: ((240, H) weights over fused_inputs, (H,) bias)
+    """
+    rows = weight.reshape(54, NUM_COLORS, -1)
+    fused_bias = bias + rows[_CENTERS, np.arange(NUM_COLORS)].sum(axis=0) + rows[_STICKERS, -1].sum(axis=0)
+    fused_weight = rows[_STICKERS, :-1] - rows[_STICKERS, -1:]
+    return fused_weight.reshape(FUSED_INPUT_SIZE, -1).astype(np.float32), fused_bias.astype(np.float32)
+
+
+def center_offsets(weight):
+    """
+    First-layer change for each center showing each color instead of its own.
+
+    Args:
+        weight: (324, H) first-layer weights over the one-hot input
+
+    Returns:
+        np.ndarray: (36, H) float32 rows, row center * 6 + color (zero for the home color)
+    """
+    rows = weight.reshape(54, NUM_COLORS, -1)[_CENTERS]
+    offsets = rows - rows[np.arange(NUM_COLORS), np.arange(NUM_COLORS)][:, None, :]
+    return offsets.reshape(NUM_COLORS * NUM_COLORS, -1).astype(np.float32)
+
+
+def quantize_per_channel(weight):
+    """
+    Symmetric int8 quantization with one scale per output channel.
+
+    Args:
+        weight: (fan_in, fan_out) float weights
+
+    Returns:
+        tuple: ((fan_in, fan_out) int8 weights, (fan_out,) float32 scales)
+    """
+    scales = np.abs(weight).max(axis=0) / INT8_MAX
+    scales = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    quantized = np.clip(np.rint(weight / scales), -INT8_MAX, INT8_MAX).astype(np.int8)
+    return quantized, scales
+
+
+def quantize_rows(activations):
+    """
+    Quantize non-negative activations to [0, 127] with one scale per row.
+
+    Returns:
+        tuple: ((N, K) float32 array of integer values, (N, 1) float32 scales)
+    """
+    scales = activations.max(axis=1, keepdims=True) / INT8_MAX
+    scales[scales == 0] = 1.0
+    quantized = np.rint(activations / scales, out=activations)
+    return quantized, scales
+
+
+class QuantizedNetwork:
+    """Inference-only copy of a QNetwork with int8 or float16 weights."""
+
+    def __init__(self, network, mode='int8'):
+        """
+        Args:
+            network: trained QNetwork
+            mode: 'int8' or 'float16'
+
+        Raises:
+            ValueError: for an unknown mode, or an int8 layer whose fan-in
+                is too wide for exact float32 accumulation
+        """
+        if mode not in QUANTIZATION_MODES:
+            raise ValueError(f"mode must be one of {QUANTIZATION_MODES}, got {mode!r}")
+        self.mode = mode
+        self.hidden_sizes = network.hidden_sizes
+        weights = list(network.weights)
+        biases = [bias.astype(np.float32) for bias in network.biases]
+        offsets = center_offsets(weights[0])
+        weights[0], biases[0] = fuse_first_layer(weights[0], biases[0])
+        self.biases = biases
+
+        if mode == 'int8':
+            if max(weight.shape[0] for weight in weights) > MAX_EXACT_FAN_IN:
+                raise ValueError(f"int8 layers need a fan-in of at most {MAX_EXACT_FAN_IN}")
+            self.weights, self.scales = zip(*(quantize_per_channel(weight) for weight in weights))
+            self.center_offsets, self.center_scales = quantize_per_channel(offsets)
+        else:
+            self.weights = [weight.astype(np.float16) for weight in weights]
+            self.scales = [None] * len(weights)
+            self.center_offsets, self.center_scales = offsets.astype(np.float16), None
+
+    def nbytes(self):
+        """Bytes of stored weights, scales and biases."""
+        arrays = [*self.weights, *self.biases, *(scale for scale in self.scales if scale is not None),
+                  self.center_offsets, *([self.center_scales] if self.center_scales is not None else [])]
+        return sum(array.nbytes for array in arrays)
+
+    def forward(self, states):
+        """
+        Compute Q-values for a batch of states.
+
+        Args:
+            states: (N, 54) array of sticker colors
+
+        Returns:
+            np.ndarray: (N, 18) float32 Q-values
+        """
+        states = np.asarray(states)
+        hidden = fused_inputs(states)
+        last = len(self.weights) - 1
+        for layer, (weight, scale, bias) in enumerate(zip(self.weights, self.scales, self.biases)):
+            # The stored values, exactly, as a float32 BLAS operand
+            operand = weight.astype(np.float32)
+            if self.mode == 'int8':
+                # The binary first-layer inputs need no quantization
+                row_scales = 1.0
+                if layer > 0:
+                    hidden, row_scales = quantize_rows(hidden)
+                hidden = hidden @ operand
+                hidden *= row_scales
+                hidden *= scale
+                hidden += bias
+            else:
+                hidden = hidden @ operand + bias
+            if layer == 0:
+                self._add_center_offsets(states, hidden)
+            if layer < last:
+                np.maximum(hidden, 0.0, out=hidden)
+        return hidden
+
+    def _add_center_offsets(self, states, hidden):
+        # Centers away from home: add their rows in place of the home rows folded into the bias
+        colors = states[:, _CENTERS].astype(np.intp)
+        rows = np.flatnonzero((colors != np.arange(NUM_COLORS)).any(axis=1))
+        if not len(rows):
+            return
+        offsets = self.center_offsets[np.arange(NUM_COLORS) * NUM_COLORS + colors[rows]].astype(np.float32)
+        correction = offsets.sum(axis=1)
+        if self.center_scales is not None:
+            correction *= self.center_scales
+        hidden[rows] += correction
+
+
+def compare_to_float(network, quantized, states):
+    """
+    Accuracy of a quantized network against the float32 path.
+
+    Args:
+        network: QNetwork
+        quantized: QuantizedNetwork made from it
+        states: (N, 54) states to compare on
+
+    Returns:
+        dict: max and mean absolute Q-value error, the error relative to
+        the Q-value range, and the share of states whose greedy move agrees
+    """
+    expected = network.forward(states)
+    actual = quantized.forward(states)
+    errors = np.abs(actual - expected)
+    return {
+        'max_abs_error': float(errors.max()),
+        'mean_abs_error': float(errors.mean()),
+        'relative_error': float(errors.max() / max(float(np.ptp(expected)), 1e-12)),
+        'argmax_agreement': float((actual.argmax(axis=1) == expected.argmax(axis=1)).mean()),
+    }
+
+
+def measure_throughput(networks, states, repeats=20):
+    """
+    States scored per second by each network on the same batch.
+
+    Args:
+        networks: dict name -> object with a forward(states) method
+        states: (N, 54) batch
+        repeats: timed forward passes per network (after one warm-up)
+
+    Returns:
+        dict: name -> states per second
+    """
+    rates = {}
+    for name, network in networks.items():
+        network.forward(states)
+        started = time.perf_counter()
+        for _ in range(repeats):
+            network.forward(states)
+        rates[name] = repeats * len(states) / (time.perf_counter() - started)
+    return rates
+
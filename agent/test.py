@@ -0,0 +1,138 @@
+import sys
+import os
+
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, project_root)
+
+import numpy as np
+
+from agent.network import QNetwork, Adam
+from agent.quantized import QuantizedNetwork, compare_to_float, fuse_first_layer, fused_inputs, quantize_rows
+from environment.generators import scramble_states
+
+
+class _GradientRecorder:
+    """Optimizer stand-in that keeps the gradients instead of applying them."""
+
+    def step(self, params, grads):
+        self.grads = grads
+
+
+def test_gradient_check():
+    """Backpropagated gradients must match finite differences of the loss."""
+    rng = np.random.default_rng(0)
+    network = QNetwork((16, 16), seed=0)
+    # Check in float64 so finite differences are not swamped by rounding
+    network.weights = [weight.astype(np.float64) for weight in network.weights]
+    network.biases = [bias.astype(np.float64) for bias in network.biases]
+    states = scramble_states(32, 3, rng)
+    actions = rng.integers(0, 18, size=32)
+    targets = rng.random(32).astype(np.float32)
+
+    recorder = _GradientRecorder()
+    network.train_step(states, actions, targets, recorder)
+
+    epsilon = 1e-6
+    for param, grad in zip(network.parameters(), recorder.grads):
+        assert grad.shape == param.shape, "gradient shape does not match its parameter"
+        candidates = np.argwhere(np.abs(grad) > 1e-3)
+        for index in map(tuple, candidates[rng.choice(len(candidates), size=min(3, len(candidates)), replace=False)]):
+            original = param[index]
+            param[index] = original + epsilon
+            loss_plus = network.train_step(states, actions, targets, _GradientRecorder())
+            param[index] = original - epsilon
+            loss_minus = network.train_step(states, actions, targets, _GradientRecorder())
+            param[index] = original
+
+            numeric = (loss_plus - loss_minus) / (2 * epsilon)
+            assert abs(numeric - grad[index]) <= 1e-4 * abs(grad[index]) + 1e-7, \
+                f"gradient mismatch at {index}: numeric {numeric}, analytic {grad[index]}"
+
+
+def test_adam_fits_batch():
+    """A few hundred Adam steps must drive the loss on a fixed batch towards zero."""
+    rng = np.random.default_rng(1)
+    network = QNetwork((32,), seed=1)
+    optimizer = Adam(1e-2)
+    states = scramble_states(64, 4, rng)
+    actions = rng.integers(0, 18, size=64)
+    targets = rng.random(64).astype(np.float32)
+
+    first = network.train_step(states, actions, targets, optimizer)
+    for _ in range(300):
+        last = network.train_step(states, actions, targets, optimizer)
+    assert last < 0.01 * first, f"loss did not decrease enough: {first} -> {last}"
+
+
+def test_quantized_inference_matches_float():
+    """The fused input is exact; int8 and float16 stay close to float32 and int8 matmuls are exact."""
+    from environment.notation import compile_algorithm
+    from utils.memory import measure
+
+    rng = np.random.default_rng(2)
+    network = QNetwork((64, 64), seed=2)
+    for bias in network.biases:
+        bias[...] = rng.standard_normal(bias.shape) * 0.1
+    states = scramble_states(512, 12, rng)
+
+    weight, bias = fuse_first_layer(network.weights[0], network.biases[0])
+    one_hot = np.zeros((len(states), 324), dtype=np.float32)
+    one_hot[np.arange(len(states))[:, None], np.arange(54) * 6 + states] = 1.0
+    assert np.allclose(fused_inputs(states) @ weight + bias, one_hot @ network.weights[0] + network.biases[0], atol=1e-5)
+
+    int8 = QuantizedNetwork(network, 'int8')
+    activations, _ = quantize_rows(np.maximum(fused_inputs(states) @ weight + bias, 0.0))
+    exact = activations.astype(np.int32) @ int8.weights[1].astype(np.int32)
+    assert np.array_equal(activations @ int8.weights[1].astype(np.float32), exact), "float32 BLAS must reproduce the int32 matmul"
+
+    # Centers away from home (after slices and rotations) are scored like the float32 network does
+    rotated = states[:, compile_algorithm("x y' M")]
+    for mode, tolerance, agreement in (('int8', 0.05, 0.9), ('float16', 0.002, 0.99)):
+        quantized = QuantizedNetwork(network, mode)
+        for batch in (states, rotated):
+            accuracy = compare_to_float(network, quantized, batch)
+            assert accuracy['relative_error'] < tolerance, (mode, accuracy)
+            assert accuracy['argmax_agreement'] >= agreement, (mode, accuracy)
+        # The object itself, not only its stored arrays, is smaller than the float32 network
+        assert measure(quantized)['heap'] < (0.35 if mode == 'int8' else 0.6) * measure(network)['heap'], mode
+    assert int8.nbytes() < 0.3 * network.num_parameters() * 4, "int8 weights should be about a quarter of float32"
+
+
+TESTS = [
+    test_gradient_check,
+    test_adam_fits_batch,
+    test_quantized_inference_matches_float,
+]
+
+
+def run_all_tests():
+    """Run all agent tests."""
+    passed_tests = 0
+
+    for test in TESTS:
+        print(f"\n=== {test.__name__} ===")
+        try:
+            test()
+            passed_tests += 1
+            print(f"✓ {test.__name__} passed!")
+        except AssertionError as e:
+            print(f"Test failed: {e}")
+        except Exception as e:
+            print(f"Unexpected error in {test.__name__}: {e}")
+
+    print(f"\n=== Agent Test Summary ===")
+    print(f"Passed: {passed_tests}/{len(TESTS)}")
+    if passed_tests == len(TESTS):
+        print("All tests passed!")
+    else:
+        print(f"   {len(TESTS) - passed_tests} tests failed")
+
+
+def main():
+    """Main function for running tests."""
+    run_all_tests()
+
+
+if __name__ == "__main__":
+    main()
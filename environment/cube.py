@@ -5,7 +5,6 @@ from .constants import (
     WHITE, BLUE, RED, GREEN, ORANGE, YELLOW
 )
 import random
-import re
 
 class Cube:
     """A class representing a 3x3 Rubik's Cube using a vector representation."""
@@ -191,80 +190,67 @@ class Cube:
             self._set_column_values(self.state, face, LEFT_COL, top_row[::-1])
 
     def is_solved(self):
-        return self.state == self._create_solved_state()
-    
-    def execute_algorithm(self, algorithm):
+        """Whether every face shows one color, in any whole-cube orientation (e.g. after "x")."""
+        state = self.state
+        return all(state[start:start + 9].count(state[start + 4]) == 9 for start in range(0, 54, 9))
+
+    def validate(self):
         """
-        Execute an algorithm of moves on the cube.
-        
-        Args:
-            algorithm: string containing the moves (e.g.: "R U R' U'", "f'ru'b2d'r", "F R U L")
+        Check that the current state is reachable from the solved cube.
+
+        Whole-cube rotations are ignored: a state reached with slices, wide
+        turns or rotations is turned back to centers at home before checking.
+
+        Returns:
+            ValidationResult: truthy when valid, otherwise with the reason
         """
-        if not algorithm:
-            return
-        
-        face_map = {
-            'F': FRONT, 'B': BACK, 'R': RIGHT,
-            'L': LEFT, 'U': UP, 'D': DOWN
-        }
-        
-        moves = self._parse_moves(algorithm.strip().upper())
-        
-        for move in moves:
-            self._execute_single_move(move, face_map)
+        import numpy as np
+        from .notation import reorient_states
+        from .validation import validate
+
+        state = self.state
+        if len(state) == 54:
+            state = reorient_states(np.array([state]))[0][0]
+        return validate(state)
 
-    def _parse_moves(self, algorithm):
+    def expand(self, last_move=None):
         """
-        Parse algorithm string into individual moves.
-        
+        Compute every state one move away.
+
         Args:
-            algorithm: sanitized algorithm string
-            
+            last_move: optional move name (e.g. "R'") that produced the current
+                state; when given, only canonical successors are returned
+
         Returns:
-            list: list of move strings
+            list: (move_name, state) pairs, state being a list of 54 colors
         """
-        pattern = r"[FBLRUD](?:'?2?|2'?)"
-        return re.findall(pattern, algorithm)
+        import numpy as np
+        from .moves import MOVE_INDEX, MOVE_NAMES, canonical_mask, expand
 
-    def _execute_single_move(self, move, face_map):
+        children = expand(np.array(self.state, dtype=np.uint8)).tolist()
+        if last_move is None:
+            return list(zip(MOVE_NAMES, children))
+        allowed = canonical_mask(MOVE_INDEX[last_move])
+        return [(MOVE_NAMES[move], children[move]) for move in np.flatnonzero(allowed)]
+    
+    def execute_algorithm(self, algorithm):
         """
-        Execute a single move on the cube.
-        
+        Execute an algorithm of moves on the cube.
+
+        The algorithm is compiled into a single sticker permutation (see
+        environment.notation), so slices, wide turns and rotations cost no
+        more than face turns.
+
         Args:
-            move: single move string (e.g., "R", "U'", "F2", "L2'")
-            face_map: dictionary mapping face letters to face constants
+            algorithm: string containing the moves (e.g.: "R U R' U'", "r U R' U' M", "x2 y F R U L")
         """
-        if not move or move[0] not in face_map:
+        if not algorithm:
             return
-        
-        face = face_map[move[0]]
-        modifier = move[1:] if len(move) > 1 else ""
-        
-        clockwise, repetitions = self._parse_move_modifier(modifier)
-        
-        for _ in range(repetitions):
-            self.rotate(face, clockwise=clockwise)
 
-    def _parse_move_modifier(self, modifier):
-        """
-        Parse move modifier to determine rotation direction and repetitions.
-        
-        Args:
-            modifier: modifier part of the move (e.g., "", "'", "2", "2'")
-            
-        Returns:
-            tuple: (clockwise: bool, repetitions: int)
-        """
-        if not modifier:
-            return True, 1  # Standard clockwise rotation
-        elif modifier == "'":
-            return False, 1  # Counterclockwise rotation
-        elif modifier == "2":
-            return True, 2  # Double clockwise rotation
-        elif modifier in ["2'", "'2"]:
-            return False, 2  # Double counterclockwise rotation
-        else:
-            return True, 1  # Default fallback
+        from .notation import compile_algorithm
+
+        state = self.state
+        self.state = [state[index] for index in compile_algorithm(algorithm).tolist()]
 
     def scramble(self, moves=20):
         faces = ['F', 'B', 'R', 'L', 'U', 'D']
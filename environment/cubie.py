@@ -0,0 +1,318 @@
+"""
+Cubie-level view of the sticker representation used by Cube.
+
+A state is described by the permutation and orientation of its 8 corners
+and 12 edges (the centers never move). Positions follow the usual order:
+
+    corners: URF, UFL, ULB, UBR, DFR, DLF, DBL, DRB
+    edges:   UR, UF, UL, UB, DR, DF, DL, DB, FR, FL, BL, BR
+
+Each corner lists its stickers starting from the U/D sticker and going
+clockwise; each edge lists its U/D (or F/B for the middle layer) sticker
+first. With this convention every reachable state has corner twists
+summing to 0 mod 3, edge flips summing to 0 mod 2 and equal corner and
+edge permutation parity.
+
+All functions are vectorized over a leading batch dimension.
+"""
+
+import numpy as np
+
+from .constants import UP, FRONT, LEFT, BACK, RIGHT, DOWN
+
+
+def _facelet(face, row, col):
+    return face * 9 + row * 3 + col
+
+
+CORNER_FACELETS = np.array([
+    [_facelet(UP, 2, 2), _facelet(RIGHT, 0, 0), _facelet(FRONT, 0, 2)],
+    [_facelet(UP, 2, 0), _facelet(FRONT, 0, 0), _facelet(LEFT, 0, 2)],
+    [_facelet(UP, 0, 0), _facelet(LEFT, 0, 0), _facelet(BACK, 0, 2)],
+    [_facelet(UP, 0, 2), _facelet(BACK, 0, 0), _facelet(RIGHT, 0, 2)],
+    [_facelet(DOWN, 0, 2), _facelet(FRONT, 2, 2), _facelet(RIGHT, 2, 0)],
+    [_facelet(DOWN, 0, 0), _facelet(LEFT, 2, 2), _facelet(FRONT, 2, 0)],
+    [_facelet(DOWN, 2, 0), _facelet(BACK, 2, 2), _facelet(LEFT, 2, 0)],
+    [_facelet(DOWN, 2, 2), _facelet(RIGHT, 2, 2), _facelet(BACK, 2, 0)],
+], dtype=np.intp)
+
+EDGE_FACELETS = np.array([
+    [_facelet(UP, 1, 2), _facelet(RIGHT, 0, 1)],
+    [_facelet(UP, 2, 1), _facelet(FRONT, 0, 1)],
+    [_facelet(UP, 1, 0), _facelet(LEFT, 0, 1)],
+    [_facelet(UP, 0, 1), _facelet(BACK, 0, 1)],
+    [_facelet(DOWN, 1, 2), _facelet(RIGHT, 2, 1)],
+    [_facelet(DOWN, 0, 1), _facelet(FRONT, 2, 1)],
+    [_facelet(DOWN, 1, 0), _facelet(LEFT, 2, 1)],
+    [_facelet(DOWN, 2, 1), _facelet(BACK, 2, 1)],
+    [_facelet(FRONT, 1, 2), _facelet(RIGHT, 1, 0)],
+    [_facelet(FRONT, 1, 0), _facelet(LEFT, 1, 2)],
+    [_facelet(BACK, 1, 2), _facelet(LEFT, 1, 0)],
+    [_facelet(BACK, 1, 0), _facelet(RIGHT, 1, 2)],
+], dtype=np.intp)
+
+CENTER_FACELETS = np.array([_facelet(face, 1, 1) for face in range(6)], dtype=np.intp)
+
+# In the solved state every sticker carries the color of its face
+CORNER_COLORS = (CORNER_FACELETS // 9).astype(np.uint8)
+EDGE_COLORS = (EDGE_FACELETS // 9).astype(np.uint8)
+
+NUM_CORNERS = 8
+NUM_EDGES = 12
+
+CORNER_PERM_SPACE = 40320          # 8!
+CORNER_ORI_SPACE = 2187            # 3^7
+EDGE_PERM_SPACE = 479001600        # 12!
+EDGE_ORI_SPACE = 2048              # 2^11
+
+CORNER_SPACE = CORNER_PERM_SPACE * CORNER_ORI_SPACE
+EDGE_SPACE = EDGE_PERM_SPACE * EDGE_ORI_SPACE
+
+# A full-cube rank needs about 66 bits, so ranks are stored as a
+# (corner, edge) pair ordered lexicographically.
+RANK_DTYPE = np.dtype([('corner', '<u8'), ('edge', '<u8')])
+
+
+def _build_lookup(colors, size):
+    # lookup[a, b] -> (cubie, orientation) for the first two sticker colors
+    cubie = np.full((6, 6), -1, dtype=np.int8)
+    orientation = np.full((6, 6), -1, dtype=np.int8)
+    for index, stickers in enumerate(colors):
+        for ori in range(size):
+            first = stickers[ori % size]
+            second = stickers[(ori + 1) % size]
+            cubie[first, second] = index
+            orientation[first, second] = (size - ori) % size
+    return cubie, orientation
+
+
+_CORNER_LOOKUP, _ = _build_lookup(CORNER_COLORS, 3)
+_EDGE_LOOKUP, _EDGE_ORI_LOOKUP = _build_lookup(EDGE_COLORS, 2)
+
+
+def _build_stickers(colors, size, width):
+    # stickers[cubie * size + ori]: the colors a twisted cubie shows in its
+    # position's slots, padded to width bytes and viewed as one integer
+    slots = np.arange(size)
+    stickers = np.zeros((len(colors) * size, width), dtype=np.uint8)
+    for cubie in range(len(colors)):
+        for ori in range(size):
+            stickers[cubie * size + ori, :size] = colors[cubie][(slots - ori) % size]
+    return stickers.view(f"u{width}").ravel()
+
+
+_CORNER_STICKERS = _build_stickers(CORNER_COLORS, 3, 4)
+_EDGE_STICKERS = _build_stickers(EDGE_COLORS, 2, 2)
+
+# Column order turning [centers, corner stickers, edge stickers] into facelet order
+_FACELET_ORDER = np.argsort(np.concatenate([CENTER_FACELETS, CORNER_FACELETS.ravel(), EDGE_FACELETS.ravel()]))
+
+_FACTORIALS = np.array([1, 1, 2, 6, 24, 120, 720, 5040, 40320, 362880, 3628800, 39916800], dtype=np.int64)
+
+
+def facelets_to_cubies(states):
+    """
+    Convert sticker states to cubie permutations and orientations.
+
+    The states are assumed to be reachable; check untrusted input with
+    validation.validate_states first.
+
+    Args:
+        states: (N, 54) array of sticker colors
+
+    Returns:
+        tuple: (cp, co, ep, eo) uint8 arrays of shapes (N, 8), (N, 8), (N, 12), (N, 12)
+    """
+    states = np.asarray(states)
+
+    corner_colors = states[:, CORNER_FACELETS]
+    co = np.argmax((corner_colors == UP) | (corner_colors == DOWN), axis=2)
+    first = np.take_along_axis(corner_colors, co[..., None], axis=2)[..., 0]
+    second = np.take_along_axis(corner_colors, ((co + 1) % 3)[..., None], axis=2)[..., 0]
+    cp = _CORNER_LOOKUP[first, second]
+
+    edge_colors = states[:, EDGE_FACELETS]
+    ep = _EDGE_LOOKUP[edge_colors[..., 0], edge_colors[..., 1]]
+    eo = _EDGE_ORI_LOOKUP[edge_colors[..., 0], edge_colors[..., 1]]
+
+    return cp.astype(np.uint8), co.astype(np.uint8), ep.astype(np.uint8), eo.astype(np.uint8)
+
+
+def cubies_to_facelets(cp, co, ep, eo):
+    """
+    Convert cubie permutations and orientations to sticker states.
+
+    Args:
+        cp, co: (N, 8) corner permutation and twist arrays
+        ep, eo: (N, 12) edge permutation and flip arrays
+
+    Returns:
+        np.ndarray: (N, 54) uint8 array of sticker colors
+    """
+    # Cubie and orientation indices are below 24, so they stay uint8
+    cp = np.asarray(cp, dtype=np.uint8)
+    co = np.asarray(co, dtype=np.uint8)
+    ep = np.asarray(ep, dtype=np.uint8)
+    eo = np.asarray(eo, dtype=np.uint8)
+
+    # One integer gather per cubie, then a single column permutation
+    count = len(cp)
+    grouped = np.empty((count, 54), dtype=np.uint8)
+    grouped[:, :6] = np.arange(6, dtype=np.uint8)
+    corners = np.take(_CORNER_STICKERS, cp * 3 + co).view(np.uint8).reshape(count, NUM_CORNERS, 4)
+    grouped[:, 6:30].reshape(count, NUM_CORNERS, 3)[...] = corners[..., :3]
+    grouped[:, 30:] = np.take(_EDGE_STICKERS, ep * 2 + eo).view(np.uint8).reshape(count, -1)
+    return np.take(grouped, _FACELET_ORDER, axis=1)
+
+
+def rank_permutations(perms):
+    """
+    Lehmer-rank a batch of permutations.
+
+    Args:
+        perms: (N, n) array, each row a permutation of range(n)
+
+    Returns:
+        np.ndarray: (N,) int64 ranks in [0, n!)
+    """
+    perms = np.asarray(perms, dtype=np.int64)
+    n = perms.shape[1]
+    later = np.triu(np.ones((n, n), dtype=bool), k=1)
+    digits = ((perms[:, None, :] < perms[:, :, None]) & later).sum(axis=2)
+    return digits @ _FACTORIALS[n - 1::-1]
+
+
+_PAIR_INDICES = {}
+
+
+def _pair_indices(n):
+    if n not in _PAIR_INDICES:
+        _PAIR_INDICES[n] = np.triu_indices(n, k=1)
+    return _PAIR_INDICES[n]
+
+
+def permutation_parity(perms):
+    """
+    Parity of a batch of permutations.
+
+    Args:
+        perms: (N, n) array, each row a permutation of range(n)
+
+    Returns:
+        np.ndarray: (N,) uint8, 1 for odd permutations
+    """
+    first, second = _pair_indices(perms.shape[1])
+    return (np.count_nonzero(perms[:, first] > perms[:, second], axis=1) & 1).astype(np.uint8)
+
+
+def unrank_permutations(ranks, n):
+    """
+    Inverse of rank_permutations.
+
+    Args:
+        ranks: (N,) array of ranks in [0, n!)
+        n: permutation length
+
+    Returns:
+        np.ndarray: (N, n) uint8 permutations
+    """
+    ranks = np.asarray(ranks, dtype=np.int64).copy()
+    count = len(ranks)
+    available = np.ones((count, n), dtype=bool)
+    perms = np.empty((count, n), dtype=np.uint8)
+
+    for i in range(n):
+        digit = ranks // _FACTORIALS[n - 1 - i]
+        ranks %= _FACTORIALS[n - 1 - i]
+        chosen = np.argmax(available & (np.cumsum(available, axis=1) == digit[:, None] + 1), axis=1)
+        perms[:, i] = chosen
+        available[np.arange(count), chosen] = False
+
+    return perms
+
+
+def rank_orientations(ori, base):
+    """
+    Rank orientation rows whose sum is zero modulo base.
+
+    The last entry is implied by the others, so ranks lie in [0, base^(n-1)).
+
+    Args:
+        ori: (N, n) array of orientations in [0, base)
+        base: 3 for corner twists, 2 for edge flips
+
+    Returns:
+        np.ndarray: (N,) int64 ranks
+    """
+    weights = base ** np.arange(ori.shape[1] - 2, -1, -1, dtype=np.int64)
+    return ori[:, :-1].astype(np.int64) @ weights
+
+
+def unrank_orientations(ranks, length, base):
+    """
+    Inverse of rank_orientations.
+
+    Returns:
+        np.ndarray: (N, length) uint8 orientations
+    """
+    ranks = np.asarray(ranks, dtype=np.int64)
+    weights = base ** np.arange(length - 2, -1, -1, dtype=np.int64)
+    ori = np.empty((len(ranks), length), dtype=np.uint8)
+    ori[:, :-1] = (ranks[:, None] // weights) % base
+    ori[:, -1] = (-ori[:, :-1].astype(np.int64).sum(axis=1)) % base
+    return ori
+
+
+def rank_cubies(cp, co, ep, eo):
+    """
+    Rank cubie arrays into RANK_DTYPE records.
+
+    Returns:
+        np.ndarray: (N,) array of RANK_DTYPE
+    """
+    ranks = np.empty(len(cp), dtype=RANK_DTYPE)
+    ranks['corner'] = rank_permutations(cp) * CORNER_ORI_SPACE + rank_orientations(co, 3)
+    ranks['edge'] = rank_permutations(ep) * EDGE_ORI_SPACE + rank_orientations(eo, 2)
+    return ranks
+
+
+def unrank_cubies(ranks):
+    """
+    Inverse of rank_cubies.
+
+    Returns:
+        tuple: (cp, co, ep, eo) uint8 arrays
+    """
+    corner = ranks['corner'].astype(np.int64)
+    edge = ranks['edge'].astype(np.int64)
+    cp = unrank_permutations(corner // CORNER_ORI_SPACE, NUM_CORNERS)
+    co = unrank_orientations(corner % CORNER_ORI_SPACE, NUM_CORNERS, 3)
+    ep = unrank_permutations(edge // EDGE_ORI_SPACE, NUM_EDGES)
+    eo = unrank_orientations(edge % EDGE_ORI_SPACE, NUM_EDGES, 2)
+    return cp, co, ep, eo
+
+
+def rank_states(states):
+    """
+    Rank a batch of sticker states.
+
+    Args:
+        states: (N, 54) array of sticker colors
+
+    Returns:
+        np.ndarray: (N,) array of RANK_DTYPE
+    """
+    return rank_cubies(*facelets_to_cubies(states))
+
+
+def unrank_states(ranks):
+    """
+    Inverse of rank_states.
+
+    Args:
+        ranks: (N,) array of RANK_DTYPE
+
+    Returns:
+        np.ndarray: (N, 54) uint8 array of sticker colors
+    """
+    return cubies_to_facelets(*unrank_cubies(ranks))
@@ -0,0 +1,269 @@
+"""
+Differential fuzzing of the move engines against Cube.rotate.
+
+Every chunk draws random move sequences (any move may follow any other)
+and replays them with the reference Cube.rotate on a labelled start
+state, stickers numbered 0-53, so a misplaced sticker cannot hide behind
+an equal color. Each engine must reach the identical state:
+
+    gather          MOVE_PERMS, one batched gather per move
+    expand          expand() children against apply_move
+    notation        compile_algorithm of the algorithm string
+    cube            Cube.execute_algorithm
+    nxn             the geometric move table of nxn.move_table(3)
+    permutation     Permutation.from_moves
+    scramble        scramble_states with per-state depths, replayed with gather
+    cubie           facelets -> cubies -> facelets and rank -> unrank
+    serialization   packed stickers, rank bytes and facelet strings
+
+and the group invariants must hold:
+
+    inverse         a sequence followed by its inverse is the identity
+    order           quarter turns have order 4, half turns order 2
+    conservation    every color appears 9 times and the state validates
+
+run_fuzz covers `sequences` sequences in chunks seeded by (seed, chunk),
+so any failure is reproducible from the report alone. The fast mode runs
+in the test suite; the soak mode is for nightly runs:
+
+    python main.py fuzz                   # fast: 2,000 sequences
+    python main.py fuzz --soak            # 1,000,000 sequences on every core
+"""
+
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from .cube import Cube
+from .cubie import cubies_to_facelets, facelets_to_cubies, rank_states, unrank_states
+from .generators import scramble_states
+from .moves import INVERSE_MOVES, MOVE_NAMES, MOVE_PERMS, NUM_MOVES, SOLVED_STATE, apply_move, expand
+from .notation import compile_algorithm
+from .nxn import move_table
+from .permutation import Permutation
+from .serialization import (
+    from_facelet_strings, pack_states, pack_states_ranked, to_facelet_strings, unpack_states,
+    unpack_states_ranked,
+)
+from .validation import VALID, validate_states
+
+ENGINES = ('gather', 'expand', 'notation', 'cube', 'nxn', 'permutation', 'scramble', 'cubie', 'serialization')
+INVARIANTS = ('inverse', 'order', 'conservation')
+CHECKS = ENGINES + INVARIANTS
+
+FAST_SEQUENCES = 2000
+SOAK_SEQUENCES = 1000000
+CHUNK_SIZE = 500
+MAX_LENGTH = 40
+
+# Cube.rotate calls (clockwise, repetitions) of each turn: clockwise, counterclockwise, half
+_TURNS = [(True, 1), (False, 1), (True, 2)]
+
+
+def reference_states(starts, moves):
+    """
+    Replay move sequences with Cube.rotate, one sticker list at a time.
+
+    Args:
+        starts: (N, 54) start states
+        moves: (N, L) move indices
+
+    Returns:
+        np.ndarray: (N, 54) final states
+    """
+    cube = Cube()
+    finals = np.empty_like(starts)
+    for row, (start, sequence) in enumerate(zip(starts.tolist(), moves.tolist())):
+        cube.state = start
+        for move in sequence:
+            clockwise, repetitions = _TURNS[move % 3]
+            for _ in range(repetitions):
+                cube.rotate(move // 3, clockwise=clockwise)
+        finals[row] = cube.state
+    return finals
+
+
+def _engine_states(starts, moves):
+    # Final states of every engine that replays the sequences
+    algorithms = [' '.join(MOVE_NAMES[move] for move in sequence) for sequence in moves.tolist()]
+    rows = np.arange(len(starts))[:, None]
+
+    gather = starts.copy()
+    nxn = starts.copy()
+    nxn_perms = move_table(3).perms
+    for step in range(moves.shape[1]):
+        gather = gather[rows, MOVE_PERMS[moves[:, step]]]
+        nxn = nxn[rows, nxn_perms[moves[:, step]]]
+
+    cube = Cube()
+    executed = np.empty_like(starts)
+    for row, algorithm in enumerate(algorithms):
+        cube.state = starts[row].tolist()
+        cube.execute_algorithm(algorithm)
+        executed[row] = cube.state
+
+    return {
+        'gather': gather,
+        'notation': np.stack([start[compile_algorithm(algorithm)] for start, algorithm in zip(starts, algorithms)]),
+        'cube': executed,
+        'nxn': nxn,
+        'permutation': np.stack([Permutation.from_moves(sequence).apply(start)
+                                 for start, sequence in zip(starts, moves.tolist())]),
+    }
+
+
+def _check_expand(states):
+    children = expand(states)
+    return np.stack([(children[:, move] == apply_move(states, move)).all(axis=1)
+                     for move in range(NUM_MOVES)], axis=1).all(axis=1)
+
+
+def _check_scramble(rng, count, max_length):
+    depths = rng.integers(0, max_length + 1, size=count)
+    states, moves = scramble_states(count, depths, rng, return_moves=True)
+    replayed = np.tile(SOLVED_STATE, (count, 1))
+    rows = np.arange(count)
+    for step in range(moves.shape[1]):
+        active = rows[moves[:, step] >= 0]
+        replayed[active] = replayed[active[:, None], MOVE_PERMS[moves[active, step]]]
+    return (states == replayed).all(axis=1)
+
+
+def _check_cubie(colors):
+    same = (cubies_to_facelets(*facelets_to_cubies(colors)) == colors).all(axis=1)
+    return same & (unrank_states(rank_states(colors)) == colors).all(axis=1)
+
+
+def _check_serialization(colors):
+    same = (unpack_states(pack_states(colors)) == colors).all(axis=1)
+    same &= (unpack_states_ranked(pack_states_ranked(colors)) == colors).all(axis=1)
+    return same & (from_facelet_strings(to_facelet_strings(colors)) == colors).all(axis=1)
+
+
+def _check_inverse(starts, moves):
+    inverse = INVERSE_MOVES[moves[:, ::-1]]
+    rows = np.arange(len(starts))[:, None]
+    states = starts
+    for step in range(moves.shape[1]):
+        states = states[rows, MOVE_PERMS[moves[:, step]]]
+    for step in range(inverse.shape[1]):
+        states = states[rows, MOVE_PERMS[inverse[:, step]]]
+    return (states == starts).all(axis=1)
+
+
+def _check_order(states):
+    passed = np.ones(len(states), dtype=bool)
+    for move in range(NUM_MOVES):
+        turned = states
+        for _ in range(2 if move % 3 == 2 else 4):
+            turned = apply_move(turned, move)
+        passed &= (turned == states).all(axis=1)
+        passed &= ~(apply_move(states, move) == states).all(axis=1)
+    return passed
+
+
+def _check_conservation(colors):
+    counts = np.stack([(colors == color).sum(axis=1) for color in range(6)], axis=1)
+    return (counts == 9).all(axis=1) & (validate_states(colors) == VALID)
+
+
+def fuzz_chunk(seed, chunk, count=CHUNK_SIZE, max_length=MAX_LENGTH):
+    """
+    Run every check on one chunk of random sequences.
+
+    Args:
+        seed: run seed
+        chunk: chunk number; (seed, chunk) seeds the chunk's generator
+        count: sequences in the chunk
+        max_length: longest sequence; each chunk draws its own length
+
+    Returns:
+        dict: check name -> (N,) bool array of passed sequences, plus
+        'moves', the chunk's (N, L) sequences
+    """
+    rng = np.random.default_rng([seed, chunk])
+    length = int(rng.integers(0, max_length + 1))
+    moves = rng.integers(0, NUM_MOVES, size=(count, length))
+    labels = np.tile(np.arange(54, dtype=np.uint8), (count, 1))
+
+    expected = reference_states(labels, moves)
+    results = {name: (states == expected).all(axis=1) for name, states in _engine_states(labels, moves).items()}
+
+    colors = SOLVED_STATE[expected]
+    results['expand'] = _check_expand(expected)
+    results['scramble'] = _check_scramble(rng, count, max_length)
+    results['cubie'] = _check_cubie(colors)
+    results['serialization'] = _check_serialization(colors)
+    results['inverse'] = _check_inverse(labels, moves)
+    results['order'] = _check_order(expected)
+    results['conservation'] = _check_conservation(colors)
+    results['moves'] = moves
+    return results
+
+
+def _summarize_chunk(args):
+    seed, chunk, count, max_length = args
+    results = fuzz_chunk(seed, chunk, count, max_length)
+    moves = results.pop('moves')
+    failures = []
+    for name in CHECKS:
+        for row in np.flatnonzero(~results[name])[:1]:
+            sequence = moves[row] if name != 'scramble' else []
+            failures.append({'check': name, 'seed': seed, 'chunk': chunk, 'row': int(row),
+                             'algorithm': ' '.join(MOVE_NAMES[move] for move in sequence)})
+    mismatches = {name: int((~results[name]).sum()) for name in CHECKS}
+    return count, mismatches, failures
+
+
+def run_fuzz(sequences=FAST_SEQUENCES, seed=0, max_length=MAX_LENGTH, chunk_size=CHUNK_SIZE, workers=1,
+             progress=None):
+    """
+    Fuzz every engine with `sequences` random sequences.
+
+    Args:
+        sequences: number of sequences
+        seed: run seed
+        max_length: longest sequence
+        chunk_size: sequences per chunk
+        workers: processes to spread the chunks over (1 runs in this process)
+        progress: optional callable(report) called after every chunk
+
+    Returns:
+        dict: sequences, seconds, mismatches (check -> count) and failures,
+        the first failing sequence of each check in each chunk
+    """
+    counts = [min(chunk_size, sequences - start) for start in range(0, sequences, chunk_size)]
+    tasks = [(seed, chunk, count, max_length) for chunk, count in enumerate(counts)]
+    report = {'sequences': 0, 'seconds': 0.0, 'mismatches': dict.fromkeys(CHECKS, 0), 'failures': []}
+    started = time.perf_counter()
+
+    def merge(result):
+        count, mismatches, failures = result
+        report['sequences'] += count
+        report['seconds'] = time.perf_counter() - started
+        for name, value in mismatches.items():
+            report['mismatches'][name] += value
+        report['failures'].extend(failures)
+        if progress is not None:
+            progress(report)
+
+    if workers <= 1:
+        for task in tasks:
+            merge(_summarize_chunk(task))
+    else:
+        with mp.get_context('spawn').Pool(workers) as pool:
+            for result in pool.imap_unordered(_summarize_chunk, tasks):
+                merge(result)
+    return report
+
+
+def print_fuzz_report(report):
+    rate = report['sequences'] / max(report['seconds'], 1e-9)
+    print(f"{report['sequences']:,} sequences in {report['seconds']:.1f}s ({rate:,.0f}/s)")
+    for name in CHECKS:
+        mismatches = report['mismatches'][name]
+        print(f"  {name:<14} {'ok' if mismatches == 0 else f'{mismatches:,} MISMATCHES'}")
+    for failure in report['failures'][:10]:
+        print(f"  first {failure['check']} failure: seed {failure['seed']} chunk {failure['chunk']} "
+              f"row {failure['row']}: {failure['algorithm'] or '(see the chunk)'}")
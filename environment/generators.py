@@ -0,0 +1,151 @@
+"""
+Batched state generators built on the move tables.
+
+These produce (N, 54) uint8 sticker arrays directly instead of looping over
+Cube objects, which is what the training and evaluation code consumes.
+"""
+
+import numpy as np
+
+from .cubie import (
+    CORNER_ORI_SPACE, CORNER_PERM_SPACE, EDGE_ORI_SPACE, NUM_CORNERS, NUM_EDGES,
+    cubies_to_facelets, permutation_parity, unrank_orientations, unrank_permutations,
+)
+from .moves import MOVE_PERMS, solved_states
+
+
+def random_moves(count, length, rng=None):
+    """
+    Sample random move sequences that never turn the same face twice in a row.
+
+    This is the distribution used by Cube.scramble.
+
+    Args:
+        count: number of sequences
+        length: moves per sequence
+        rng: numpy Generator (a new one is created when omitted)
+
+    Returns:
+        np.ndarray: (count, length) array of move indices
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    moves = np.empty((count, length), dtype=np.intp)
+    last_face = np.full(count, -1, dtype=np.intp)
+
+    for step in range(length):
+        # Draw among the five faces other than the last one
+        face = rng.integers(0, 6 if step == 0 else 5, size=count)
+        face += (last_face >= 0) & (face >= last_face)
+        moves[:, step] = face * 3 + rng.integers(0, 3, size=count)
+        last_face = face
+
+    return moves
+
+
+def scramble_states(count, depth, rng=None, return_moves=False):
+    """
+    Generate a batch of scrambled states.
+
+    Args:
+        count: number of states
+        depth: scramble length, either an int or a (count,) array of per-state lengths
+        rng: numpy Generator
+        return_moves: also return the applied move sequences
+
+    Returns:
+        np.ndarray: (count, 54) uint8 states, and the (count, max_depth) moves
+        padded with -1 when return_moves is True
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    depths = np.broadcast_to(np.asarray(depth, dtype=np.intp), (count,))
+    max_depth = int(depths.max()) if count else 0
+
+    moves = random_moves(count, max_depth, rng)
+    moves[np.arange(max_depth)[None, :] >= depths[:, None]] = -1
+
+    states = solved_states(count)
+    rows = np.arange(count)
+    for step in range(max_depth):
+        active = rows[moves[:, step] >= 0]
+        states[active] = states[active[:, None], MOVE_PERMS[moves[active, step]]]
+
+    if return_moves:
+        return states, moves
+    return states
+
+
+_TABLES = {}
+
+
+def _random_cubie_tables():
+    # Every corner permutation and orientation pattern as one packed integer,
+    # so sampling them is a single integer gather
+    if not _TABLES:
+        corner_perms = unrank_permutations(np.arange(CORNER_PERM_SPACE), NUM_CORNERS)
+        _TABLES['corner_perms'] = corner_perms.view(np.uint64).ravel()
+        _TABLES['corner_parity'] = permutation_parity(corner_perms)
+
+        co = np.zeros((CORNER_ORI_SPACE, NUM_CORNERS), dtype=np.uint8)
+        co[:] = unrank_orientations(np.arange(CORNER_ORI_SPACE), NUM_CORNERS, 3)
+        _TABLES['corner_orientations'] = co.view(np.uint64).ravel()
+
+        eo = np.zeros((EDGE_ORI_SPACE, 16), dtype=np.uint8)
+        eo[:, :NUM_EDGES] = unrank_orientations(np.arange(EDGE_ORI_SPACE), NUM_EDGES, 2)
+        _TABLES['edge_orientations'] = eo.view(np.uint64).reshape(EDGE_ORI_SPACE, 2)
+    return _TABLES
+
+
+def random_cubies(count, rng=None):
+    """
+    Sample cubie arrays uniformly over all reachable cube states.
+
+    Permutations are uniform, then the edge permutation is fixed up with a
+    transposition where its parity differs from the corners'. Orientations
+    are uniform over the patterns whose twist and flip sums are zero.
+
+    Args:
+        count: number of states
+        rng: numpy Generator
+
+    Returns:
+        tuple: (cp, co, ep, eo) uint8 arrays of shapes (count, 8), (count, 8), (count, 12), (count, 12)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    tables = _random_cubie_tables()
+
+    corner_index = rng.integers(0, CORNER_PERM_SPACE, size=count)
+    cp = np.take(tables['corner_perms'], corner_index).view(np.uint8).reshape(count, NUM_CORNERS)
+    co = np.take(tables['corner_orientations'], rng.integers(0, CORNER_ORI_SPACE, size=count))
+    co = co.view(np.uint8).reshape(count, NUM_CORNERS)
+
+    ep = rng.permuted(np.tile(np.arange(NUM_EDGES, dtype=np.uint8), (count, 1)), axis=1)
+    mismatch = permutation_parity(ep) != tables['corner_parity'][corner_index]
+    ep[mismatch, -2:] = ep[mismatch, -2:][:, ::-1]
+
+    eo = np.take(tables['edge_orientations'], rng.integers(0, EDGE_ORI_SPACE, size=count), axis=0)
+    eo = eo.view(np.uint8).reshape(count, 16)[:, :NUM_EDGES]
+
+    return cp, co, ep, eo
+
+
+def random_states(count, rng=None, batch_size=1 << 16):
+    """
+    Sample sticker states uniformly over the ~4.3e19 reachable states.
+
+    Unlike scramble_states this does not walk from the solved cube, so the
+    distance distribution is the true one (almost all states at 17-19 moves).
+
+    Args:
+        count: number of states
+        rng: numpy Generator
+        batch_size: states generated per chunk, bounding temporary memory
+
+    Returns:
+        np.ndarray: (count, 54) uint8 states
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    states = np.empty((count, 54), dtype=np.uint8)
+    for start in range(0, count, batch_size):
+        size = min(batch_size, count - start)
+        states[start:start + size] = cubies_to_facelets(*random_cubies(size, rng))
+    return states
@@ -0,0 +1,161 @@
+"""
+Move tables for the vector representation used by Cube.
+
+Every quarter and half turn is stored as a permutation of the 54 sticker
+positions, so that applying move m to a state is a single gather:
+
+    new_state = state[MOVE_PERMS[m]]
+
+The tables are derived from Cube.rotate itself, which keeps them
+bit-identical to the reference rotation code.
+
+Moves are indexed as face * 3 + turn, where face follows the constants
+(UP, FRONT, LEFT, BACK, RIGHT, DOWN) and turn is 0 for clockwise,
+1 for counterclockwise and 2 for a half turn.
+"""
+
+import numpy as np
+
+from .cube import Cube
+from .constants import UP, FRONT, LEFT, BACK, RIGHT, DOWN
+
+FACE_LETTERS = {
+    UP: 'U', FRONT: 'F', LEFT: 'L',
+    BACK: 'B', RIGHT: 'R', DOWN: 'D'
+}
+
+TURN_SUFFIXES = ['', "'", '2']
+
+NUM_MOVES = 18
+
+MOVE_NAMES = [FACE_LETTERS[face] + suffix for face in range(6) for suffix in TURN_SUFFIXES]
+
+MOVE_INDEX = {name: index for index, name in enumerate(MOVE_NAMES)}
+
+
+def _build_move_perms():
+    perms = np.empty((NUM_MOVES, 54), dtype=np.intp)
+    cube = Cube()
+
+    for face in range(6):
+        for turn, (clockwise, repetitions) in enumerate([(True, 1), (False, 1), (True, 2)]):
+            cube.state = list(range(54))
+            for _ in range(repetitions):
+                cube.rotate(face, clockwise=clockwise)
+            perms[face * 3 + turn] = cube.state
+
+    perms.setflags(write=False)
+    return perms
+
+
+MOVE_PERMS = _build_move_perms()
+
+INVERSE_MOVES = np.array([face * 3 + (1, 0, 2)[turn] for face in range(6) for turn in range(3)], dtype=np.intp)
+
+SOLVED_STATE = np.array(Cube().state, dtype=np.uint8)
+
+OPPOSITE_FACES = {UP: DOWN, DOWN: UP, FRONT: BACK, BACK: FRONT, LEFT: RIGHT, RIGHT: LEFT}
+
+
+def _build_canonical_moves():
+    # Row last + 1 lists the moves allowed after move `last`; row 0 is for no previous move.
+    # A move never follows its own face, and of two opposite faces (which commute)
+    # only the lower-numbered one may come first.
+    allowed = np.ones((NUM_MOVES + 1, NUM_MOVES), dtype=bool)
+    faces = np.arange(NUM_MOVES) // 3
+    for last in range(NUM_MOVES):
+        last_face = last // 3
+        opposite = OPPOSITE_FACES[last_face]
+        allowed[last + 1] = (faces != last_face) & ~((faces == opposite) & (faces < last_face))
+    allowed.setflags(write=False)
+    return allowed
+
+
+CANONICAL_MOVES = _build_canonical_moves()
+
+
+def move_face(move):
+    """Return the face constant turned by a move index."""
+    return move // 3
+
+
+def solved_states(count):
+    """
+    Create a batch of solved states.
+
+    Args:
+        count: number of states
+
+    Returns:
+        np.ndarray: (count, 54) uint8 array
+    """
+    return np.tile(SOLVED_STATE, (count, 1))
+
+
+def apply_move(states, move):
+    """
+    Apply the same move to a batch of states.
+
+    Args:
+        states: (N, 54) array of sticker colors
+        move: move index
+
+    Returns:
+        np.ndarray: (N, 54) array with the move applied
+    """
+    return states[:, MOVE_PERMS[move]]
+
+
+def apply_moves(states, moves):
+    """
+    Apply one move per state to a batch of states.
+
+    Args:
+        states: (N, 54) array of sticker colors
+        moves: (N,) array of move indices
+
+    Returns:
+        np.ndarray: (N, 54) array, row i with moves[i] applied
+    """
+    rows = np.arange(len(states))[:, None]
+    return states[rows, MOVE_PERMS[moves]]
+
+
+def canonical_mask(last_moves):
+    """
+    Moves worth trying after each state's last move.
+
+    Turning the face just turned, or turning a face before its already
+    turned opposite (opposite faces commute), only reaches states that a
+    shorter or reordered sequence reaches too.
+
+    Args:
+        last_moves: (...,) array of move indices, -1 where there is no previous move
+
+    Returns:
+        np.ndarray: (..., 18) bool array, True for the moves to expand
+    """
+    return CANONICAL_MOVES[np.asarray(last_moves, dtype=np.intp) + 1]
+
+
+def expand(states, out=None, last_moves=None):
+    """
+    Apply all 18 moves to every state in one gather.
+
+    Args:
+        states: (..., 54) array of sticker colors
+        out: optional (..., 18, 54) array of the same dtype to write the children into,
+            so a caller expanding chunk after chunk can reuse one buffer
+        last_moves: optional (...,) array of the moves that produced the states
+            (-1 for none); when given, the canonical move mask is returned too
+
+    Returns:
+        np.ndarray: (..., 18, 54) children, children[..., m, :] having move m applied,
+        and the (..., 18) canonical_mask(last_moves) when last_moves is given
+    """
+    states = np.asarray(states)
+    # MOVE_PERMS is always in range; 'clip' skips the bounds check that would buffer `out`
+    children = np.take(states, MOVE_PERMS, axis=-1, out=out, mode='clip')
+    if last_moves is None:
+        return children
+    return children, canonical_mask(last_moves)
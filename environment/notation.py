@@ -0,0 +1,271 @@
+"""
+Move notation shared by every parser in the engine.
+
+    R U' F2     face turns (clockwise, counterclockwise, half)
+    M E S       middle slices, turning like L, D and F
+    Rw r        wide turns: a face with the slice behind it
+    2R          inner layer d of a face (2R is M' on a 3x3)
+    x y z       whole-cube rotations, turning like R, U and F
+
+Lowercase face letters are wide turns and rotations may be written in
+either case; "R2'", "R'2" and "R’" (typographic prime) are accepted, and
+characters that cannot start a move (spaces, brackets, commas) separate
+moves. tokenize is a single pass over the string driven by the _CLASSES
+character table.
+
+On the 3x3 every token compiles to a 54-sticker gather permutation built
+by composing the face turns of MOVE_PERMS with the whole-cube rotations
+of the geometric move table, e.g. M = x' L' R. A whole algorithm compiles
+to one permutation, so replaying it costs a single gather however long it
+is. Slices and rotations move the centers, so states reached with them
+can be solved with every face one color but centers away from home;
+reorient and reorient_states turn such permutations and states back to
+the home orientation with the matching whole-cube rotation.
+
+Lowercase face letters used to be accepted as face turns; they are wide
+turns now, so "r" means Rw and no longer R.
+"""
+
+import collections
+import functools
+
+import numpy as np
+
+from .constants import UP, FRONT, LEFT, BACK, RIGHT, DOWN
+from .moves import FACE_LETTERS, MOVE_PERMS, TURN_SUFFIXES
+
+Token = collections.namedtuple('Token', ['letter', 'turn', 'layers', 'wide'])
+Token.__doc__ = """One move: letter (a face, M/E/S or x/y/z), turn (0 clockwise, 1 counterclockwise,
+2 half), layers (the number before the letter, None without one) and wide."""
+
+SLICE_LETTERS = 'MES'
+ROTATION_LETTERS = 'xyz'
+LETTER_FACES = {letter: face for face, letter in FACE_LETTERS.items()}
+
+# The face each slice and rotation turns like
+SLICE_FACES = {'M': LEFT, 'E': DOWN, 'S': FRONT}
+ROTATION_FACES = {'x': RIGHT, 'y': UP, 'z': FRONT}
+OPPOSITE = {UP: DOWN, DOWN: UP, FRONT: BACK, BACK: FRONT, LEFT: RIGHT, RIGHT: LEFT}
+
+# Character classes of the tokenizer
+_SKIP, _DIGIT, _FACE, _WIDE_FACE, _SLICE, _ROTATION, _WIDE, _PRIME, _TWO = range(9)
+
+
+def _character_classes():
+    classes = {str(digit): _DIGIT for digit in range(10)}
+    classes['2'] = _TWO                         # a digit before a letter, a half turn after one
+    for letter in LETTER_FACES:
+        classes[letter] = _FACE
+        classes[letter.lower()] = _WIDE_FACE
+    for letter in SLICE_LETTERS:
+        classes[letter] = _SLICE
+    for letter in ROTATION_LETTERS:
+        classes[letter] = classes[letter.upper()] = _ROTATION
+    classes['w'] = classes['W'] = _WIDE
+    classes["'"] = classes['’'] = _PRIME
+    return classes
+
+
+_CLASSES = _character_classes()
+_LETTER_CLASSES = (_FACE, _WIDE_FACE, _SLICE, _ROTATION)
+
+
+def tokenize(algorithm):
+    """
+    Split an algorithm string into moves.
+
+    Args:
+        algorithm: move string such as "R U2' r' M2 x y'"
+
+    Returns:
+        list: Token per move, in order
+    """
+    tokens = []
+    position, end = 0, len(algorithm)
+    while position < end:
+        start = position
+        while position < end and _CLASSES.get(algorithm[position]) in (_DIGIT, _TWO):
+            position += 1
+        kind = _CLASSES.get(algorithm[position]) if position < end else _SKIP
+        if kind not in _LETTER_CLASSES:
+            position = max(position, start + 1)
+            continue
+
+        layers = int(algorithm[start:position]) if position > start else None
+        letter = algorithm[position]
+        wide = kind == _WIDE_FACE
+        letter = letter.upper() if kind in (_FACE, _WIDE_FACE) else letter.lower() if kind == _ROTATION else letter
+        position += 1
+        if kind in (_FACE, _WIDE_FACE) and position < end and _CLASSES.get(algorithm[position]) == _WIDE:
+            wide = True
+            position += 1
+
+        # At most one prime and one 2, in either order
+        modifiers = set()
+        while position < end and _CLASSES.get(algorithm[position]) in {_PRIME, _TWO} - modifiers:
+            modifiers.add(_CLASSES[algorithm[position]])
+            position += 1
+        turn = 2 if _TWO in modifiers else (1 if _PRIME in modifiers else 0)
+        tokens.append(Token(letter, turn, layers, wide))
+    return tokens
+
+
+def token_name(token):
+    """Standard spelling of a token, e.g. "Rw'", "2R", "M2", "x"."""
+    prefix = str(token.layers) if token.layers is not None else ''
+    return prefix + token.letter + ('w' if token.wide else '') + TURN_SUFFIXES[token.turn]
+
+
+def is_face_turn(token):
+    """Whether a token is a plain outer-face turn, i.e. one of the 18 engine moves."""
+    return token.letter in LETTER_FACES and not token.wide and token.layers in (None, 1)
+
+
+def face_move(token):
+    """
+    Move index (face * 3 + turn) of a face-turn token.
+
+    Raises:
+        ValueError: for slices, wide turns, inner layers and rotations
+    """
+    if not is_face_turn(token):
+        raise ValueError(f"{token_name(token)} is not an outer face turn")
+    return LETTER_FACES[token.letter] * 3 + token.turn
+
+
+def _turns(quarter):
+    # Clockwise quarter turn -> (clockwise, counterclockwise, half) gather permutations
+    return quarter, np.argsort(quarter), quarter[quarter]
+
+
+def _compose(*perms):
+    # Gather permutation of applying perms in order
+    result = perms[0]
+    for perm in perms[1:]:
+        result = result[perm]
+    return result
+
+
+@functools.lru_cache(maxsize=None)
+def _quarter_turns():
+    # Clockwise quarter turn of every layer set on the 3x3: for each face its
+    # outer layer, middle layer (turning with the face) and the whole cube
+    from .nxn import move_table
+
+    cube_turns = move_table(3).cube_turns
+    quarters = {}
+    for face in range(6):
+        outer, opposite = MOVE_PERMS[face * 3], MOVE_PERMS[OPPOSITE[face] * 3 + 1]
+        whole = cube_turns[face * 3]
+        # The whole cube is this face, the middle slice and the opposite face turned back
+        middle = _compose(whole, np.argsort(outer), np.argsort(opposite))
+        quarters[face] = (outer, middle, whole)
+    return quarters
+
+
+def token_perm(token):
+    """
+    54-sticker gather permutation of one token on the 3x3.
+
+    Returns:
+        np.ndarray: (54,) perm, new_state = state[perm]
+
+    Raises:
+        ValueError: for layer counts that do not exist on a 3x3
+    """
+    quarters = _quarter_turns()
+    if token.letter in SLICE_LETTERS:
+        quarter = quarters[SLICE_FACES[token.letter]][1]
+    elif token.letter in ROTATION_LETTERS:
+        quarter = quarters[ROTATION_FACES[token.letter]][2]
+    else:
+        outer, middle, whole = quarters[LETTER_FACES[token.letter]]
+        count = token.layers if token.layers is not None else (2 if token.wide else 1)
+        if token.wide and count in (1, 2, 3):
+            quarter = (outer, _compose(outer, middle), whole)[count - 1]
+        elif not token.wide and count in (1, 2):
+            quarter = (outer, middle)[count - 1]
+        else:
+            raise ValueError(f"{token_name(token)} is not a move on a 3x3 cube")
+    return _turns(quarter)[token.turn]
+
+
+@functools.lru_cache(maxsize=4096)
+def compile_algorithm(algorithm):
+    """
+    Compose a whole algorithm into one 54-sticker permutation.
+
+    Args:
+        algorithm: move string in the notation above
+
+    Returns:
+        np.ndarray: read-only (54,) perm with state[perm] the state after the
+        algorithm (the identity for an empty algorithm)
+    """
+    perm = np.arange(54)
+    for token in tokenize(algorithm):
+        perm = perm[token_perm(token)]
+    perm.setflags(write=False)
+    return perm
+
+
+_CENTERS = np.arange(4, 54, 9)
+_CENTER_CODES = 6 ** np.arange(6)
+
+
+@functools.lru_cache(maxsize=None)
+def _orientations():
+    # The 24 whole-cube rotations by closure of x and y, and a lookup from the
+    # center colors each leaves (as a base-6 code) to the rotation back home
+    generators = [compile_algorithm('x'), compile_algorithm('y')]
+    found = {tuple(_CENTERS): np.arange(54)}
+    frontier = [np.arange(54)]
+    while frontier:
+        perm = frontier.pop()
+        for generator in generators:
+            rotated = perm[generator]
+            key = tuple(rotated[_CENTERS])
+            if key not in found:
+                found[key] = rotated
+                frontier.append(rotated)
+    home = np.stack([np.argsort(rotation) for rotation in found.values()])
+    lookup = np.full(6 ** 6, -1, dtype=np.int8)
+    lookup[(np.array(list(found)) // 9) @ _CENTER_CODES] = np.arange(len(found))
+    return home, lookup
+
+
+def reorient(perm):
+    """
+    Follow a sticker permutation with the whole-cube rotation that puts the centers back.
+
+    Args:
+        perm: (54,) gather permutation of a token sequence
+
+    Returns:
+        np.ndarray: (54,) permutation with every center at home
+    """
+    home, lookup = _orientations()
+    return perm[home[lookup[(perm[_CENTERS] // 9) @ _CENTER_CODES]]]
+
+
+def reorient_states(states):
+    """
+    Turn sticker states as whole cubes so that their centers are at home.
+
+    Args:
+        states: (N, 54) sticker states
+
+    Returns:
+        tuple: ((N, 54) reoriented states, (N,) bool mask of the states whose
+        centers show a whole-cube orientation; the others are returned as given)
+    """
+    home, lookup = _orientations()
+    states = np.asarray(states)
+    colors = states[:, _CENTERS].astype(np.int64)
+    known = ((colors >= 0) & (colors < 6)).all(axis=1)
+    index = np.where(known, lookup[np.where(known[:, None], colors, 0) @ _CENTER_CODES], -1)
+    oriented = index >= 0
+    result = states.copy()
+    rows = np.flatnonzero(oriented)
+    result[rows] = states[rows[:, None], home[index[rows]]]
+    return result, oriented
@@ -0,0 +1,455 @@
+"""
+NxN cubes with move tables generated from the cube geometry.
+
+Stickers are numbered like Cube: face * N * N + row * N + col, faces in
+the order (UP, FRONT, LEFT, BACK, RIGHT, DOWN), each face laid out as in
+the cube net. Every sticker is placed in 3D, the stickers of a layer are
+rotated by a quarter turn and read back, which gives the layer's gather
+permutation for any N. For N = 3 the tables equal moves.MOVE_PERMS.
+
+Moves turn one layer, counted from a face: layer 0 is the face itself,
+layer d the d-th slice behind it. Only the N // 2 outer layers of each
+face are moves, so for odd N the middle slices (and with them the centers)
+stay fixed, as in Cube. Move indices are (face * layers + layer) * 3 + turn,
+which for N = 3 is the face * 3 + turn order of moves.py. Names follow the
+usual NxN notation: "R", "2R'" (second layer), "3Rw2" (three outer layers,
+parsed into single-layer moves); parsing uses environment.notation.
+
+Tables are built once per size and cached. The 2x2 is small enough to
+enumerate completely: PocketCubeSolver holds the distance of all
+3,674,160 positions and returns optimal solutions.
+"""
+
+import itertools
+
+import numpy as np
+
+from .constants import UP, FRONT, LEFT, BACK, RIGHT, DOWN
+from .moves import FACE_LETTERS, TURN_SUFFIXES
+from .notation import LETTER_FACES, token_name, tokenize
+
+# Face -> (axis, +1 / -1 side) in x (right), y (up), z (front) coordinates
+_FACE_AXES = {
+    UP: (1, 1), DOWN: (1, -1),
+    FRONT: (2, 1), BACK: (2, -1),
+    RIGHT: (0, 1), LEFT: (0, -1),
+}
+
+
+_TABLES = {}
+
+
+def sticker_coordinates(size):
+    """
+    Sticker centers in doubled coordinates (so they are integers).
+
+    Args:
+        size: cube size N
+
+    Returns:
+        np.ndarray: (6 * N * N, 3) int array, row i the center of sticker i,
+        cubie layers at -(N - 1), -(N - 3), ..., N - 1 and faces at +-N
+    """
+    last = size - 1
+    coords = np.empty((6 * size * size, 3), dtype=np.int64)
+
+    def place(face, row, col, x, y, z):
+        point = [2 * x - last, 2 * y - last, 2 * z - last]
+        axis, side = _FACE_AXES[face]
+        point[axis] = side * size
+        coords[face * size * size + row * size + col] = point
+
+    for x, y, z in itertools.product(range(size), repeat=3):
+        if x == 0:
+            place(LEFT, last - y, z, x, y, z)
+        if x == last:
+            place(RIGHT, last - y, last - z, x, y, z)
+        if y == 0:
+            place(DOWN, last - z, x, x, y, z)
+        if y == last:
+            place(UP, z, x, x, y, z)
+        if z == 0:
+            place(BACK, last - y, last - x, x, y, z)
+        if z == last:
+            place(FRONT, last - y, x, x, y, z)
+    return coords
+
+
+def _quarter_turn(axis, sign):
+    # Rotation by sign * 90 degrees about a coordinate axis (right-hand rule)
+    matrix = np.zeros((3, 3), dtype=np.int64)
+    matrix[axis, axis] = 1
+    first, second = (axis + 1) % 3, (axis + 2) % 3
+    matrix[first, second] = -sign
+    matrix[second, first] = sign
+    return matrix
+
+
+def _gather_permutation(coords, rotated):
+    # new_state[i] = state[perm[i]]: sticker i receives the sticker rotated onto it
+    lookup = {tuple(point): index for index, point in enumerate(coords)}
+    perm = np.empty(len(coords), dtype=np.intp)
+    for index, point in enumerate(rotated):
+        perm[lookup[tuple(point)]] = index
+    return perm
+
+
+def _turn_permutation(coords, quarter, moving, turn):
+    # Turn 0, 1, 2: one, three or two quarter turns of the moving stickers
+    rotated = coords.copy()
+    for _ in range((1, 3, 2)[turn]):
+        rotated[moving] = rotated[moving] @ quarter.T
+    return _gather_permutation(coords, rotated)
+
+
+class MoveTable:
+    """Generated move and rotation permutations of one cube size."""
+
+    def __init__(self, size):
+        """
+        Args:
+            size: cube size N >= 2
+        """
+        if size < 2:
+            raise ValueError(f"cube size must be at least 2, got {size}")
+        self.size = size
+        self.layers = size // 2
+        self.num_stickers = 6 * size * size
+        self.num_moves = 6 * self.layers * 3
+
+        coords = sticker_coordinates(size)
+        self.perms = np.empty((self.num_moves, self.num_stickers), dtype=np.intp)
+        # Whole-cube turns in the direction of each face, indexed face * 3 + turn
+        self.cube_turns = np.empty((18, self.num_stickers), dtype=np.intp)
+        self.names = []
+        for face in range(6):
+            axis, side = _FACE_AXES[face]
+            # Clockwise seen from outside the face is a negative turn about its outward axis
+            quarter = _quarter_turn(axis, -side)
+            for layer in range(self.layers):
+                depth = side * (size - 1 - 2 * layer)
+                # Stickers of the layer: on the face plane itself only for the outer layer
+                moving = (coords[:, axis] == depth) | ((coords[:, axis] == side * size) & (layer == 0))
+                prefix = str(layer + 1) if layer else ''
+                for turn in range(3):
+                    self.perms[(face * self.layers + layer) * 3 + turn] = _turn_permutation(coords, quarter, moving, turn)
+                    self.names.append(prefix + FACE_LETTERS[face] + TURN_SUFFIXES[turn])
+            everything = np.ones(len(coords), dtype=bool)
+            for turn in range(3):
+                self.cube_turns[face * 3 + turn] = _turn_permutation(coords, quarter, everything, turn)
+        self.perms.setflags(write=False)
+        self.cube_turns.setflags(write=False)
+
+        self.index = {name: move for move, name in enumerate(self.names)}
+        self.inverse = np.array([move - move % 3 + (1, 0, 2)[move % 3] for move in range(self.num_moves)],
+                                dtype=np.intp)
+        self.solved_state = np.repeat(np.arange(6, dtype=np.uint8), size * size)
+
+        # The 24 whole-cube rotations: signed permutation matrices with determinant 1
+        rotations = []
+        for axes in itertools.permutations(range(3)):
+            for signs in itertools.product((1, -1), repeat=3):
+                matrix = np.zeros((3, 3), dtype=np.int64)
+                matrix[range(3), axes] = signs
+                if round(np.linalg.det(matrix)) == 1:
+                    rotations.append(_gather_permutation(coords, coords @ matrix.T))
+        self.rotations = np.array(rotations, dtype=np.intp)
+
+    def move(self, face, layer=0, turn=0):
+        """Move index of turning a layer (turn 0: clockwise, 1: counterclockwise, 2: half)."""
+        return (face * self.layers + layer) * 3 + turn
+
+    def parse(self, algorithm):
+        """
+        Parse NxN notation into move indices.
+
+        Accepts face turns ("R", "U'", "F2"), inner layers ("2R", "3U'") and
+        wide turns ("Rw", "r", "3Rw2"), tokenized by environment.notation.
+
+        Returns:
+            list: move indices, a wide turn giving one move per layer
+
+        Raises:
+            ValueError: for slices, rotations and layers beyond the middle
+        """
+        moves = []
+        for token in tokenize(algorithm):
+            if token.letter not in LETTER_FACES:
+                raise ValueError(f"{token_name(token)} is not a layer move of the NxN table")
+            number = token.layers if token.layers is not None else (2 if token.wide else 1)
+            layers = range(number) if token.wide else [number - 1]
+            for layer in layers:
+                if layer >= self.layers:
+                    raise ValueError(f"layer {layer + 1} of {token.letter} is not a move on a {self.size}x{self.size} cube")
+                moves.append(self.move(LETTER_FACES[token.letter], layer, token.turn))
+        return moves
+
+
+def move_table(size):
+    """The cached MoveTable of a cube size."""
+    if size not in _TABLES:
+        _TABLES[size] = MoveTable(size)
+    return _TABLES[size]
+
+
+def solved_states(count, size):
+    """(count, 6 * N * N) uint8 batch of solved states."""
+    return np.tile(move_table(size).solved_state, (count, 1))
+
+
+def apply_moves(states, moves, size):
+    """
+    Apply one move per state to a batch of states.
+
+    Args:
+        states: (M, 6 * N * N) sticker states
+        moves: (M,) move indices
+        size: cube size N
+
+    Returns:
+        np.ndarray: (M, 6 * N * N) states
+    """
+    rows = np.arange(len(states))[:, None]
+    return states[rows, move_table(size).perms[moves]]
+
+
+def expand(states, size, out=None):
+    """
+    Apply every move of an N cube to each state in one gather.
+
+    Returns:
+        np.ndarray: (..., num_moves, 6 * N * N) children, written into out when given
+    """
+    return np.take(np.asarray(states), move_table(size).perms, axis=-1, out=out, mode='clip')
+
+
+def scramble_states(count, depth, size, rng=None):
+    """
+    Scramble a batch with uniformly random moves, never repeating a face.
+
+    Args:
+        count: number of states
+        depth: moves per state
+        size: cube size N
+        rng: numpy Generator
+
+    Returns:
+        np.ndarray: (count, 6 * N * N) uint8 states
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    table = move_table(size)
+    per_face = table.layers * 3
+    states = solved_states(count, size)
+    last_face = np.full(count, -1)
+    for step in range(depth):
+        face = rng.integers(0, 6 if step == 0 else 5, size=count)
+        face += (last_face >= 0) & (face >= last_face)
+        states = apply_moves(states, face * per_face + rng.integers(0, per_face, size=count), size)
+        last_face = face
+    return states
+
+
+def is_solved(states, size):
+    """Whether each face shows one color, i.e. solved up to a whole-cube rotation."""
+    faces = np.asarray(states).reshape(len(states), 6, size * size)
+    return (faces == faces[:, :, :1]).all(axis=(1, 2))
+
+
+class NxNCube:
+    """An NxN Rubik's Cube using the same vector representation as Cube."""
+
+    def __init__(self, size=3):
+        """
+        Args:
+            size: cube size N >= 2
+        """
+        self.size = size
+        self.table = move_table(size)
+        self.state = self.table.solved_state.tolist()
+
+    def rotate(self, face, clockwise=True, layer=0):
+        """
+        Turn one layer.
+
+        Args:
+            face: the face the layer is counted from (UP, FRONT, LEFT, BACK, RIGHT, DOWN)
+            clockwise: True for clockwise seen from that face
+            layer: 0 for the face itself, up to N // 2 - 1
+        """
+        self.apply_move(self.table.move(face, layer, 0 if clockwise else 1))
+
+    def apply_move(self, move):
+        """Apply a move index of this cube's MoveTable."""
+        self.state = [self.state[i] for i in self.table.perms[move]]
+
+    def execute_algorithm(self, algorithm):
+        """
+        Execute an algorithm in NxN notation (e.g. "R U R' 2R2 Rw'").
+
+        Args:
+            algorithm: string of moves; see MoveTable.parse
+        """
+        for move in self.table.parse(algorithm):
+            self.apply_move(move)
+
+    def is_solved(self):
+        return self.state == self.table.solved_state.tolist()
+
+    def scramble(self, moves=20, rng=None):
+        """
+        Scramble with random layer turns, never turning the same face twice in a row.
+
+        Returns:
+            str: the applied algorithm
+        """
+        sequence = []
+        rng = np.random.default_rng() if rng is None else rng
+        last_face = None
+        for _ in range(moves):
+            face = int(rng.choice([f for f in range(6) if f != last_face]))
+            move = self.table.move(face, int(rng.integers(self.table.layers)), int(rng.integers(3)))
+            self.apply_move(move)
+            sequence.append(self.table.names[move])
+            last_face = face
+        return ' '.join(sequence)
+
+    def reset(self):
+        self.state = self.table.solved_state.tolist()
+
+
+# Turns of the U, F and R faces never move the DBL corner of a 2x2, so the
+# 3,674,160 positions with DBL in place are the whole puzzle up to rotation
+POCKET_FACES = (UP, FRONT, RIGHT)
+POCKET_STATES = 3674160
+
+
+def _pocket_corner_stickers():
+    # Stickers of the DBL corner: the cubie at x = y = z = 0
+    coords = sticker_coordinates(2)
+    return np.flatnonzero((coords < 0).all(axis=1))
+
+
+_POCKET_FIXED = _pocket_corner_stickers()
+_POCKET_FREE = np.setdiff1d(np.arange(24), _POCKET_FIXED)
+_POCKET_SHIFTS = np.arange(3 * (len(_POCKET_FREE) - 1), -1, -3, dtype=np.uint64)
+_POCKET_WEIGHTS = (np.uint64(1) << _POCKET_SHIFTS).astype(np.int64)      # 8**20 * 7 + ... < 2**63
+_POCKET_SOLVED = move_table(2).solved_state
+_POCKET_CHUNK = 1 << 16
+
+
+def pocket_keys(states):
+    """
+    Pack 2x2 states with the DBL corner in place into uint64 keys.
+
+    The 21 other stickers take 3 bits each (63 bits).
+
+    Args:
+        states: (M, 24) sticker states
+
+    Returns:
+        np.ndarray: (M,) uint64 keys
+    """
+    free = np.asarray(states)[:, _POCKET_FREE].astype(np.int64)
+    return (free @ _POCKET_WEIGHTS).view(np.uint64)
+
+
+def pocket_states(keys):
+    """
+    Inverse of pocket_keys.
+
+    Returns:
+        np.ndarray: (M, 24) uint8 states with the DBL corner in place
+    """
+    keys = np.asarray(keys, dtype=np.uint64)
+    states = np.empty((len(keys), 24), dtype=np.uint8)
+    states[:, _POCKET_FIXED] = _POCKET_SOLVED[_POCKET_FIXED]
+    states[:, _POCKET_FREE] = (keys[:, None] >> _POCKET_SHIFTS) & np.uint64(7)
+    return states
+
+
+class PocketCubeSolver:
+    """
+    Optimal 2x2 solver from a complete breadth-first enumeration.
+
+    Distances count quarter and half turns of U, F and R (the face-turn
+    metric for the 2x2 with one corner fixed); the most distant positions
+    need 11 moves. Building the table takes several seconds.
+    """
+
+    def __init__(self):
+        table = move_table(2)
+        self.table = table
+        self.moves = np.array([table.move(face, 0, turn) for face in POCKET_FACES for turn in range(3)])
+
+        # Levels are kept as sorted keys; a child of level d lies in level
+        # d - 1, d or d + 1, so only the last two levels need checking
+        perms = table.perms[self.moves]
+        levels = [pocket_keys(table.solved_state[None, :])]
+        previous = levels[0][:0]
+        while True:
+            frontier = levels[-1]
+            children = np.sort(np.concatenate([
+                pocket_keys(np.take(pocket_states(frontier[start:start + _POCKET_CHUNK]), perms, axis=1).reshape(-1, 24))
+                for start in range(0, len(frontier), _POCKET_CHUNK)
+            ]))
+            children = children[np.concatenate([[True], children[1:] != children[:-1]])]
+            new = children[~(np.isin(children, frontier, assume_unique=True) | np.isin(children, previous, assume_unique=True))]
+            if not len(new):
+                break
+            previous = frontier
+            levels.append(new)
+
+        self.level_sizes = [len(level) for level in levels]
+        keys = np.concatenate(levels)
+        order = np.argsort(keys)
+        self.keys = keys[order]
+        self.distances = np.repeat(np.arange(len(levels), dtype=np.uint8), self.level_sizes)[order]
+
+        # Conjugating a move by a rotation gives the move in the rotated frame
+        move_lookup = {perm.tobytes(): move for move, perm in enumerate(table.perms)}
+        self._frame_moves = np.empty((len(table.rotations), table.num_moves), dtype=np.intp)
+        for index, rotation in enumerate(table.rotations):
+            inverse = np.argsort(rotation)
+            for move, perm in enumerate(table.perms):
+                conjugate = rotation[perm][inverse]
+                self._frame_moves[index, move] = move_lookup[conjugate.tobytes()]
+
+    def distance(self, states):
+        """Optimal move counts of a batch of 2x2 states, shape (M,)."""
+        oriented, _ = self._orient(np.asarray(states))
+        return self.distances[np.searchsorted(self.keys, pocket_keys(oriented))]
+
+    def solve(self, states):
+        """
+        Optimal solutions for a batch of 2x2 states.
+
+        Args:
+            states: (M, 24) sticker states
+
+        Returns:
+            list: M lists of move indices of move_table(2) that leave every face
+            one color (the cube may end up in another orientation)
+        """
+        states, rotation = self._orient(np.asarray(states))
+        distances = self.distances[np.searchsorted(self.keys, pocket_keys(states))].astype(np.intp)
+        solutions = [[] for _ in range(len(states))]
+        for _ in range(int(distances.max(initial=0))):
+            active = np.flatnonzero(distances > 0)
+            children = np.take(states[active], self.table.perms[self.moves], axis=1)
+            child_keys = pocket_keys(children.reshape(-1, 24)).reshape(len(active), -1)
+            child_distances = self.distances[np.searchsorted(self.keys, child_keys)]
+            choice = np.argmax(child_distances < distances[active, None], axis=1)
+            states[active] = children[np.arange(len(active)), choice]
+            distances[active] -= 1
+            frame_moves = self._frame_moves[rotation[active], self.moves[choice]]
+            for row, move in zip(active, frame_moves):
+                solutions[row].append(int(move))
+        return solutions
+
+    def _orient(self, states):
+        # Rotate each state so that the DBL corner shows the D, B and L colors
+        rotated = states[:, self.table.rotations]
+        target = self.table.solved_state[_POCKET_FIXED]
+        match = (rotated[:, :, _POCKET_FIXED] == target).all(axis=2)
+        rotation = np.argmax(match, axis=1)
+        return rotated[np.arange(len(states)), rotation], rotation
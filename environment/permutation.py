@@ -0,0 +1,181 @@
+"""
+Permutation algebra for move sequences.
+
+A Permutation wraps a gather permutation of the sticker positions, the
+convention of MOVE_PERMS: applying it to a state is state[perm]. Products
+read left to right like algorithms, so for two algorithms A and B
+
+    Permutation.from_algorithm("A B") == A * B
+
+and inverses, powers (by repeated squaring), conjugates [A: B] = A B A'
+and commutators [A, B] = A B A' B' are all array operations on 54
+indices. Cycle structure and order come from the permutation itself, so
+"does (R U R' U')6 return to solved" is one power and a comparison
+instead of 24 moves replayed.
+
+permutation_orders computes the orders of a whole (N, 54) batch at once,
+which is what macro-action mining needs.
+"""
+
+import math
+
+import numpy as np
+
+from .moves import MOVE_PERMS
+from .notation import compile_algorithm
+
+
+class Permutation:
+    """An immutable permutation of sticker positions."""
+
+    def __init__(self, perm):
+        """
+        Args:
+            perm: gather permutation, new_state = state[perm]
+        """
+        perm = np.array(perm, dtype=np.intp)
+        if perm.ndim != 1 or not np.array_equal(np.sort(perm), np.arange(len(perm))):
+            raise ValueError("a permutation must be a 1-D arrangement of 0 .. n - 1")
+        perm.setflags(write=False)
+        self.perm = perm
+
+    @classmethod
+    def _wrap(cls, perm):
+        # Results of composing permutations are permutations: skip the check
+        permutation = cls.__new__(cls)
+        perm.setflags(write=False)
+        permutation.perm = perm
+        return permutation
+
+    @classmethod
+    def identity(cls, size=54):
+        return cls._wrap(np.arange(size))
+
+    @classmethod
+    def from_algorithm(cls, algorithm):
+        """Permutation of an algorithm string in the notation execute_algorithm accepts."""
+        return cls._wrap(compile_algorithm(algorithm))
+
+    @classmethod
+    def from_moves(cls, moves):
+        """Permutation of a sequence of move indices (face * 3 + turn)."""
+        perm = np.arange(MOVE_PERMS.shape[1])
+        for move in moves:
+            perm = perm[MOVE_PERMS[move]]
+        return cls._wrap(perm)
+
+    def __len__(self):
+        return len(self.perm)
+
+    def __mul__(self, other):
+        # self, then other
+        return Permutation._wrap(self.perm[other.perm])
+
+    def __pow__(self, exponent):
+        base = self if exponent >= 0 else self.inverse()
+        exponent = abs(exponent)
+        result = np.arange(len(self.perm))
+        square = base.perm
+        while exponent:
+            if exponent & 1:
+                result = result[square]
+            square = square[square]
+            exponent >>= 1
+        return Permutation._wrap(result)
+
+    def __eq__(self, other):
+        return isinstance(other, Permutation) and np.array_equal(self.perm, other.perm)
+
+    def __hash__(self):
+        return hash(self.perm.tobytes())
+
+    def __repr__(self):
+        cycles = ' '.join('(' + ' '.join(map(str, cycle)) + ')' for cycle in self.cycles())
+        return f"Permutation({cycles or 'identity'})"
+
+    def inverse(self):
+        inverse = np.empty_like(self.perm)
+        inverse[self.perm] = np.arange(len(self.perm))
+        return Permutation._wrap(inverse)
+
+    def is_identity(self):
+        return bool((self.perm == np.arange(len(self.perm))).all())
+
+    def apply(self, states):
+        """
+        Apply the permutation to one state or a batch.
+
+        Args:
+            states: (..., n) sticker states
+
+        Returns:
+            np.ndarray: states with the last axis permuted
+        """
+        return np.asarray(states)[..., self.perm]
+
+    def cycles(self):
+        """
+        Non-trivial cycles, each starting at its smallest position.
+
+        Returns:
+            list: tuples (i, p[i], p[p[i]], ...); the sticker at each
+            position of a cycle comes from the next one
+        """
+        seen = np.zeros(len(self.perm), dtype=bool)
+        cycles = []
+        for start in range(len(self.perm)):
+            if seen[start] or self.perm[start] == start:
+                continue
+            cycle = []
+            position = start
+            while not seen[position]:
+                seen[position] = True
+                cycle.append(position)
+                position = int(self.perm[position])
+            cycles.append(tuple(cycle))
+        return cycles
+
+    def cycle_type(self):
+        """Lengths of the non-trivial cycles, longest first."""
+        return sorted((len(cycle) for cycle in self.cycles()), reverse=True)
+
+    def order(self):
+        """Smallest k > 0 with self ** k the identity."""
+        return math.lcm(*self.cycle_type())
+
+
+def conjugate(setup, body):
+    """[setup: body] = setup body setup'."""
+    return setup * body * setup.inverse()
+
+
+def commutator(first, second):
+    """[first, second] = first second first' second'."""
+    return first * second * first.inverse() * second.inverse()
+
+
+def permutation_orders(perms):
+    """
+    Orders of a batch of permutations.
+
+    Every position's cycle length is found by composing the batch with
+    itself until the position returns, at most n gathers for n positions;
+    the order is the lcm of those lengths.
+
+    Args:
+        perms: (N, n) gather permutations
+
+    Returns:
+        np.ndarray: (N,) int64 orders
+    """
+    perms = np.asarray(perms, dtype=np.intp)
+    identity = np.arange(perms.shape[1])
+    rows = np.arange(len(perms))[:, None]
+    lengths = np.zeros(perms.shape, dtype=np.int64)
+    power = perms
+    for step in range(1, perms.shape[1] + 1):
+        lengths[(lengths == 0) & (power == identity)] = step
+        if lengths.all():
+            break
+        power = power[rows, perms]
+    return np.lcm.reduce(lengths, axis=1)
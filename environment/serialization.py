@@ -0,0 +1,214 @@
+"""
+Compact encodings of cube states and move sequences.
+
+    format             size per item   notes
+    3-bit stickers     21 bytes        any 54-sticker state, colors 0-5
+    rank bytes         9 bytes         reachable states only, sorts like RANK_DTYPE
+    5-bit moves        5 bits/move     the 18 face-metric moves, self-delimiting
+    facelet string     54 characters   standard URFDLB order
+
+The facelet string lists the U, R, F, D, L, B faces, each row by row in
+the usual cube-net orientation, which is exactly the per-face layout of
+Cube. Each character names the face whose center has that sticker's color.
+
+Every function works on batches; the single-item helpers wrap them.
+A full rank needs 66 bits (4.3e19 > 2^64 states), so the rank form takes
+9 bytes rather than 8.
+"""
+
+import numpy as np
+
+from .constants import UP, FRONT, LEFT, BACK, RIGHT, DOWN
+from .cubie import RANK_DTYPE, rank_states, unrank_states
+from .moves import FACE_LETTERS, MOVE_NAMES
+from .notation import face_move, tokenize
+
+STICKER_BITS = 3
+PACKED_STATE_BYTES = 21             # ceil(54 * 3 / 8)
+RANK_BYTES = 9                      # 4-byte corner rank + 5-byte edge rank
+MOVE_BITS = 5
+END_OF_MOVES = (1 << MOVE_BITS) - 1
+
+FACELET_ORDER = [UP, RIGHT, FRONT, DOWN, LEFT, BACK]
+FACELET_STRING_INDEX = np.concatenate([np.arange(face * 9, face * 9 + 9) for face in FACELET_ORDER])
+
+_COLOR_LETTERS = np.frombuffer(''.join(FACE_LETTERS[face] for face in range(6)).encode(), dtype=np.uint8)
+_LETTER_COLORS = np.full(256, 255, dtype=np.uint8)
+_LETTER_COLORS[_COLOR_LETTERS] = np.arange(6)
+
+
+def pack_states(states):
+    """
+    Pack sticker states at 3 bits per sticker.
+
+    Args:
+        states: (N, 54) array of colors in 0-5
+
+    Returns:
+        np.ndarray: (N, 21) uint8
+    """
+    states = np.asarray(states, dtype=np.uint8)
+    bits = np.unpackbits(states[..., None], axis=2)[..., -STICKER_BITS:]
+    return np.packbits(bits.reshape(len(states), -1), axis=1)
+
+
+def unpack_states(packed):
+    """
+    Inverse of pack_states.
+
+    Returns:
+        np.ndarray: (N, 54) uint8 states
+    """
+    packed = np.asarray(packed, dtype=np.uint8)
+    bits = np.unpackbits(packed, axis=1, count=54 * STICKER_BITS).reshape(len(packed), 54, STICKER_BITS)
+    return (bits[..., 0] << 2) | (bits[..., 1] << 1) | bits[..., 2]
+
+
+def pack_ranks(ranks):
+    """
+    Store RANK_DTYPE ranks as 9 big-endian bytes, so byte order is rank order.
+
+    Args:
+        ranks: (N,) RANK_DTYPE array
+
+    Returns:
+        np.ndarray: (N, 9) uint8
+    """
+    packed = np.empty((len(ranks), RANK_BYTES), dtype=np.uint8)
+    packed[:, :4] = ranks['corner'].astype('>u4').view(np.uint8).reshape(-1, 4)
+    packed[:, 4:] = ranks['edge'].astype('>u8').view(np.uint8).reshape(-1, 8)[:, 3:]
+    return packed
+
+
+def unpack_ranks(packed):
+    """
+    Inverse of pack_ranks.
+
+    Returns:
+        np.ndarray: (N,) RANK_DTYPE
+    """
+    packed = np.asarray(packed, dtype=np.uint8)
+    ranks = np.empty(len(packed), dtype=RANK_DTYPE)
+    ranks['corner'] = np.ascontiguousarray(packed[:, :4]).view('>u4')[:, 0]
+    edge = np.zeros((len(packed), 8), dtype=np.uint8)
+    edge[:, 3:] = packed[:, 4:]
+    ranks['edge'] = edge.view('>u8')[:, 0]
+    return ranks
+
+
+def pack_states_ranked(states):
+    """Encode reachable states in 9 bytes each through their rank."""
+    return pack_ranks(rank_states(states))
+
+
+def unpack_states_ranked(packed):
+    """Inverse of pack_states_ranked."""
+    return unrank_states(unpack_ranks(packed))
+
+
+def pack_moves(moves):
+    """
+    Pack move sequences at 5 bits per move.
+
+    Args:
+        moves: (N, L) move indices, padded with -1 after the end of shorter sequences
+
+    Returns:
+        np.ndarray: (N, ceil(5 * L / 8)) uint8; padding and unused trailing
+        bits are all ones, so a sequence ends at the first all-ones code
+    """
+    moves = np.asarray(moves, dtype=np.int64)
+    codes = np.where(moves < 0, END_OF_MOVES, moves).astype(np.uint8)
+    bits = np.unpackbits(codes[..., None], axis=2)[..., -MOVE_BITS:].reshape(len(moves), -1)
+    padding = (-bits.shape[1]) % 8
+    bits = np.concatenate([bits, np.ones((len(moves), padding), dtype=np.uint8)], axis=1)
+    return np.packbits(bits, axis=1)
+
+
+def unpack_moves(packed):
+    """
+    Inverse of pack_moves.
+
+    Returns:
+        np.ndarray: (N, floor(8 * B / 5)) move indices, -1 after each sequence's end
+    """
+    packed = np.asarray(packed, dtype=np.uint8)
+    length = packed.shape[1] * 8 // MOVE_BITS
+    bits = np.unpackbits(packed, axis=1)[:, :length * MOVE_BITS].reshape(len(packed), length, MOVE_BITS)
+    codes = bits @ (1 << np.arange(MOVE_BITS - 1, -1, -1))
+    ended = np.cumsum(codes == END_OF_MOVES, axis=1) > 0
+    return np.where(ended, -1, codes).astype(np.int64)
+
+
+def algorithm_to_moves(algorithm):
+    """
+    Parse an algorithm string such as "R U2 R' U'" into move indices.
+
+    Returns:
+        list: move indices, one per face turn (half turns are a single move)
+
+    Raises:
+        ValueError: for slices, wide turns and rotations, which are not engine moves
+    """
+    return [face_move(token) for token in tokenize(algorithm)]
+
+
+def moves_to_algorithm(moves):
+    """Format move indices as a space-separated algorithm string."""
+    return ' '.join(MOVE_NAMES[move] for move in moves if move >= 0)
+
+
+def encode_algorithm(algorithm):
+    """Encode an algorithm string in 5 bits per move."""
+    moves = algorithm_to_moves(algorithm)
+    return pack_moves(np.array([moves], dtype=np.int64).reshape(1, -1))[0].tobytes()
+
+
+def decode_algorithm(data):
+    """Inverse of encode_algorithm."""
+    return moves_to_algorithm(unpack_moves(np.frombuffer(data, dtype=np.uint8)[None, :])[0])
+
+
+def to_facelet_strings(states):
+    """
+    Convert sticker states to URFDLB facelet strings.
+
+    Args:
+        states: (N, 54) array of colors
+
+    Returns:
+        list: N strings of 54 characters
+    """
+    letters = _COLOR_LETTERS[np.asarray(states, dtype=np.intp)[:, FACELET_STRING_INDEX]]
+    return [row.tobytes().decode('ascii') for row in letters]
+
+
+def from_facelet_strings(strings):
+    """
+    Inverse of to_facelet_strings.
+
+    Returns:
+        np.ndarray: (N, 54) uint8 states
+
+    Raises:
+        ValueError: for strings of the wrong length or with unknown letters
+    """
+    data = np.frombuffer(''.join(strings).encode('ascii'), dtype=np.uint8)
+    if any(len(string) != 54 for string in strings):
+        raise ValueError("facelet strings must have exactly 54 characters")
+    colors = _LETTER_COLORS[data.reshape(len(strings), 54)]
+    if (colors == 255).any():
+        raise ValueError("facelet strings may only contain the letters U, R, F, D, L, B")
+    states = np.empty_like(colors)
+    states[:, FACELET_STRING_INDEX] = colors
+    return states
+
+
+def to_facelet_string(state):
+    """Facelet string of a single state (a Cube.state list or (54,) array)."""
+    return to_facelet_strings(np.asarray(state)[None, :])[0]
+
+
+def from_facelet_string(string):
+    """Sticker state list of a single facelet string."""
+    return from_facelet_strings([string])[0].tolist()
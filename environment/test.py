@@ -10,6 +10,8 @@ else:
     from .cube import Cube
     from .constants import FRONT, BACK, RIGHT, LEFT, UP, DOWN
 
+import random
+
 def test_rotate(move_name, move_constant, clockwise, expected_changes):
     """Test a single rotation move on the cube."""
     cube = Cube()
@@ -192,9 +194,391 @@ EXPECTED_CHANGES_DOWN_CCW = {
     51: 45, 52: 48, 53: 51
 }
 
+def test_move_tables():
+    """Move permutation tables must match Cube.execute_algorithm."""
+    import numpy as np
+    from environment.moves import MOVE_NAMES, MOVE_PERMS, INVERSE_MOVES
+
+    random.seed(0)
+    for move, name in enumerate(MOVE_NAMES):
+        cube = Cube()
+        cube.scramble()
+        state = np.array(cube.state)
+        cube.execute_algorithm(name)
+
+        assert cube.state == state[MOVE_PERMS[move]].tolist(), f"{name} table differs from Cube"
+        assert (state[MOVE_PERMS[move]][MOVE_PERMS[INVERSE_MOVES[move]]] == state).all(), \
+            f"{name} followed by its inverse is not the identity"
+
+
+def test_rank_round_trip():
+    """Ranking scrambled states and unranking them must give the same stickers."""
+    import numpy as np
+    from environment.cubie import facelets_to_cubies, rank_states, unrank_states
+
+    random.seed(0)
+    states = []
+    for _ in range(200):
+        cube = Cube()
+        cube.scramble(random.randint(0, 30))
+        states.append(cube.state)
+    states = np.array(states, dtype=np.uint8)
+
+    cp, co, ep, eo = facelets_to_cubies(states)
+    assert (co.sum(axis=1) % 3 == 0).all(), "corner twist sum is not 0 mod 3"
+    assert (eo.sum(axis=1) % 2 == 0).all(), "edge flip sum is not even"
+    assert (unrank_states(rank_states(states)) == states).all(), "rank round trip changed a state"
+
+
+def test_random_moves_never_repeat_face():
+    """Scramble sequences must never turn the same face twice in a row."""
+    import numpy as np
+    from environment.generators import random_moves
+
+    moves = random_moves(2000, 25, np.random.default_rng(0))
+    faces = moves // 3
+    assert ((moves >= 0) & (moves < 18)).all(), "move index out of range"
+    assert (faces[:, 1:] != faces[:, :-1]).all(), "the same face was turned twice in a row"
+    assert len(np.unique(faces[:, 1])) == 6, "some faces are never chosen"
+
+
+def test_scramble_per_state_depths():
+    """Per-state depths must apply exactly that many moves and pad the rest with -1."""
+    import numpy as np
+    from environment.generators import scramble_states
+    from environment.moves import MOVE_NAMES
+
+    depths = np.array([0, 1, 5, 3, 8])
+    states, moves = scramble_states(len(depths), depths, np.random.default_rng(0), return_moves=True)
+
+    assert moves.shape == (len(depths), depths.max()), f"unexpected moves shape {moves.shape}"
+    for state, sequence, depth in zip(states, moves, depths):
+        assert (sequence[:depth] >= 0).all() and (sequence[depth:] == -1).all(), \
+            f"depth {depth} padded incorrectly: {sequence}"
+
+        cube = Cube()
+        cube.execute_algorithm(' '.join(MOVE_NAMES[move] for move in sequence[:depth]))
+        assert cube.state == state.tolist(), f"depth {depth} state does not match its moves"
+
+
+def test_random_states_uniform():
+    """Uniform states satisfy the cubie invariants and spread evenly over positions."""
+    import numpy as np
+    from environment.cubie import facelets_to_cubies, rank_permutations
+    from environment.generators import random_cubies, random_states
+
+    count = 60000
+    cp, co, ep, eo = random_cubies(count, np.random.default_rng(0))
+    assert (co.sum(axis=1) % 3 == 0).all() and (eo.sum(axis=1) % 2 == 0).all(), "orientation sums violated"
+
+    def parity(perms):
+        first, second = np.triu_indices(perms.shape[1], k=1)
+        return (perms[:, first] > perms[:, second]).sum(axis=1) % 2
+    assert (parity(cp) == parity(ep)).all(), "corner and edge parities differ"
+
+    states = random_states(count, np.random.default_rng(0))
+    decoded = facelets_to_cubies(states)
+    for original, roundtrip in zip((cp, co, ep, eo), decoded):
+        assert np.array_equal(original, roundtrip), "states do not decode to the sampled cubies"
+    assert (np.apply_along_axis(np.bincount, 1, states, minlength=6) == 9).all()
+
+    # Each corner equally likely in each slot; each twist equally likely
+    frequencies = np.bincount(cp[:, 0], minlength=8) / count
+    assert np.abs(frequencies - 1 / 8).max() < 0.01, f"corner slot frequencies {frequencies}"
+    twists = np.bincount(co[:, 3], minlength=3) / count
+    assert np.abs(twists - 1 / 3).max() < 0.01, f"twist frequencies {twists}"
+    assert len(np.unique(rank_permutations(ep[:2000]))) == 2000
+
+
+def test_validation_reasons():
+    """Each kind of corruption is reported with its own reason, in batch and singly."""
+    import numpy as np
+    from environment.generators import random_states
+    from environment.validation import (
+        validate, validate_states, VALID, BAD_SHAPE, BAD_COLOR, BAD_COUNTS, BAD_CENTERS,
+        BAD_CORNERS, BAD_EDGES, TWISTED_CORNER, FLIPPED_EDGE, BAD_PARITY,
+    )
+
+    states = random_states(200, np.random.default_rng(0))
+    assert (validate_states(states) == VALID).all(), "uniform random states must be valid"
+    assert Cube().validate()
+
+    def corrupted(state, change):
+        state = state.copy()
+        change(state)
+        return state
+
+    def swap(*pairs):
+        def change(state):
+            for a, b in pairs:
+                state[[a, b]] = state[[b, a]]
+        return change
+
+    base = states[0]
+    solved = np.arange(54) // 9
+    cases = [
+        (corrupted(base, lambda s: s.__setitem__(0, 7)), BAD_COLOR),
+        (corrupted(solved, lambda s: s.__setitem__(0, 1)), BAD_COUNTS),
+        (corrupted(solved, swap((4, 13))), BAD_CENTERS),
+        # Swap side stickers of URF and UFL: neither position holds a real corner
+        (corrupted(solved, swap((11, 20))), BAD_CORNERS),
+        # Swap the F sticker of UF with the D sticker of DF
+        (corrupted(solved, swap((10, 46))), BAD_EDGES),
+        # Rotate the URF corner's stickers in place
+        (corrupted(solved, swap((8, 36), (8, 11))), TWISTED_CORNER),
+        # Flip the UR edge
+        (corrupted(solved, swap((5, 37))), FLIPPED_EDGE),
+        # Exchange the UR and UF edges without touching anything else
+        (corrupted(solved, swap((37, 10))), BAD_PARITY),
+    ]
+    batch = np.stack([state for state, _ in cases])
+    codes = validate_states(batch)
+    for (state, expected), code in zip(cases, codes):
+        assert code == expected, f"expected reason {expected}, batch reported {code}"
+        result = validate(state)
+        assert not result and result.code == expected, f"expected reason {expected}, got {result}"
+
+    assert validate(list(range(53))).code == BAD_SHAPE
+    assert validate(corrupted(solved, swap((11, 20)))).detail == [0, 1], "URF and UFL should be reported"
+    assert validate(corrupted(solved, swap((10, 46)))).detail == [1, 5], "UF and DF should be reported"
+
+
+def test_serialization_round_trips():
+    """Packed, ranked, move and facelet-string encodings all round-trip."""
+    import numpy as np
+    from environment.generators import random_states, scramble_states
+    from environment.serialization import (
+        pack_states, unpack_states, pack_states_ranked, unpack_states_ranked, pack_moves, unpack_moves,
+        encode_algorithm, decode_algorithm, to_facelet_string, from_facelet_strings, to_facelet_strings,
+    )
+
+    states = random_states(500, np.random.default_rng(0))
+    packed = pack_states(states)
+    assert packed.shape == (500, 21) and np.array_equal(unpack_states(packed), states)
+    ranked = pack_states_ranked(states)
+    assert ranked.shape == (500, 9) and np.array_equal(unpack_states_ranked(ranked), states)
+
+    _, moves = scramble_states(50, np.arange(50) % 13, np.random.default_rng(1), return_moves=True)
+    decoded = unpack_moves(pack_moves(moves))
+    assert np.array_equal(decoded[:, :moves.shape[1]], moves) and (decoded[:, moves.shape[1]:] == -1).all()
+    assert len(encode_algorithm("R U R' U' " * 4)) == 10, "16 moves should take 10 bytes"
+    assert decode_algorithm(encode_algorithm("R U2' R' F'2 D")) == "R U2 R' F2 D"
+
+    cube = Cube()
+    assert to_facelet_string(cube.state) == 'U' * 9 + 'R' * 9 + 'F' * 9 + 'D' * 9 + 'L' * 9 + 'B' * 9
+    cube.rotate(RIGHT, True)
+    assert to_facelet_string(cube.state) == "UUFUUFUUFRRRRRRRRRFFDFFDFFDDDBDDBDDBLLLLLLLLLUBBUBBUBB"
+    assert np.array_equal(from_facelet_strings(to_facelet_strings(states)), states)
+
+
+def test_expand_children():
+    """expand matches per-move application, fills out buffers and prunes canonically."""
+    import numpy as np
+    from environment.generators import random_states
+    from environment.moves import MOVE_INDEX, MOVE_PERMS, NUM_MOVES, apply_move, canonical_mask, expand
+
+    states = random_states(64, np.random.default_rng(3))
+    children = expand(states)
+    assert children.shape == (64, NUM_MOVES, 54)
+    for move in range(NUM_MOVES):
+        assert np.array_equal(children[:, move], apply_move(states, move))
+
+    buffer = np.empty((64, NUM_MOVES, 54), dtype=np.uint8)
+    assert expand(states, out=buffer) is buffer and np.array_equal(buffer, children)
+
+    _, mask = expand(states, last_moves=np.full(64, -1))
+    assert mask.all(), "without a previous move every move is canonical"
+    mask = canonical_mask([MOVE_INDEX['U'], MOVE_INDEX['D2']])
+    assert mask[0].sum() == 15 and not mask[0, MOVE_INDEX["U'"]] and mask[0, MOVE_INDEX['D']]
+    assert mask[1].sum() == 12 and not mask[1, MOVE_INDEX['U2']] and not mask[1, MOVE_INDEX["D'"]]
+
+    cube = Cube()
+    cube.execute_algorithm("R U")
+    successors = dict(cube.expand())
+    assert len(successors) == 18
+    expected = Cube()
+    expected.execute_algorithm("R U F'")
+    assert successors["F'"] == expected.state
+    assert len(cube.expand(last_move='U')) == 15
+    assert np.array_equal(np.array(cube.state)[MOVE_PERMS[MOVE_INDEX['L2']]], successors['L2'])
+
+
+def test_nxn_move_tables():
+    """NxN tables reproduce the 3x3 moves, invert correctly and pack 2x2 states."""
+    import numpy as np
+    from environment.moves import MOVE_PERMS
+    from environment.nxn import NxNCube, apply_moves, move_table, pocket_keys, pocket_states, scramble_states
+
+    assert np.array_equal(move_table(3).perms, MOVE_PERMS)
+
+    table = move_table(4)
+    assert table.num_moves == 36 and len(table.rotations) == 24
+    states = scramble_states(32, 25, 4, np.random.default_rng(5))
+    for move in range(table.num_moves):
+        undone = apply_moves(apply_moves(states, np.full(32, move), 4), np.full(32, table.inverse[move]), 4)
+        assert np.array_equal(undone, states), f"{table.names[move]} is not undone by its inverse"
+
+    cube = NxNCube(4)
+    for _ in range(4):
+        cube.execute_algorithm("2R")
+    assert cube.is_solved()
+    cube.execute_algorithm("Rw U Rw' U'")
+    assert not cube.is_solved()
+    cube.execute_algorithm("U Rw U' Rw'")
+    assert cube.is_solved()
+
+    pocket = NxNCube(2)
+    pocket.execute_algorithm("R U F' R2 U' F2")
+    states = np.array([pocket.state, move_table(2).solved_state])
+    assert np.array_equal(pocket_states(pocket_keys(states)), states)
+
+
+def test_pocket_cube_solver():
+    """The 2x2 table covers all 3,674,160 positions and solves states in exactly their distance."""
+    import numpy as np
+    from environment.nxn import PocketCubeSolver, apply_moves, is_solved, scramble_states
+
+    solver = PocketCubeSolver()
+    assert sum(solver.level_sizes) == 3674160, f"{sum(solver.level_sizes)} positions"
+    assert len(solver.level_sizes) == 12, f"God's number should be 11, got {len(solver.level_sizes) - 1}"
+
+    states = scramble_states(64, 20, 2, np.random.default_rng(11))
+    distances = solver.distance(states)
+    for state, distance, solution in zip(states, distances, solver.solve(states)):
+        assert len(solution) == distance, f"{len(solution)}-move solution for a distance-{distance} state"
+        for move in solution:
+            state = apply_moves(state[None, :], np.array([move]), 2)[0]
+        assert is_solved(state[None, :], 2)[0], "solution leaves the 2x2 unsolved"
+
+
+def test_extended_notation():
+    """Slices, wide turns and rotations tokenize and compile to the right permutations."""
+    import numpy as np
+    from environment.moves import SOLVED_STATE
+    from environment.notation import Token, compile_algorithm, reorient_states, tokenize
+    from environment.serialization import algorithm_to_moves
+    from utils.move_parser import parse_moves_to_tuples
+
+    assert tokenize("(R'2 r U’), 2L x") == [
+        Token('R', 2, None, False), Token('R', 0, None, True), Token('U', 1, None, False),
+        Token('L', 0, 2, False), Token('x', 0, None, False),
+    ]
+    assert algorithm_to_moves("R U2' F'") == [12, 2, 4]
+    assert parse_moves_to_tuples("R2 U'") == [(RIGHT, True), (RIGHT, True), (UP, False)]
+    for invalid in ("M", "Rw", "y"):
+        try:
+            algorithm_to_moves(invalid)
+            raise AssertionError(f"{invalid} should not parse as a face turn")
+        except ValueError:
+            pass
+
+    def same(first, second):
+        return np.array_equal(compile_algorithm(first), compile_algorithm(second))
+
+    # Slices against their face-turn equivalents and the whole-cube rotations
+    assert same("M2 U M2 U2 M2 U M2", "R2 U2 R U2 R2 U2 R2 U2 R U2 R2"), "H perm"
+    assert same("x y x y x y", ""), "x y is a third of a turn about a diagonal"
+    assert same("r", "Rw") and same("Rw", "2Rw") and same("2R", "M'") and same("3Rw", "x")
+    assert same("x", "R M' L'") and same("y", "U E' D'") and same("z", "F S B'")
+    centers = [UP * 9 + 4, FRONT * 9 + 4, RIGHT * 9 + 4]
+    assert SOLVED_STATE[compile_algorithm("x")][centers].tolist() == [FRONT, DOWN, RIGHT]
+    assert SOLVED_STATE[compile_algorithm("y")][centers].tolist() == [UP, RIGHT, BACK]
+
+    cube = Cube()
+    cube.execute_algorithm("r U R' U' M x' y2 z")
+    cube.execute_algorithm("z' y2 x M' U R U' r'")
+    assert cube.is_solved()
+
+    # Whole-cube orientation does not make a solved or reachable cube unsolved or invalid
+    cube.execute_algorithm("x y'")
+    assert cube.is_solved() and cube.validate(), f"rotated solved cube: {cube.validate()}"
+    cube.execute_algorithm("r U M")
+    assert not cube.is_solved() and cube.validate(), f"after slices: {cube.validate()}"
+    rotations = np.stack([compile_algorithm(algorithm) for algorithm in ("x", "y z2", "")])
+    states, oriented = reorient_states(SOLVED_STATE[rotations])
+    assert oriented.all() and (states == SOLVED_STATE).all()
+
+
+def test_permutation_algebra():
+    """Products, powers, commutators and orders agree with replayed algorithms."""
+    import numpy as np
+    from environment.permutation import Permutation, commutator, conjugate, permutation_orders
+
+    sexy = Permutation.from_algorithm("R U R' U'")
+    assert (sexy ** 6).is_identity() and not (sexy ** 3).is_identity()
+    assert sexy.order() == 6 and sexy.cycle_type() == [6, 6, 3, 3]
+    assert Permutation.from_algorithm("R U") ** 2 == Permutation.from_algorithm("R U R U")
+    assert sexy ** -1 == Permutation.from_algorithm("U R U' R'") == sexy.inverse()
+    assert Permutation.from_algorithm("R U").order() == 105
+
+    r, u, f = (Permutation.from_algorithm(move) for move in "RUF")
+    assert commutator(r, u) == sexy
+    assert conjugate(f, sexy) == Permutation.from_algorithm("F R U R' U' F'")
+    assert Permutation.from_moves([12, 0]) == r * u
+
+    cube = Cube()
+    cube.execute_algorithm("F R U R' U' F'")
+    assert conjugate(f, sexy).apply(Cube().state).tolist() == cube.state
+
+    algorithms = ["R U", "R U R' U'", "", "R", "M2 U M2 U2 M2 U M2"]
+    batch = np.stack([Permutation.from_algorithm(algorithm).perm for algorithm in algorithms])
+    assert permutation_orders(batch).tolist() == [105, 6, 1, 4, 2]
+
+    try:
+        Permutation([0, 0, 1])
+        raise AssertionError("repeated entries are not a permutation")
+    except ValueError:
+        pass
+
+
+def test_differential_fuzz():
+    """Every engine matches Cube.rotate on random sequences and the group invariants hold (fast mode)."""
+    from environment import fuzz
+
+    report = fuzz.run_fuzz(fuzz.FAST_SEQUENCES, seed=0)
+    assert report['sequences'] == fuzz.FAST_SEQUENCES
+    assert not any(report['mismatches'].values()), report['failures'][:3]
+
+
+ENGINE_TESTS = [
+    test_move_tables,
+    test_rank_round_trip,
+    test_random_moves_never_repeat_face,
+    test_scramble_per_state_depths,
+    test_random_states_uniform,
+    test_validation_reasons,
+    test_serialization_round_trips,
+    test_expand_children,
+    test_nxn_move_tables,
+    test_pocket_cube_solver,
+    test_extended_notation,
+    test_permutation_algebra,
+    test_differential_fuzz,
+]
+
+
+def run_engine_tests():
+    """Run the tests of the vectorized engine."""
+    passed_tests = 0
+
+    for test in ENGINE_TESTS:
+        print(f"\n=== {test.__name__} ===")
+        try:
+            test()
+            passed_tests += 1
+            print(f"✓ {test.__name__} passed!")
+        except AssertionError as e:
+            print(f"Test failed: {e}")
+        except Exception as e:
+            print(f"Unexpected error in {test.__name__}: {e}")
+
+    print(f"\n=== Engine Test Summary ===")
+    print(f"Passed: {passed_tests}/{len(ENGINE_TESTS)}")
+
 def main():
     """Main function for running tests."""
     run_all_tests()
+    run_engine_tests()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
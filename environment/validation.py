@@ -0,0 +1,183 @@
+"""
+Validation of sticker states coming from outside the engine.
+
+A state is reachable exactly when every sticker color is in range, each
+color appears nine times, the centers are in their home positions, every
+corner and edge position holds a real cubie and each cubie appears once,
+the corner twists sum to 0 mod 3, the edge flips sum to 0 mod 2 and the
+corner and edge permutations have the same parity.
+
+validate_states checks a whole (N, 54) batch and returns one reason code
+per state; validate wraps it for a single state and returns a
+ValidationResult with a readable message.
+"""
+
+import numpy as np
+
+from .cubie import (
+    CENTER_FACELETS, CORNER_FACELETS, EDGE_FACELETS, NUM_CORNERS, NUM_EDGES,
+    cubies_to_facelets, permutation_parity,
+    _CORNER_LOOKUP, _EDGE_LOOKUP, _EDGE_ORI_LOOKUP,
+)
+from .constants import UP, DOWN
+
+VALID = 0
+BAD_SHAPE = 1
+BAD_COLOR = 2
+BAD_COUNTS = 3
+BAD_CENTERS = 4
+BAD_CORNERS = 5
+BAD_EDGES = 6
+TWISTED_CORNER = 7
+FLIPPED_EDGE = 8
+BAD_PARITY = 9
+
+# Reason code -> (name, message); codes are listed in the order they are checked
+REASONS = {
+    VALID: ('valid', "state is reachable"),
+    BAD_SHAPE: ('bad_shape', "a state must have exactly 54 stickers"),
+    BAD_COLOR: ('bad_color', "sticker value outside 0-5"),
+    BAD_COUNTS: ('bad_counts', "a color does not appear exactly 9 times"),
+    BAD_CENTERS: ('bad_centers', "centers are not in their home positions"),
+    BAD_CORNERS: ('bad_corners', "a corner position holds an impossible or duplicated corner"),
+    BAD_EDGES: ('bad_edges', "an edge position holds an impossible or duplicated edge"),
+    TWISTED_CORNER: ('twisted_corner', "corner twists do not sum to 0 mod 3"),
+    FLIPPED_EDGE: ('flipped_edge', "edge flips do not sum to 0 mod 2"),
+    BAD_PARITY: ('bad_parity', "corner and edge permutation parities differ"),
+}
+
+
+class ValidationResult:
+    """Outcome of validating one state."""
+
+    def __init__(self, code, detail=None):
+        """
+        Args:
+            code: reason code, VALID when the state is reachable
+            detail: optional extra information (e.g. the offending position)
+        """
+        self.code = int(code)
+        self.reason, self.message = REASONS[self.code]
+        self.detail = detail
+
+    @property
+    def valid(self):
+        return self.code == VALID
+
+    def __bool__(self):
+        return self.valid
+
+    def __repr__(self):
+        detail = f", detail={self.detail!r}" if self.detail is not None else ""
+        return f"ValidationResult(reason={self.reason!r}{detail})"
+
+
+_CORNER_OFFSETS = np.arange(NUM_CORNERS) * 3
+
+
+def _decode_corners(states):
+    colors = states[:, CORNER_FACELETS]
+    vertical = (colors == UP) | (colors == DOWN)
+    co = np.argmax(vertical, axis=2)
+    flat = colors.reshape(len(states), -1)
+    first = np.take_along_axis(flat, _CORNER_OFFSETS + co, axis=1)
+    second = np.take_along_axis(flat, _CORNER_OFFSETS + (co + 1) % 3, axis=1)
+    cp = _CORNER_LOOKUP[first, second]
+    # Exactly one U/D sticker and a known cubie; the third sticker is checked by re-encoding
+    known = (vertical.sum(axis=2) == 1) & (cp >= 0)
+    return np.where(known, cp, 0).astype(np.uint8), co.astype(np.uint8), known
+
+
+def _decode_edges(states):
+    colors = states[:, EDGE_FACELETS]
+    ep = _EDGE_LOOKUP[colors[..., 0], colors[..., 1]]
+    eo = _EDGE_ORI_LOOKUP[colors[..., 0], colors[..., 1]]
+    known = ep >= 0
+    return np.where(known, ep, 0).astype(np.uint8), np.where(known, eo, 0).astype(np.uint8), known
+
+
+def _row_counts(values, size):
+    # counts[i, v]: occurrences of v in row i
+    offsets = np.arange(len(values))[:, None] * size
+    return np.bincount((values + offsets).ravel(), minlength=len(values) * size).reshape(len(values), size)
+
+
+def _is_permutation(perms, size):
+    return (_row_counts(perms, size) == 1).all(axis=1)
+
+
+def validate_states(states):
+    """
+    Check a batch of sticker states for reachability.
+
+    Args:
+        states: (N, 54) integer array of sticker colors
+
+    Returns:
+        np.ndarray: (N,) uint8 reason codes, VALID (0) for reachable states;
+        each state reports the first failing check in REASONS order
+    """
+    states = np.asarray(states)
+    if states.ndim != 2 or states.shape[1] != 54:
+        raise ValueError(f"expected an (N, 54) array of states, got shape {states.shape}")
+
+    codes = np.zeros(len(states), dtype=np.uint8)
+
+    def fail(mask, code):
+        codes[(codes == VALID) & mask] = code
+
+    in_range = ((states >= 0) & (states < 6)).all(axis=1)
+    fail(~in_range, BAD_COLOR)
+    states = np.where(in_range[:, None], states, 0).astype(np.intp)
+
+    fail((_row_counts(states, 6) != 9).any(axis=1), BAD_COUNTS)
+    fail((states[:, CENTER_FACELETS] != np.arange(6)).any(axis=1), BAD_CENTERS)
+
+    cp, co, corners_known = _decode_corners(states)
+    ep, eo, edges_known = _decode_edges(states)
+
+    # Re-encoding the decoded cubies must give back the same stickers
+    encoded = cubies_to_facelets(cp, co, ep, eo)
+    corners_match = (encoded[:, CORNER_FACELETS] == states[:, CORNER_FACELETS]).all(axis=(1, 2))
+    edges_match = (encoded[:, EDGE_FACELETS] == states[:, EDGE_FACELETS]).all(axis=(1, 2))
+    fail(~(corners_known.all(axis=1) & corners_match & _is_permutation(cp, NUM_CORNERS)), BAD_CORNERS)
+    fail(~(edges_known.all(axis=1) & edges_match & _is_permutation(ep, NUM_EDGES)), BAD_EDGES)
+
+    fail(co.sum(axis=1, dtype=np.int64) % 3 != 0, TWISTED_CORNER)
+    fail(eo.sum(axis=1, dtype=np.int64) % 2 != 0, FLIPPED_EDGE)
+    fail(permutation_parity(cp) != permutation_parity(ep), BAD_PARITY)
+
+    return codes
+
+
+def validate(state):
+    """
+    Check one sticker state (a Cube.state list or a (54,) array).
+
+    Returns:
+        ValidationResult: truthy when the state is reachable, otherwise
+        carrying the reason and, where it applies, the offending positions
+    """
+    state = np.asarray(state)
+    if state.shape != (54,):
+        return ValidationResult(BAD_SHAPE, detail=state.shape)
+
+    code = int(validate_states(state[None, :])[0])
+    detail = None
+    if code == BAD_COUNTS:
+        detail = {color: int(count) for color, count in enumerate(np.bincount(state, minlength=6)) if count != 9}
+    elif code == BAD_CENTERS:
+        detail = np.flatnonzero(state[CENTER_FACELETS] != np.arange(6)).tolist()
+    elif code in (BAD_CORNERS, BAD_EDGES):
+        # Positions whose stickers are not a cubie or repeat another position's cubie
+        cp, co, corners_known = _decode_corners(state[None, :].astype(np.uint8))
+        ep, eo, edges_known = _decode_edges(state[None, :].astype(np.uint8))
+        encoded = cubies_to_facelets(cp, co, ep, eo)[0]
+        if code == BAD_CORNERS:
+            facelets, perm, known = CORNER_FACELETS, cp[0], corners_known[0]
+        else:
+            facelets, perm, known = EDGE_FACELETS, ep[0], edges_known[0]
+        wrong = ~known | (encoded[facelets] != state[facelets]).any(axis=1)
+        repeated = known & (np.bincount(perm[known], minlength=len(facelets))[perm] > 1)
+        detail = np.flatnonzero(wrong | repeated).tolist()
+    return ValidationResult(code, detail)
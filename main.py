@@ -5,6 +5,11 @@ Main entry point for the RL-Rubik-Cube project.
 This script provides easy access to different components of the project:
 - Run tests
 - Launch playground  
+- Explore the distance distribution from the solved state
+- Train the DQN agent with parallel actors
+- Evaluate a trained agent on a fixed test set
+- Serve solutions and network scores to local clients
+- Fuzz the move engines against the reference rotation code
 - Future: training, agent demonstration, etc.
 """
 
@@ -18,6 +23,16 @@ def run_tests():
     from environment.test import main as test_main
     try:
         test_main()
+        from search.test import main as search_test_main
+        search_test_main()
+        from agent.test import main as agent_test_main
+        agent_test_main()
+        from training.test import main as training_test_main
+        training_test_main()
+        from utils.test import main as utils_test_main
+        utils_test_main()
+        from serving.test import main as serving_test_main
+        serving_test_main()
         print("\n All tests completed successfully!")
         return True
     except Exception as e:
@@ -41,6 +56,187 @@ def run_playground():
         print(f"Playground failed: {e}")
         return False
 
+def run_explore(depth, output, memory_limit, shards=0, shard_addresses=None):
+    """Run the disk-backed breadth-first search from the solved cube, on one node or sharded."""
+    print(f"=== Exploring distances up to depth {depth} ===")
+
+    try:
+        from search.bfs import DistanceExplorer
+        from search.distributed import DistributedExplorer, start_local_workers
+    except ImportError as e:
+        print(f"Could not import explorer: {e}")
+        print("Make sure you have the required dependencies installed:")
+        print("  pip install numpy")
+        return False
+
+    processes = []
+    if shard_addresses:
+        addresses = [(host, int(port)) for host, port in (item.rsplit(':', 1) for item in shard_addresses.split(','))]
+        explorer = DistributedExplorer(output, addresses)
+    elif shards > 1:
+        processes, addresses = start_local_workers(shards, output, memory_limit=memory_limit)
+        explorer = DistributedExplorer(output, addresses)
+    else:
+        explorer = DistanceExplorer(output, memory_limit=memory_limit)
+    try:
+        explorer.run(depth)
+    finally:
+        if processes:
+            explorer.shutdown_workers()
+    print()
+    explorer.print_distribution()
+    print(f"Level files written to {output}")
+    return True
+
+def run_bfs_worker(args):
+    """Serve one shard of a distributed breadth-first search until the driver shuts it down."""
+    from search.distributed import ShardWorker
+
+    worker = ShardWorker(args.shard, args.shards, args.output, memory_limit=args.memory_limit)
+    host, port = worker.start(args.host, args.port)
+    print(f"Shard {args.shard}/{args.shards} listening on {host}:{port}, levels in {args.output}")
+    worker.serve_forever()
+    return True
+
+def run_train(args):
+    """Run multi-process actor/learner training."""
+    print(f"=== Training with {args.actors} actors ===")
+
+    try:
+        from training.actor_learner import ActorLearnerTrainer, TrainingConfig
+    except ImportError as e:
+        print(f"Could not import trainer: {e}")
+        print("Make sure you have the required dependencies installed:")
+        print("  pip install numpy")
+        return False
+
+    config = TrainingConfig()
+    config.num_actors = args.actors
+    config.weight_broadcast_interval = args.broadcast_interval
+    config.max_updates = args.updates
+    config.checkpoint_dir = args.checkpoint_dir
+    config.checkpoint_interval = args.checkpoint_interval
+
+    stats = ActorLearnerTrainer(config).run(duration=args.duration, resume=args.resume)
+    print(f"\nEnv steps: {stats['env_steps']:,} ({stats['env_steps_per_sec']:,.0f}/sec)")
+    print(f"Learner updates: {stats['updates']:,} ({stats['updates_per_sec']:,.1f}/sec)")
+    return True
+
+def run_evaluate(args):
+    """Evaluate the newest checkpointed network on a seeded test set."""
+    print("=== Evaluating agent ===")
+
+    try:
+        from agent.network import QNetwork
+        from training.checkpoint import CheckpointManager
+        from training.evaluation import load_test_set, evaluate, print_report
+    except ImportError as e:
+        print(f"Could not import evaluation: {e}")
+        print("Make sure you have the required dependencies installed:")
+        print("  pip install numpy")
+        return False
+
+    checkpoint = CheckpointManager(args.checkpoint_dir).load_latest() if args.checkpoint_dir else None
+    if checkpoint is None:
+        print(f"No checkpoint found in {args.checkpoint_dir!r}")
+        return False
+
+    meta, arrays = checkpoint
+    network = QNetwork(meta['learner']['hidden_sizes'])
+    network.set_flat_parameters(arrays['learner_network'])
+    print(f"Loaded network after {meta['learner']['updates']:,} updates")
+
+    test_set = load_test_set(args.test_set, range(1, args.depth + 1), args.per_depth, args.seed)
+    if args.quantize != 'float32':
+        from agent.quantized import QuantizedNetwork, compare_to_float
+
+        quantized = QuantizedNetwork(network, args.quantize)
+        accuracy = compare_to_float(network, quantized, test_set['states'])
+        print(f"{args.quantize} weights ({quantized.nbytes():,} bytes): max |dQ| {accuracy['max_abs_error']:.4f}, "
+              f"greedy move agrees on {accuracy['argmax_agreement']:.1%} of the test states")
+        network = quantized
+    report = evaluate(network, test_set, args.beam_width, args.max_steps)
+    print()
+    print_report(report)
+    return True
+
+def run_serve(args):
+    """Serve CFOP solutions and, with a checkpoint, network scores on a local socket."""
+    print("=== Starting solve/score server ===")
+
+    try:
+        import asyncio
+        from search.cfop import CFOPSolver
+        from serving.server import CubeServer, serve
+    except ImportError as e:
+        print(f"Could not import server: {e}")
+        print("Make sure you have the required dependencies installed:")
+        print("  pip install numpy")
+        return False
+
+    network = None
+    if args.checkpoint_dir:
+        from agent.network import QNetwork
+        from training.checkpoint import CheckpointManager
+
+        checkpoint = CheckpointManager(args.checkpoint_dir).load_latest()
+        if checkpoint is not None:
+            meta, arrays = checkpoint
+            network = QNetwork(meta['learner']['hidden_sizes'])
+            network.set_flat_parameters(arrays['learner_network'])
+            if args.quantize != 'float32':
+                from agent.quantized import QuantizedNetwork
+                network = QuantizedNetwork(network, args.quantize)
+            print(f"Scoring with the {args.quantize} network after {meta['learner']['updates']:,} updates")
+        else:
+            print(f"No checkpoint in {args.checkpoint_dir!r}: score requests are disabled")
+
+    server = CubeServer(CFOPSolver(), network, window=args.batch_window / 1000, max_batch=args.max_batch)
+    try:
+        asyncio.run(serve(server, args.socket, args.host, args.port, args.metrics_interval))
+    except KeyboardInterrupt:
+        print("\nServer stopped")
+    return True
+
+def run_memreport(args):
+    """Report the bytes used by state formats, networks, buffers and tables, with RSS per phase."""
+    print("=== Memory report ===")
+
+    try:
+        from utils.memory import memory_report, print_memory_report
+    except ImportError as e:
+        print(f"Could not import memory accounting: {e}")
+        print("Make sure you have the required dependencies installed:")
+        print("  pip install numpy")
+        return False
+
+    report = memory_report(args.states, args.tables_dir, args.output)
+    print_memory_report(report)
+    return True
+
+def run_fuzz(args):
+    """Differential fuzzing of every move engine against Cube.rotate."""
+    import os
+    from environment.fuzz import FAST_SEQUENCES, SOAK_SEQUENCES, print_fuzz_report, run_fuzz as fuzz
+
+    sequences = args.sequences or (SOAK_SEQUENCES if args.soak else FAST_SEQUENCES)
+    workers = args.workers or (os.cpu_count() if args.soak else 1)
+    print(f"=== Fuzzing {sequences:,} sequences on {workers} worker(s), seed {args.seed} ===")
+
+    printed = [0]
+
+    def progress(report):
+        # About every 5% of a soak run
+        if args.soak and report['sequences'] - printed[0] >= sequences // 20:
+            printed[0] = report['sequences']
+            print(f"  {report['sequences']:,}/{sequences:,} sequences, "
+                  f"{sum(report['mismatches'].values())} mismatches", flush=True)
+
+    report = fuzz(sequences, seed=args.seed, workers=workers, progress=progress)
+    print()
+    print_fuzz_report(report)
+    return not any(report['mismatches'].values())
+
 def main():
     """Main entry point with argument parsing."""
     parser = argparse.ArgumentParser(
@@ -50,15 +246,90 @@ def main():
 Examples:
   python main.py test       # Run cube tests
   python main.py playground # Launch 3D playground
+  python main.py explore --depth 6 --output bfs_levels
+  python main.py explore --depth 9 --shards 8          # sharded over local processes
+  python main.py bfs-worker --shard 0 --shards 2 --host 0.0.0.0 --port 9000
+  python main.py explore --depth 11 --shard-addresses hostA:9000,hostB:9000
+  python main.py train --actors 4 --broadcast-interval 50
+  python main.py train --checkpoint-dir runs/dqn --resume
+  python main.py evaluate --checkpoint-dir runs/dqn --beam-width 16
+  python main.py evaluate --checkpoint-dir runs/dqn --quantize int8
+  python main.py serve --port 8765 --checkpoint-dir runs/dqn
+  python main.py serve --socket /tmp/cube.sock
+  python main.py fuzz                  # fast differential fuzzing
+  python main.py fuzz --soak --seed 7  # nightly soak run on every core
+  python main.py memreport --tables-dir tables --output bfs_levels
   python main.py --help     # Show this help
         """
     )
     
     parser.add_argument(
         'command', 
-        choices=['test', 'playground'],
+        choices=['test', 'playground', 'explore', 'bfs-worker', 'train', 'evaluate', 'serve', 'fuzz', 'memreport'],
         help='Command to run'
     )
+    parser.add_argument('--depth', type=int, default=5,
+                        help='explore: deepest level to generate; evaluate: deepest test scramble')
+    parser.add_argument('--output', default='bfs_levels',
+                        help='explore/bfs-worker: directory for the level files; memreport: level files to include')
+    parser.add_argument('--memory-limit', type=int, default=1 << 24,
+                        help='explore/bfs-worker: child records buffered in RAM before spilling to disk')
+    parser.add_argument('--shards', type=int, default=0,
+                        help='explore: shard the search over this many local worker processes; '
+                             'bfs-worker: total number of shards')
+    parser.add_argument('--shard-addresses', default=None,
+                        help='explore: comma-separated host:port of running bfs-worker shards, in shard order')
+    parser.add_argument('--shard', type=int, default=0,
+                        help='bfs-worker: index of the shard this worker owns')
+    parser.add_argument('--actors', type=int, default=2,
+                        help='train: number of actor processes')
+    parser.add_argument('--broadcast-interval', type=int, default=50,
+                        help='train: learner updates between weight broadcasts to the actors')
+    parser.add_argument('--updates', type=int, default=10000,
+                        help='train: number of learner updates')
+    parser.add_argument('--duration', type=float, default=None,
+                        help='train: optional wall-clock limit in seconds')
+    parser.add_argument('--checkpoint-dir', default='checkpoints',
+                        help='train/evaluate/serve: directory for checkpoints (empty string disables them)')
+    parser.add_argument('--checkpoint-interval', type=int, default=1000,
+                        help='train: learner updates between checkpoints')
+    parser.add_argument('--resume', action='store_true',
+                        help='train: continue from the newest checkpoint')
+    parser.add_argument('--test-set', default='test_sets/scrambles.npz',
+                        help='evaluate: test set file, created from --seed if missing')
+    parser.add_argument('--per-depth', type=int, default=1000,
+                        help='evaluate: cubes per depth when creating the test set')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='evaluate: seed used when creating the test set; fuzz: run seed')
+    parser.add_argument('--beam-width', type=int, default=1,
+                        help='evaluate: 1 for greedy rollouts, K for beam search')
+    parser.add_argument('--max-steps', type=int, default=30,
+                        help='evaluate: move limit per cube')
+    parser.add_argument('--quantize', choices=['float32', 'int8', 'float16'], default='float32',
+                        help='evaluate/serve: weight format of the network at inference (int8/float16 save memory, not time)')
+    parser.add_argument('--socket', default=None,
+                        help='serve: Unix socket path (TCP on --host/--port when omitted)')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='serve/bfs-worker: TCP host')
+    parser.add_argument('--port', type=int, default=8765,
+                        help='serve/bfs-worker: TCP port')
+    parser.add_argument('--batch-window', type=float, default=2.0,
+                        help='serve: milliseconds a batch keeps collecting requests')
+    parser.add_argument('--max-batch', type=int, default=1024,
+                        help='serve: largest batch per solver or network call')
+    parser.add_argument('--metrics-interval', type=float, default=10.0,
+                        help='serve: seconds between metric lines (0 disables them)')
+    parser.add_argument('--soak', action='store_true',
+                        help='fuzz: long nightly run instead of the fast CI run')
+    parser.add_argument('--sequences', type=int, default=None,
+                        help='fuzz: number of random sequences (overrides the mode default)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='fuzz: worker processes (default 1, all cores with --soak)')
+    parser.add_argument('--states', type=int, default=20000,
+                        help='memreport: states in the side-by-side comparison of representations')
+    parser.add_argument('--tables-dir', default=None,
+                        help="memreport: solver table directory, the project's tables/ by default "
+                             "(only tables already built are loaded)")
     
     if len(sys.argv) == 1:
         print("=== RL-Rubik-Cube Project ===")
@@ -95,6 +366,27 @@ Examples:
     elif args.command == 'playground':
         success = run_playground()
         sys.exit(0 if success else 1)
+    elif args.command == 'explore':
+        success = run_explore(args.depth, args.output, args.memory_limit, args.shards, args.shard_addresses)
+        sys.exit(0 if success else 1)
+    elif args.command == 'bfs-worker':
+        success = run_bfs_worker(args)
+        sys.exit(0 if success else 1)
+    elif args.command == 'train':
+        success = run_train(args)
+        sys.exit(0 if success else 1)
+    elif args.command == 'evaluate':
+        success = run_evaluate(args)
+        sys.exit(0 if success else 1)
+    elif args.command == 'serve':
+        success = run_serve(args)
+        sys.exit(0 if success else 1)
+    elif args.command == 'fuzz':
+        success = run_fuzz(args)
+        sys.exit(0 if success else 1)
+    elif args.command == 'memreport':
+        success = run_memreport(args)
+        sys.exit(0 if success else 1)
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,6 @@
+"""Search package for state-space exploration over the Rubik's Cube group."""
+
+import os
+
+# Default cache directory of the solvers' lookup tables, independent of the working directory
+TABLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tables')
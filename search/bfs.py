@@ -0,0 +1,292 @@
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from environment.moves import NUM_MOVES, SOLVED_STATE, expand
+from environment.cubie import RANK_DTYPE, rank_states, unrank_states
+
+
+def sort_unique(records):
+    """
+    Sort RANK_DTYPE records and drop duplicates.
+
+    Args:
+        records: (N,) array of RANK_DTYPE
+
+    Returns:
+        np.ndarray: sorted, deduplicated records
+    """
+    if len(records) == 0:
+        return records
+    records = records[np.lexsort((records['edge'], records['corner']))]
+    keep = np.ones(len(records), dtype=bool)
+    keep[1:] = (records['corner'][1:] != records['corner'][:-1]) | (records['edge'][1:] != records['edge'][:-1])
+    return records[keep]
+
+
+def difference(records, excluded):
+    """
+    Remove from a sorted, deduplicated record array every record present in excluded.
+
+    Args:
+        records: sorted, deduplicated RANK_DTYPE records
+        excluded: RANK_DTYPE records (any order, duplicates allowed)
+
+    Returns:
+        np.ndarray: sorted records not in excluded
+    """
+    if len(records) == 0 or len(excluded) == 0:
+        return records
+    combined = np.concatenate([records, excluded])
+    tags = np.concatenate([np.zeros(len(records), dtype=np.uint8), np.ones(len(excluded), dtype=np.uint8)])
+    order = np.lexsort((tags, combined['edge'], combined['corner']))
+    combined = combined[order]
+    tags = tags[order]
+
+    same_as_next = np.zeros(len(combined), dtype=bool)
+    same_as_next[:-1] = (combined['corner'][1:] == combined['corner'][:-1]) & (combined['edge'][1:] == combined['edge'][:-1])
+    # Excluded records sort after an equal candidate, so a candidate followed by
+    # an equal key is excluded; equal keys among excluded records carry tag 1.
+    return combined[(tags == 0) & ~same_as_next]
+
+
+def _count_at_most(records, bound):
+    corner, edge = bound
+    return int(np.count_nonzero((records['corner'] < corner) | ((records['corner'] == corner) & (records['edge'] <= edge))))
+
+
+class _SortedRunReader:
+    """Block-wise cursor over a sorted record array (in memory or memmapped)."""
+
+    def __init__(self, records, block_size):
+        self.records = records
+        self.block_size = block_size
+        self.position = 0
+
+    def exhausted(self):
+        return self.position >= len(self.records)
+
+    def peek(self):
+        return self.records[self.position:self.position + self.block_size]
+
+    def has_more_after_block(self):
+        return self.position + self.block_size < len(self.records)
+
+    def take(self, count):
+        block = np.asarray(self.records[self.position:self.position + count])
+        self.position += count
+        return block
+
+
+def merge_sorted_runs(runs, excluded_runs, output_path, block_size=1 << 20):
+    """
+    K-way merge sorted runs into one sorted, deduplicated file, skipping excluded records.
+
+    Only one block per run is held in memory at a time, so the inputs may be
+    far larger than RAM.
+
+    Args:
+        runs: list of sorted, deduplicated RANK_DTYPE arrays or memmaps
+        excluded_runs: list of sorted RANK_DTYPE arrays whose records are dropped
+        output_path: destination file of raw RANK_DTYPE records
+        block_size: records read from each run per merge step
+
+    Returns:
+        int: number of records written
+    """
+    readers = [_SortedRunReader(run, block_size) for run in runs]
+    excluders = [_SortedRunReader(run, block_size) for run in excluded_runs]
+    written = 0
+
+    with open(output_path, 'wb') as output:
+        while any(not reader.exhausted() for reader in readers):
+            bound = None
+            for reader in readers + excluders:
+                if reader.exhausted() or not reader.has_more_after_block():
+                    continue
+                last = reader.peek()[-1]
+                key = (int(last['corner']), int(last['edge']))
+                if bound is None or key < bound:
+                    bound = key
+
+            def take_all(group):
+                blocks = []
+                for reader in group:
+                    if reader.exhausted():
+                        continue
+                    block = reader.peek()
+                    count = len(block) if bound is None else _count_at_most(block, bound)
+                    blocks.append(reader.take(count))
+                return np.concatenate(blocks) if blocks else np.empty(0, dtype=RANK_DTYPE)
+
+            merged = sort_unique(take_all(readers))
+            merged = difference(merged, take_all(excluders))
+            merged.tofile(output)
+            written += len(merged)
+
+    return written
+
+
+class DistanceExplorer:
+    """
+    Breadth-first search over the cube group from the solved state.
+
+    Every level d is written to workdir/depth_XX.bin as a sorted, deduplicated
+    file of RANK_DTYPE records (see environment.cubie). Children of a level
+    are generated chunk by chunk, sorted in memory and spilled to temporary
+    runs once more than memory_limit records are buffered. The runs are then
+    merged externally while subtracting levels d and d - 1, which are the
+    only other levels a neighbour of a depth-d state can belong to.
+    """
+
+    def __init__(self, workdir, chunk_size=1 << 16, memory_limit=1 << 24, block_size=1 << 20):
+        """
+        Args:
+            workdir: directory for level files and temporary runs
+            chunk_size: parent states expanded per step
+            memory_limit: maximum number of child records buffered before spilling a run
+            block_size: records per run read in each external merge step
+        """
+        self.workdir = workdir
+        self.chunk_size = chunk_size
+        self.memory_limit = memory_limit
+        self.block_size = block_size
+        self.counts = []
+
+    def level_path(self, depth):
+        return os.path.join(self.workdir, f"depth_{depth:02d}.bin")
+
+    def load_level(self, depth):
+        """
+        Memory-map the records at a given distance.
+
+        Args:
+            depth: distance from the solved state
+
+        Returns:
+            np.memmap: sorted RANK_DTYPE records
+        """
+        path = self.level_path(depth)
+        if os.path.getsize(path) == 0:
+            return np.empty(0, dtype=RANK_DTYPE)
+        return np.memmap(path, dtype=RANK_DTYPE, mode='r')
+
+    def run(self, max_depth, verbose=True):
+        """
+        Explore all states up to max_depth moves from solved.
+
+        Levels already present in workdir are reused, so an interrupted
+        exploration continues from its last completed level.
+
+        Args:
+            max_depth: deepest level to generate
+            verbose: print one line per completed level
+
+        Returns:
+            list: number of states at each distance 0..max_depth
+        """
+        os.makedirs(self.workdir, exist_ok=True)
+        self.counts = []
+
+        if not os.path.exists(self.level_path(0)):
+            rank_states(SOLVED_STATE[None, :]).tofile(self.level_path(0))
+        self.counts.append(len(self.load_level(0)))
+
+        for depth in range(1, max_depth + 1):
+            if not os.path.exists(self.level_path(depth)):
+                start = time.time()
+                self._build_level(depth)
+                elapsed = time.time() - start
+            else:
+                elapsed = 0.0
+
+            self.counts.append(len(self.load_level(depth)))
+            if verbose:
+                print(f"Depth {depth:2d}: {self.counts[-1]:>14,} states ({elapsed:.2f}s)")
+
+            if self.counts[-1] == 0:
+                break
+
+        self._write_summary()
+        return self.counts
+
+    def _build_level(self, depth):
+        temp_dir = os.path.join(self.workdir, f"tmp_depth_{depth:02d}")
+        os.makedirs(temp_dir, exist_ok=True)
+
+        parents = self.load_level(depth - 1)
+        buffered = []
+        buffered_count = 0
+        runs = []
+        children_buffer = np.empty((min(self.chunk_size, len(parents)), NUM_MOVES, 54), dtype=np.uint8)
+
+        for start in range(0, len(parents), self.chunk_size):
+            states = unrank_states(np.asarray(parents[start:start + self.chunk_size]))
+            children = expand(states, out=children_buffer[:len(states)]).reshape(-1, 54)
+            buffered.append(sort_unique(rank_states(children)))
+            buffered_count += len(buffered[-1])
+
+            if buffered_count >= self.memory_limit:
+                runs.append(self._spill_run(buffered, temp_dir, len(runs)))
+                buffered = []
+                buffered_count = 0
+
+        if buffered:
+            in_memory = sort_unique(np.concatenate(buffered))
+            if runs:
+                runs.append(self._spill_run([in_memory], temp_dir, len(runs)))
+            else:
+                runs.append(in_memory)
+
+        excluded = [self.load_level(depth - 1)]
+        if depth >= 2:
+            excluded.append(self.load_level(depth - 2))
+
+        partial_path = self.level_path(depth) + '.partial'
+        merge_sorted_runs(runs, excluded, partial_path, self.block_size)
+        os.replace(partial_path, self.level_path(depth))
+
+        del runs
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def _spill_run(self, buffered, temp_dir, index):
+        path = os.path.join(temp_dir, f"run_{index:04d}.bin")
+        sort_unique(np.concatenate(buffered)).tofile(path)
+        return np.memmap(path, dtype=RANK_DTYPE, mode='r')
+
+    def _write_summary(self):
+        summary = {
+            'counts': self.counts,
+            'total': sum(self.counts),
+        }
+        with open(os.path.join(self.workdir, 'summary.json'), 'w') as f:
+            json.dump(summary, f, indent=2)
+
+    def iter_labelled_states(self, max_depth, batch_size=4096):
+        """
+        Yield exact depth-labelled training batches from the level files.
+
+        Args:
+            max_depth: deepest level to read
+            batch_size: states per batch
+
+        Yields:
+            tuple: ((B, 54) uint8 states, (B,) int depths)
+        """
+        for depth in range(max_depth + 1):
+            records = self.load_level(depth)
+            for start in range(0, len(records), batch_size):
+                states = unrank_states(np.asarray(records[start:start + batch_size]))
+                yield states, np.full(len(states), depth, dtype=np.int64)
+
+    def print_distribution(self):
+        """Print the distance distribution in a table."""
+        print(f"{'Depth':>5} | {'States':>16} | {'Branching':>9}")
+        print("-" * 37)
+        for depth, count in enumerate(self.counts):
+            ratio = f"{count / self.counts[depth - 1]:.3f}" if depth > 0 and self.counts[depth - 1] else "-"
+            print(f"{depth:>5} | {count:>16,} | {ratio:>9}")
+        print(f"Total states: {sum(self.counts):,}")
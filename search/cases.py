@@ -0,0 +1,429 @@
+"""
+Case recognition for the F2L, OLL and PLL stages of CFOP.
+
+Every case is stored as the algorithm that solves it, written in the face
+turns Cube.execute_algorithm understands. The index applies each
+algorithm backwards to the solved cube, together with its AUF (U-layer
+adjustment) and slot variants, and files the resulting position under a
+small integer key computed from the cubies the stage cares about:
+
+    stage   key                                               table size
+    F2L     position and twist of the slot corner,            4 x 576
+            position and flip of the slot edge
+    OLL     twists of the U corners, flips of the U edges     1296
+    PLL     positions of the U corners and U edges            65536
+
+Recognizing a case is then one array lookup, for a single cube or for a
+whole (N, 54) batch. Cross on D, last layer on U; the F2L slots follow the
+cubie order of their corners: FR, FL, BL, BR.
+"""
+
+import os
+
+import numpy as np
+
+from environment.constants import UP, FRONT, LEFT, BACK, RIGHT, DOWN
+from environment.cubie import facelets_to_cubies
+from environment.moves import INVERSE_MOVES, MOVE_NAMES, MOVE_PERMS, SOLVED_STATE
+from environment.serialization import algorithm_to_moves
+
+F2L, OLL, PLL = 'F2L', 'OLL', 'PLL'
+
+F2L_SLOTS = ['FR', 'FL', 'BL', 'BR']
+
+# Standard OLL numbering; wide and slice moves rewritten as face turns
+OLL_ALGORITHMS = {
+    1: "R U2 R2 F R F' U2 R' F R F'",
+    2: "F R U R' U' F' B U L U' L' B'",
+    3: "B U L U' L' B' U' F R U R' U' F'",
+    4: "B U L U' L' B' U F R U R' U' F'",
+    5: "L' B2 R B R' B L",
+    6: "L F2 R' F' R F' L'",
+    7: "L F R' F R F2 L'",
+    8: "R' F' L F' L' F2 R",
+    9: "R U R' U' R' F R2 U R' U' F'",
+    10: "R U R' U R' F R F' R U2 R'",
+    11: "L F R' F R' D R D' R F2 L'",
+    12: "L R2 F' R F' R' F2 R F' R L'",
+    13: "F U R U' R2 F' R U R U' R'",
+    14: "R' F R U R' F' R F U' F'",
+    15: "R' F' R L' U' L U R' F R",
+    16: "L F L' R U R' U' L F' L'",
+    17: "R U R' U R' F R F' U2 R' F R F'",
+    18: "L F R' F R F2 L2 B' R B' R' B2 L",
+    19: "L' R B R B R' B' L R2 F R F'",
+    20: "L F R' F' R2 L2 B R B' R' B' R' L",
+    21: "R U2 R' U' R U R' U' R U' R'",
+    22: "R U2 R2 U' R2 U' R2 U2 R",
+    23: "R2 D' R U2 R' D R U2 R",
+    24: "L F R' F' L' F R F'",
+    25: "F' L F R' F' L' F R",
+    26: "R U2 R' U' R U' R'",
+    27: "R U R' U R U2 R'",
+    28: "L F R' F' L' R U R U' R'",
+    29: "R U R' U' R U' R' F' U' F R U R'",
+    30: "F R' F R2 U' R' U' R U R' F2",
+    31: "R' U' F U R U' R' F' R",
+    32: "L U F' U' L' U L F L'",
+    33: "R U R' U' R' F R F'",
+    34: "R U R2 U' R' F R U R U' F'",
+    35: "R U2 R2 F R F' R U2 R'",
+    36: "L' U' L U' L' U L U L F' L' F",
+    37: "F R' F' R U R U' R'",
+    38: "R U R' U R U' R' U' R' F R F'",
+    39: "L F' L' U' L U F U' L'",
+    40: "R' F R U R' U' F' U R",
+    41: "R U R' U R U2 R' F R U R' U' F'",
+    42: "R' U' R U' R' U2 R F R U R' U' F'",
+    43: "F' U' L' U L F",
+    44: "F U R U' R' F'",
+    45: "F R U R' U' F'",
+    46: "R' U' R' F R F' U R",
+    47: "R' U' R' F R F' R' F R F' U R",
+    48: "F R U R' U' R U R' U' F'",
+    49: "L F' L2 B L2 F L2 B' L",
+    50: "L' B L2 F' L2 B' L2 F L'",
+    51: "F U R U' R' U R U' R' F'",
+    52: "R U R' U R U' B U' B' R'",
+    53: "R' F2 L F L' F' L F L' F R",
+    54: "L F2 R' F' R F R' F' R F' L'",
+    55: "R' F R U R U' R2 F' R2 U' R' U R U R'",
+    56: "L' B' L U' R' U R U' R' U R L' B L",
+    57: "R U R' U' R' L F R F' L'",
+}
+
+PLL_ALGORITHMS = {
+    'Aa': "R' F R' B2 R F' R' B2 R2",
+    'Ab': "R2 B2 R F R' B2 R F' R",
+    'E': "R B' R' F R B R' F' R B R' F R B' R' F'",
+    'F': "R' U' F' R U R' U' R' F R2 U' R' U' R U R' U R",
+    'Ga': "R2 U R' U R' U' R U' R2 U' D R' U R D'",
+    'Gb': "R' U' R U D' R2 U R' U R U' R U' R2 D",
+    'Gc': "R2 U' R U' R U R' U R2 U D' R U' R' D",
+    'Gd': "R U R' U' D R2 U' R U' R' U R' U R2 D'",
+    'H': "R2 U2 R U2 R2 U2 R2 U2 R U2 R2",
+    'Ja': "R' U L' U2 R U' R' U2 R L",
+    'Jb': "R U R' F' R U R' U' R' F R2 U' R'",
+    'Na': "R U R' U R U R' F' R U R' U' R' F R2 U' R' U2 R U' R'",
+    'Nb': "R' U R U' R' F' U' F R U R' F R' F' R U' R",
+    'Ra': "R U' R' U' R U R D R' U' R D' R' U2 R'",
+    'Rb': "R2 F R U R U' R' F' R U2 R' U2 R",
+    'T': "R U R' U' R' F R2 U' R' U' R U R' F'",
+    'Ua': "R U' R U R U R U' R' U' R2",
+    'Ub': "R2 U R U R' U' R' U' R' U R'",
+    'V': "R' U R' U' B' R' B2 U' B' U B' R B R",
+    'Y': "F R U' R' U' R U R' F' R U R' U' R' F R F'",
+    'Z': "R' U' R U' R U R U' R' U R U R2 U' R'",
+}
+
+# F2L cases for the FR slot, one per AUF class and numbered in this order, as
+# (corner position, corner twist, edge position, edge flip, algorithm) with
+# positions, twists and flips as in environment.cubie (corner 4 is DFR, edge 8 is FR).
+# Shortest solutions in <R, U> or <R, U, F>.
+F2L_ALGORITHMS = [
+    (0, 0, 0, 0, "R U2 R' U' R U R'"),
+    (2, 0, 2, 1, "F2 U2 F U F' U F2"),
+    (2, 0, 3, 0, "R2 U2 R' U' R U' R2"),
+    (0, 0, 1, 1, "F' U2 F U F' U' F"),
+    (0, 0, 2, 0, "R U' R' U2 R U R'"),
+    (3, 0, 1, 1, "F' U2 F2 R' F' R"),
+    (1, 0, 0, 0, "R U2 R' U R U' R'"),
+    (2, 0, 1, 1, "F' U' F2 R' F' R"),
+    (0, 0, 8, 0, "R2 U R2 U R2 U2 R2"),
+    (0, 0, 8, 1, "F' U F R U2 R'"),
+    (2, 1, 2, 0, "R2 U R' U R U2 R2"),
+    (0, 1, 0, 1, "R U' R' U2 F' U' F"),
+    (0, 1, 1, 0, "R' U2 R2 U R2 U R"),
+    (2, 1, 3, 1, "F' U2 F"),
+    (2, 1, 0, 0, "R U' R' U' R U R'"),
+    (1, 1, 3, 1, "F' U' F U2 F' U F"),
+    (0, 1, 3, 0, "R U R'"),
+    (0, 1, 3, 1, "R2 U2 F R2 F' U2 R2"),
+    (1, 1, 8, 0, "R U R' U2 R U R'"),
+    (1, 1, 8, 1, "F' U' F U' R U R'"),
+    (1, 2, 1, 0, "R U' R'"),
+    (0, 2, 0, 1, "F U2 F2 U' F2 U' F'"),
+    (0, 2, 1, 0, "F' U F U2 R U R'"),
+    (1, 2, 2, 1, "F' U F U' F' U' F"),
+    (3, 2, 1, 0, "R U2 R' U2 R U' R'"),
+    (0, 2, 2, 1, "F' U' F"),
+    (3, 2, 2, 0, "R U R' U2 R U' R'"),
+    (1, 2, 0, 1, "F' U' F U' F' U' F"),
+    (3, 2, 8, 0, "R U' R' U2 R U' R'"),
+    (2, 2, 8, 1, "R U R' F R' F' R"),
+    (4, 0, 1, 0, "F' U2 F U2 R U R'"),
+    (4, 0, 0, 1, "R U2 R' U2 F' U' F"),
+    (4, 0, 8, 1, "R U' R U2 F R2 F' U2 R2"),
+    (4, 1, 0, 0, "R U' R' U R U' R'"),
+    (4, 1, 2, 1, "R' F R F2 U' F"),
+    (4, 1, 8, 0, "R2 U2 R' U' R U' R' U2 R'"),
+    (4, 1, 8, 1, "R F U R U' R' F' U' R'"),
+    (4, 2, 2, 0, "F' U F R U R'"),
+    (4, 2, 1, 1, "F' U F2 R' F' R"),
+    (4, 2, 8, 0, "R U2 R U R' U R U2 R2"),
+    (4, 2, 8, 1, "R U F R U R' U' F' R'"),
+]
+
+AUF_MOVES = [[], [0], [2], [1]]         # no turn, U, U2, U'
+
+# Face each face is carried to by a y rotation; moving an FR-slot algorithm
+# this way gives the same case in the next slot (FR -> FL -> BL -> BR)
+_Y_FACES = {UP: UP, FRONT: LEFT, LEFT: BACK, BACK: RIGHT, RIGHT: FRONT, DOWN: DOWN}
+
+_QUARTERS = (1, 3, 2)                   # turn index -> clockwise quarter turns
+_TURNS = {1: 0, 3: 1, 2: 2}
+
+F2L_KEYS = 8 * 3 * 12 * 2
+OLL_KEYS = 3 ** 4 * 2 ** 4
+PLL_KEYS = 4 ** 8
+
+_OLL_WEIGHTS = np.array([16 * 27, 16 * 9, 16 * 3, 16, 8, 4, 2, 1])
+_PLL_WEIGHTS = 4 ** np.arange(8)
+
+
+class Case:
+    """One recognized case together with the moves that solve it."""
+
+    def __init__(self, stage, name, moves):
+        """
+        Args:
+            stage: F2L, OLL or PLL
+            name: case name (e.g. 'T', 'OLL 27', 'F2L 17 FR')
+            moves: list of move indices, AUF included
+        """
+        self.stage = stage
+        self.name = name
+        self.moves = moves
+        self.algorithm = ' '.join(MOVE_NAMES[move] for move in moves)
+        self.perm = compose(moves)
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __repr__(self):
+        return f"Case({self.stage} {self.name!r}: {self.algorithm or '-'})"
+
+
+def compose(moves):
+    """
+    Combine a move sequence into one sticker permutation.
+
+    Returns:
+        np.ndarray: (54,) permutation p with state[p] equal to applying the moves in order
+    """
+    perm = np.arange(54)
+    for move in moves:
+        perm = perm[MOVE_PERMS[move]]
+    return perm
+
+
+def simplify(moves):
+    """Merge consecutive turns of the same face ("U R R2" -> "U R'")."""
+    merged = []
+    for move in moves:
+        if merged and merged[-1] // 3 == move // 3:
+            quarters = (_QUARTERS[merged.pop() % 3] + _QUARTERS[move % 3]) % 4
+            if quarters:
+                merged.append(move // 3 * 3 + _TURNS[quarters])
+        else:
+            merged.append(move)
+    return merged
+
+
+def invert(moves):
+    """Move indices of the inverse sequence."""
+    return [int(INVERSE_MOVES[move]) for move in reversed(moves)]
+
+
+def slot_moves(moves, slot):
+    """Carry FR-slot moves over to another slot by relabeling faces."""
+    for _ in range(slot):
+        moves = [_Y_FACES[move // 3] * 3 + move % 3 for move in moves]
+    return moves
+
+
+def f2l_keys(cubies, slot):
+    """
+    F2L keys of one slot for a batch.
+
+    Args:
+        cubies: (cp, co, ep, eo) as returned by facelets_to_cubies
+        slot: slot index into F2L_SLOTS
+
+    Returns:
+        np.ndarray: (N,) keys in [0, F2L_KEYS)
+    """
+    cp, co, ep, eo = cubies
+    corner = np.argmax(cp == 4 + slot, axis=1)
+    edge = np.argmax(ep == 8 + slot, axis=1)
+    rows = np.arange(len(cp))
+    return ((corner * 3 + co[rows, corner]) * 12 + edge) * 2 + eo[rows, edge]
+
+
+def oll_keys(cubies):
+    """OLL keys (U-layer twists and flips) for a batch, shape (N,)."""
+    _, co, _, eo = cubies
+    return np.concatenate([co[:, :4], eo[:, :4]], axis=1).astype(np.intp) @ _OLL_WEIGHTS
+
+
+def pll_keys(cubies):
+    """PLL keys (U-layer permutation) for a batch; -1 where the U layer holds other cubies."""
+    cp, _, ep, _ = cubies
+    layer = np.concatenate([cp[:, :4], ep[:, :4]], axis=1).astype(np.intp)
+    keys = layer @ _PLL_WEIGHTS
+    return np.where((layer < 4).all(axis=1), keys, -1)
+
+
+class CaseIndex:
+    """
+    Lookup tables from cubie keys to the cases of each stage.
+
+    Table entries are indices into `cases`, -1 where no case applies
+    (e.g. a slot piece sitting in another slot).
+    """
+
+    def __init__(self):
+        self.cases = []
+        self.f2l_table = np.full((len(F2L_SLOTS), F2L_KEYS), -1, dtype=np.int16)
+        self.oll_table = np.full(OLL_KEYS, -1, dtype=np.int16)
+        self.pll_table = np.full(PLL_KEYS, -1, dtype=np.int16)
+
+        for slot, name in enumerate(F2L_SLOTS):
+            self._add(self.f2l_table[slot], F2L, f"{name} solved", [], lambda c, s=slot: f2l_keys(c, s))
+            for number, (_, _, _, _, algorithm) in enumerate(F2L_ALGORITHMS, 1):
+                moves = slot_moves(algorithm_to_moves(algorithm), slot)
+                self._add(self.f2l_table[slot], F2L, f"F2L {number} {name}", moves, lambda c, s=slot: f2l_keys(c, s))
+
+        self._add(self.oll_table, OLL, 'OLL skip', [], oll_keys)
+        for number, algorithm in OLL_ALGORITHMS.items():
+            self._add(self.oll_table, OLL, f"OLL {number}", algorithm_to_moves(algorithm), oll_keys)
+
+        self._add(self.pll_table, PLL, 'PLL skip', [], pll_keys, post_auf=True)
+        for name, algorithm in PLL_ALGORITHMS.items():
+            self._add(self.pll_table, PLL, name, algorithm_to_moves(algorithm), pll_keys, post_auf=True)
+
+    def _add(self, table, stage, name, moves, key_function, post_auf=False):
+        # Every AUF before the algorithm (and after it, for PLL) is a separate
+        # position; keep the shortest solution when positions coincide
+        for pre in AUF_MOVES:
+            for post in (AUF_MOVES if post_auf else [[]]):
+                solution = simplify(invert(pre) + moves + invert(post))
+                state = SOLVED_STATE[np.argsort(compose(solution))]
+                key = int(key_function(facelets_to_cubies(state[None, :]))[0])
+                existing = table[key]
+                if existing >= 0 and len(self.cases[existing]) <= len(solution):
+                    continue
+                table[key] = len(self.cases)
+                self.cases.append(Case(stage, name, solution))
+
+    def save(self, path):
+        """Write the tables and case moves to an .npz file (atomically)."""
+        moves = np.full((len(self.cases), max(len(case) for case in self.cases)), -1, dtype=np.int8)
+        for row, case in enumerate(self.cases):
+            moves[row, :len(case)] = case.moves
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            np.savez(f, f2l_table=self.f2l_table, oll_table=self.oll_table, pll_table=self.pll_table,
+                     stages=np.array([case.stage for case in self.cases]),
+                     names=np.array([case.name for case in self.cases]), moves=moves)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Read an index written by save."""
+        index = cls.__new__(cls)
+        with np.load(path) as data:
+            index.f2l_table = data['f2l_table']
+            index.oll_table = data['oll_table']
+            index.pll_table = data['pll_table']
+            index.cases = [Case(str(stage), str(name), [int(move) for move in row if move >= 0])
+                           for stage, name, row in zip(data['stages'], data['names'], data['moves'])]
+        return index
+
+    def f2l_ids(self, states, slot, cubies=None):
+        """
+        Case ids of one F2L slot for a batch of states.
+
+        Args:
+            states: (N, 54) sticker states with the cross solved
+            slot: slot index into F2L_SLOTS
+            cubies: facelets_to_cubies(states), when already computed
+
+        Returns:
+            np.ndarray: (N,) indices into `cases`, -1 where the slot's pieces
+            are neither in the U layer nor in the slot itself
+        """
+        cubies = facelets_to_cubies(states) if cubies is None else cubies
+        return self.f2l_table[slot][f2l_keys(cubies, slot)]
+
+    def oll_ids(self, states, cubies=None):
+        """OLL case ids for a batch of states with F2L solved, shape (N,)."""
+        cubies = facelets_to_cubies(states) if cubies is None else cubies
+        return self.oll_table[oll_keys(cubies)]
+
+    def pll_ids(self, states, cubies=None):
+        """PLL case ids for a batch of states with F2L and OLL solved; -1 elsewhere."""
+        cubies = facelets_to_cubies(states) if cubies is None else cubies
+        keys = pll_keys(cubies)
+        return np.where(keys >= 0, self.pll_table[np.maximum(keys, 0)], -1)
+
+    def f2l_case(self, state, slot):
+        """Case of one F2L slot of a single state, or None."""
+        return self._single(self.f2l_ids(np.asarray(state)[None, :], slot))
+
+    def oll_case(self, state):
+        """OLL case of a single state, or None."""
+        return self._single(self.oll_ids(np.asarray(state)[None, :]))
+
+    def pll_case(self, state):
+        """PLL case of a single state, or None."""
+        return self._single(self.pll_ids(np.asarray(state)[None, :]))
+
+    def _single(self, ids):
+        return self.cases[ids[0]] if ids[0] >= 0 else None
+
+
+_INDEX = []
+
+
+def case_index(cache_path=None):
+    """
+    The shared CaseIndex, built on first use (well under a second).
+
+    Args:
+        cache_path: optional .npz file; the index is loaded from it when it
+            exists and written to it otherwise
+    """
+    cached = bool(cache_path) and os.path.exists(cache_path)
+    if not _INDEX:
+        _INDEX.append(CaseIndex.load(cache_path) if cached else CaseIndex())
+    if cache_path and not cached:
+        _INDEX[0].save(cache_path)
+    return _INDEX[0]
+
+
+def recognize(cube):
+    """
+    Recognize the next CFOP case of a cube whose cross is solved.
+
+    Slots are checked in F2L_SLOTS order, then OLL, then PLL.
+
+    Args:
+        cube: Cube (or a sticker state)
+
+    Returns:
+        Case: the first stage's case that still needs moves, or None when the
+        cube is solved or the next slot's pieces are stuck in another slot
+    """
+    state = np.asarray(getattr(cube, 'state', cube), dtype=np.uint8)
+    index = case_index()
+    cubies = facelets_to_cubies(state[None, :])
+    case_ids = [index.f2l_ids(state, slot, cubies)[0] for slot in range(len(F2L_SLOTS))]
+    case_ids += [index.oll_ids(state, cubies)[0], index.pll_ids(state, cubies)[0]]
+    for case_id in case_ids:
+        if case_id < 0:
+            return None
+        if len(index.cases[case_id]):
+            return index.cases[case_id]
+    return None
@@ -0,0 +1,266 @@
+"""
+Stage-by-stage CFOP solver built on table lookups.
+
+    cross   D-layer edges, solved optimally from a BFS distance table over
+            their positions and flips (190,080 reachable entries)
+    F2L     the four corner/edge pairs, one case lookup per pair; the slot
+            with the shortest algorithm goes first, and pairs stuck in
+            other slots are freed with R U R' (moved to that slot)
+    OLL     orient the last layer, one case lookup
+    PLL     permute the last layer, one case lookup including the final AUF
+
+The cross table and the case index are built once and cached in
+cache_dir (the project's tables directory by default). Every stage runs on whole (N, 54) batches: a lookup selects
+each state's case and a single gather applies the case's precomposed
+permutation.
+"""
+
+import os
+
+import numpy as np
+
+from environment.cubie import facelets_to_cubies
+from environment.moves import MOVE_NAMES, MOVE_PERMS, NUM_MOVES, SOLVED_STATE
+from search import TABLES_DIR
+from search.cases import AUF_MOVES, F2L, F2L_SLOTS, Case, case_index, simplify, slot_moves
+
+STAGES = ('cross', 'f2l', 'oll', 'pll')
+
+CROSS_EDGES = (4, 5, 6, 7)              # DR, DF, DL, DB
+CROSS_KEYS = 12 ** 4 * 16               # four positions and four flips
+UNREACHED = 255
+
+_CROSS_TABLE_FILE = 'cross_distances.npy'
+_CASE_INDEX_FILE = 'cases.npz'
+
+_EXTRACT_MOVES = [12, 0, 13]            # R U R'
+_MAX_F2L_STEPS = 16                     # inserts and extractions; random cubes need at most 6
+
+
+def _edge_move_tables():
+    # Where each edge position goes under each move, and the flip it picks up
+    positions = np.empty((NUM_MOVES, 12), dtype=np.intp)
+    flips = np.empty((NUM_MOVES, 12), dtype=np.intp)
+    _, _, ep, eo = facelets_to_cubies(SOLVED_STATE[MOVE_PERMS])
+    for move in range(NUM_MOVES):
+        positions[move, ep[move]] = np.arange(12)
+        flips[move, ep[move]] = eo[move]
+    return positions, flips
+
+
+_EDGE_POSITIONS, _EDGE_FLIPS = _edge_move_tables()
+_POSITION_WEIGHTS = 12 ** np.arange(3, -1, -1) * 16
+_FLIP_WEIGHTS = 2 ** np.arange(3, -1, -1)
+
+
+def cross_keys(cubies):
+    """
+    Cross coordinate of a batch: positions and flips of the four D edges.
+
+    Args:
+        cubies: (cp, co, ep, eo) as returned by facelets_to_cubies
+
+    Returns:
+        np.ndarray: (N,) keys in [0, CROSS_KEYS)
+    """
+    _, _, ep, eo = cubies
+    positions = np.stack([np.argmax(ep == edge, axis=1) for edge in CROSS_EDGES], axis=1)
+    flips = np.take_along_axis(eo, positions, axis=1).astype(np.intp)
+    return positions @ _POSITION_WEIGHTS + flips @ _FLIP_WEIGHTS
+
+
+def cross_children(keys):
+    """
+    Cross keys after each of the 18 moves.
+
+    Args:
+        keys: (N,) cross keys
+
+    Returns:
+        np.ndarray: (N, 18) keys
+    """
+    positions = (keys[:, None] // _POSITION_WEIGHTS) % 12
+    flips = (keys[:, None] >> np.arange(3, -1, -1)) & 1
+    new_positions = _EDGE_POSITIONS[:, positions].transpose(1, 0, 2)
+    new_flips = flips[:, None, :] ^ _EDGE_FLIPS[:, positions].transpose(1, 0, 2)
+    return new_positions @ _POSITION_WEIGHTS + new_flips @ _FLIP_WEIGHTS
+
+
+def build_cross_table():
+    """
+    Breadth-first search over the cross coordinate from the solved cross.
+
+    Returns:
+        np.ndarray: (CROSS_KEYS,) uint8 move distances, UNREACHED for keys
+        that are not a valid cross (two edges on one position)
+    """
+    distances = np.full(CROSS_KEYS, UNREACHED, dtype=np.uint8)
+    frontier = cross_keys(facelets_to_cubies(SOLVED_STATE[None, :]))
+    distances[frontier] = 0
+    depth = 0
+    while len(frontier):
+        depth += 1
+        children = np.unique(cross_children(frontier))
+        frontier = children[distances[children] == UNREACHED]
+        distances[frontier] = depth
+    return distances
+
+
+class CFOPSolver:
+    """
+    Human-style solver: cross, four F2L pairs, OLL, PLL.
+
+    Solutions average about 60 face turns, far from optimal, but every
+    stage is a recognizable subgoal, which also makes them useful as
+    curriculum targets.
+    """
+
+    def __init__(self, cache_dir=None):
+        """
+        Args:
+            cache_dir: directory holding the cross table and the case index,
+                TABLES_DIR when None; missing files are built and written on
+                first use
+        """
+        cache_dir = TABLES_DIR if cache_dir is None else cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        table_path = os.path.join(cache_dir, _CROSS_TABLE_FILE)
+        if os.path.exists(table_path):
+            self.cross_distances = np.load(table_path)
+        else:
+            self.cross_distances = build_cross_table()
+            temp_path = f"{table_path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.save(f, self.cross_distances)
+            os.replace(temp_path, table_path)
+
+        self.index = case_index(os.path.join(cache_dir, _CASE_INDEX_FILE))
+        # Extraction cases go after the index's own, so one id space covers every step
+        self.cases = self.index.cases + [
+            Case(F2L, f"extract {name}", simplify(auf + slot_moves(_EXTRACT_MOVES, slot)))
+            for slot, name in enumerate(F2L_SLOTS) for auf in AUF_MOVES
+        ]
+        self._extract_ids = np.arange(len(self.index.cases), len(self.cases))
+        self._perms = np.stack([case.perm for case in self.cases])
+        self._lengths = np.array([len(case) for case in self.cases])
+
+    def solve_batch(self, states):
+        """
+        Solve a batch of reachable states.
+
+        Args:
+            states: (N, 54) sticker states
+
+        Returns:
+            tuple: (solutions, stage_lengths) with solutions a list of N lists
+            of move indices and stage_lengths an (N, 4) array of the moves
+            spent on each of STAGES (before merging moves across stages)
+
+        Raises:
+            RuntimeError: if a state is not solved at the end (an invalid input)
+        """
+        states = np.array(states, dtype=np.uint8)
+        steps = []                      # (stage, (N,) case or move ids, -1 for no-op)
+
+        cross_moves = self._solve_cross(states)
+        steps += [(0, moves) for moves in cross_moves.T]
+        steps += [(1, ids) for ids in self._solve_f2l(states)]
+        steps.append((2, self._apply(states, self.index.oll_ids(states))))
+        steps.append((3, self._apply(states, self.index.pll_ids(states))))
+
+        if not (states == SOLVED_STATE).all():
+            raise RuntimeError("CFOP stages left a state unsolved")
+
+        stage_lengths = np.zeros((len(states), len(STAGES)), dtype=np.int64)
+        solutions = [[] for _ in range(len(states))]
+        for stage, ids in steps:
+            rows = np.flatnonzero(ids >= 0)
+            if stage == 0:
+                stage_lengths[rows, 0] += 1
+                for row in rows:
+                    solutions[row].append(int(ids[row]))
+                continue
+            stage_lengths[rows, stage] += self._lengths[ids[rows]]
+            for row in rows:
+                solutions[row].extend(self.cases[ids[row]].moves)
+        return [simplify(moves) for moves in solutions], stage_lengths
+
+    def solve(self, cube):
+        """
+        Solve a single cube without changing it.
+
+        Args:
+            cube: Cube (or a sticker state)
+
+        Returns:
+            tuple: (algorithm string, dict of stage name -> move count)
+        """
+        state = np.asarray(getattr(cube, 'state', cube), dtype=np.uint8)
+        solutions, stage_lengths = self.solve_batch(state[None, :])
+        algorithm = ' '.join(MOVE_NAMES[move] for move in solutions[0])
+        return algorithm, dict(zip(STAGES, stage_lengths[0].tolist()))
+
+    def _apply(self, states, ids):
+        rows = np.flatnonzero(ids >= 0)
+        states[rows] = states[rows[:, None], self._perms[ids[rows]]]
+        return ids
+
+    def _solve_cross(self, states):
+        # Greedy descent on the distance table is optimal for the cross
+        keys = cross_keys(facelets_to_cubies(states))
+        distances = self.cross_distances[keys].astype(np.intp)
+        moves = np.full((len(states), int(distances.max(initial=0))), -1, dtype=np.intp)
+        for step in range(moves.shape[1]):
+            active = np.flatnonzero(distances > 0)
+            children = cross_children(keys[active])
+            move = np.argmax(self.cross_distances[children] < distances[active, None], axis=1)
+            moves[active, step] = move
+            states[active] = states[active[:, None], MOVE_PERMS[move]]
+            keys[active] = children[np.arange(len(active)), move]
+            distances[active] -= 1
+        return moves
+
+    def _solve_f2l(self, states):
+        steps = []
+        slots = range(len(F2L_SLOTS))
+        for _ in range(_MAX_F2L_STEPS):
+            cubies = facelets_to_cubies(states)
+            ids = np.stack([self.index.f2l_ids(states, slot, cubies) for slot in slots], axis=1)
+            lengths = np.where(ids >= 0, self._lengths[np.maximum(ids, 0)], 0)
+            unsolved = (ids < 0) | (lengths > 0)
+            if not unsolved.any():
+                return steps
+
+            # Shortest recognizable pair first
+            cost = np.where(lengths > 0, lengths, np.iinfo(np.int64).max)
+            best = np.argmin(cost, axis=1)
+            rows = np.arange(len(states))
+            chosen = np.where(lengths[rows, best] > 0, ids[rows, best], -1)
+
+            # Every unsolved pair has a piece in another slot: free one
+            stuck = np.flatnonzero(unsolved.any(axis=1) & (chosen < 0))
+            if len(stuck):
+                chosen[stuck] = self._extraction(states[stuck], unsolved[stuck])
+            steps.append(self._apply(states, chosen))
+        raise RuntimeError(f"F2L not finished after {_MAX_F2L_STEPS} steps")
+
+    def _extraction(self, states, unsolved):
+        # Try R U R' (after each AUF) on every unsolved slot. Prefer one that
+        # leaves an unsolved pair recognizable, then the fewest corners and
+        # edges parked in a slot that is not theirs.
+        candidates = states[:, self._perms[self._extract_ids]]
+        flat = candidates.reshape(-1, 54)
+        cubies = facelets_to_cubies(flat)
+        ids = np.stack([self.index.f2l_ids(flat, slot, cubies) for slot in range(len(F2L_SLOTS))], axis=1)
+        progress = ((ids >= 0) & (self._lengths[np.maximum(ids, 0)] > 0)).any(axis=1)
+
+        cp, _, ep, _ = cubies
+        slot_corners, slot_edges = cp[:, 4:], ep[:, 8:]
+        homes = np.arange(4, 8)
+        parked = ((slot_corners >= 4) & (slot_corners != homes)).sum(axis=1)
+        parked += ((slot_edges >= 8) & (slot_edges != homes + 4)).sum(axis=1)
+
+        score = parked - 16 * progress
+        score = score.reshape(len(states), len(self._extract_ids))
+        score[~np.repeat(unsolved, len(AUF_MOVES), axis=1)] = np.iinfo(score.dtype).max
+        return self._extract_ids[np.argmin(score, axis=1)]
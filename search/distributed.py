@@ -0,0 +1,407 @@
+"""
+Breadth-first search sharded over worker processes or hosts.
+
+Every state belongs to one of `shards` workers, chosen by a hash of its
+rank. For each level, each worker expands the parents it owns (unrank,
+batched expand(), rank), sorts the children by owner and sends every
+other worker its share as a frontier batch over a socket, keeping its own
+share locally. Once all peers have finished sending, each worker merges
+what it received minus its own two previous levels, exactly like the
+single-node DistanceExplorer. It then checkpoints the result to
+workdir/depth_XX.bin as a sorted, deduplicated file of RANK_DTYPE records.
+
+The driver, DistributedExplorer, tells the workers which level to build,
+collects the counts and merges the shards of every level into its own
+workdir/depth_XX.bin. Because the shards are disjoint, the merged files
+and summary.json are byte-for-byte what DistanceExplorer writes, and
+load_level, iter_labelled_states and print_distribution work unchanged.
+An interrupted run continues from the deepest level every shard has
+checkpointed.
+
+    python main.py explore --depth 9 --shards 8        # local worker processes
+    python main.py bfs-worker --shard 0 --shards 2 --host 0.0.0.0 --port 9000 --output /data/bfs
+    python main.py explore --depth 11 --shard-addresses hostA:9000,hostB:9000
+
+Messages are a frame of two lengths, a JSON header and optional raw
+RANK_DTYPE records; each connection has a single writer.
+"""
+
+import json
+import multiprocessing as mp
+import os
+import shutil
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from environment.cubie import RANK_DTYPE, rank_states, unrank_states
+from environment.moves import SOLVED_STATE, expand
+from search.bfs import DistanceExplorer, merge_sorted_runs, sort_unique
+
+_FRAME = struct.Struct('<IQ')           # header bytes, payload bytes
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def shard_of(records, shards):
+    """
+    Owner shard of every record.
+
+    Args:
+        records: (N,) RANK_DTYPE records
+        shards: number of shards
+
+    Returns:
+        np.ndarray: (N,) shard indices in [0, shards)
+    """
+    mixed = (records['corner'] * _MIX) ^ records['edge']
+    mixed ^= mixed >> np.uint64(29)
+    return (mixed % np.uint64(shards)).astype(np.intp)
+
+
+def send_message(sock, header, records=None):
+    """Send a JSON header and optional RANK_DTYPE records as one frame."""
+    body = json.dumps(header).encode()
+    payload = np.ascontiguousarray(records).view(np.uint8) if records is not None and len(records) else b''
+    sock.sendall(_FRAME.pack(len(body), len(payload)) + body)
+    if len(payload):
+        sock.sendall(payload)
+
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            return None
+        received += count
+    return buffer
+
+
+def recv_message(sock):
+    """
+    Receive one frame.
+
+    Returns:
+        tuple: (header dict, RANK_DTYPE records or None), or (None, None)
+        when the connection was closed
+    """
+    frame = _recv_exactly(sock, _FRAME.size)
+    if frame is None:
+        return None, None
+    header_size, payload_size = _FRAME.unpack(frame)
+    header = json.loads(_recv_exactly(sock, header_size))
+    records = np.frombuffer(_recv_exactly(sock, payload_size), dtype=RANK_DTYPE) if payload_size else None
+    return header, records
+
+
+class _LevelBuffer:
+    """Children of one level received by a shard, with the runs already spilled to disk."""
+
+    def __init__(self, temp_dir):
+        self.temp_dir = temp_dir
+        self.buffered = []
+        self.buffered_count = 0
+        self.runs = []
+        self.finished = set()
+
+
+class ShardWorker(DistanceExplorer):
+    """
+    Owner of one shard of the search: its level files and its share of every frontier.
+
+    Commands from the driver and frontier batches from peers arrive on
+    any connection; each connection gets a thread.
+    """
+
+    def __init__(self, shard, shards, workdir, chunk_size=1 << 16, memory_limit=1 << 24, block_size=1 << 20):
+        """
+        Args:
+            shard: index of this worker's shard
+            shards: total number of shards
+            workdir: directory for this shard's level files and temporary runs
+            chunk_size, memory_limit, block_size: as for DistanceExplorer
+        """
+        super().__init__(workdir, chunk_size, memory_limit, block_size)
+        self.shard = shard
+        self.shards = shards
+        self.address = None
+        self._listener = None
+        self._peers = {}
+        self._levels = {}
+        self._lock = threading.Condition()
+
+    def start(self, host='127.0.0.1', port=0):
+        """Listen for the driver and peers; returns the bound (host, port)."""
+        os.makedirs(self.workdir, exist_ok=True)
+        self._listener = socket.create_server((host, port))
+        self.address = self._listener.getsockname()[:2]
+        return self.address
+
+    def serve_forever(self):
+        """Answer connections until the driver sends shutdown."""
+        while True:
+            try:
+                connection, _ = self._listener.accept()
+            except OSError:
+                break
+            threading.Thread(target=self._handle, args=(connection,), daemon=True).start()
+        for peer in self._peers.values():
+            peer.close()
+
+    def completed_levels(self):
+        """Number of consecutive levels, from depth 0, checkpointed by this shard."""
+        depth = 0
+        while os.path.exists(self.level_path(depth)):
+            depth += 1
+        return depth
+
+    def _handle(self, connection):
+        with connection:
+            while True:
+                header, records = recv_message(connection)
+                if header is None:
+                    return
+                op = header['op']
+                if op == 'frontier':
+                    self._receive(header['depth'], records)
+                elif op == 'frontier_done':
+                    self._finish(header['depth'], header['shard'])
+                elif op == 'fetch':
+                    level = self.load_level(header['depth'])
+                    for start in range(0, len(level), self.block_size):
+                        send_message(connection, {'op': 'records'}, np.asarray(level[start:start + self.block_size]))
+                    send_message(connection, {'op': 'end'})
+                elif op == 'shutdown':
+                    send_message(connection, {'op': 'ok'})
+                    # close() alone does not wake a thread blocked in accept()
+                    self._listener.shutdown(socket.SHUT_RDWR)
+                    self._listener.close()
+                    return
+                else:
+                    try:
+                        reply = self._command(header)
+                    except Exception as e:
+                        reply = {'error': f"shard {self.shard}: {type(e).__name__}: {e}"}
+                    send_message(connection, reply)
+
+    def _command(self, header):
+        op = header['op']
+        if op == 'peers':
+            for shard, address in enumerate(header['addresses']):
+                if shard != self.shard and shard not in self._peers:
+                    self._peers[shard] = socket.create_connection(tuple(address))
+            return {'op': 'ok'}
+        if op == 'status':
+            return {'op': 'status', 'completed': self.completed_levels()}
+        if op == 'level':
+            depth = header['depth']
+            start = time.time()
+            if depth == 0:
+                solved = rank_states(SOLVED_STATE[None, :])
+                solved[shard_of(solved, self.shards) == self.shard].tofile(self.level_path(0))
+            else:
+                self._build_level(depth)
+            return {'op': 'level', 'count': len(self.load_level(depth)), 'seconds': time.time() - start}
+        raise ValueError(f"unknown op {op!r}")
+
+    def _buffer(self, depth):
+        # Called with the lock held; peers may start sending before this shard starts the level
+        if depth not in self._levels:
+            temp_dir = os.path.join(self.workdir, f"tmp_depth_{depth:02d}")
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            os.makedirs(temp_dir)
+            self._levels[depth] = _LevelBuffer(temp_dir)
+        return self._levels[depth]
+
+    def _receive(self, depth, records):
+        with self._lock:
+            buffer = self._buffer(depth)
+            buffer.buffered.append(records)
+            buffer.buffered_count += len(records)
+            if buffer.buffered_count >= self.memory_limit:
+                buffer.runs.append(self._spill_run(buffer.buffered, buffer.temp_dir, len(buffer.runs)))
+                buffer.buffered = []
+                buffer.buffered_count = 0
+
+    def _finish(self, depth, shard):
+        with self._lock:
+            self._buffer(depth).finished.add(shard)
+            self._lock.notify_all()
+
+    def _build_level(self, depth):
+        parents = self.load_level(depth - 1)
+        try:
+            for start in range(0, len(parents), self.chunk_size):
+                states = unrank_states(np.asarray(parents[start:start + self.chunk_size]))
+                children = sort_unique(rank_states(expand(states).reshape(-1, 54)))
+                owners = shard_of(children, self.shards)
+                order = np.argsort(owners, kind='stable')
+                parts = np.split(children[order], np.cumsum(np.bincount(owners, minlength=self.shards))[:-1])
+                for shard, part in enumerate(parts):
+                    if shard == self.shard:
+                        self._receive(depth, part)
+                    elif len(part):
+                        send_message(self._peers[shard], {'op': 'frontier', 'depth': depth}, part)
+        finally:
+            for peer in self._peers.values():
+                send_message(peer, {'op': 'frontier_done', 'depth': depth, 'shard': self.shard})
+
+        with self._lock:
+            self._lock.wait_for(lambda: len(self._buffer(depth).finished) >= self.shards - 1)
+            buffer = self._levels.pop(depth)
+        runs = buffer.runs
+        if buffer.buffered:
+            runs.append(sort_unique(np.concatenate(buffer.buffered)))
+
+        excluded = [self.load_level(depth - 1)]
+        if depth >= 2:
+            excluded.append(self.load_level(depth - 2))
+        partial_path = self.level_path(depth) + '.partial'
+        merge_sorted_runs(runs, excluded, partial_path, self.block_size)
+        os.replace(partial_path, self.level_path(depth))
+
+        del runs
+        shutil.rmtree(buffer.temp_dir, ignore_errors=True)
+
+
+class DistributedExplorer(DistanceExplorer):
+    """
+    Driver of a sharded search; writes the same level files as DistanceExplorer.
+    """
+
+    def __init__(self, workdir, addresses, block_size=1 << 20):
+        """
+        Args:
+            workdir: directory for the merged level files
+            addresses: (host, port) of every worker, in shard order
+            block_size: records per block when fetching and merging shards
+        """
+        super().__init__(workdir, block_size=block_size)
+        self.addresses = [tuple(address) for address in addresses]
+        self._sockets = []
+
+    def run(self, max_depth, verbose=True):
+        """
+        Explore all states up to max_depth moves from solved.
+
+        Levels every shard has already checkpointed are reused, so an
+        interrupted exploration continues from its last completed level.
+
+        Args:
+            max_depth: deepest level to generate
+            verbose: print one line per completed level
+
+        Returns:
+            list: number of states at each distance 0..max_depth
+        """
+        os.makedirs(self.workdir, exist_ok=True)
+        self.counts = []
+        self._sockets = [socket.create_connection(address) for address in self.addresses]
+        try:
+            self._request_all({'op': 'peers', 'addresses': self.addresses})
+            completed = min(reply['completed'] for reply in self._request_all({'op': 'status'}))
+
+            for depth in range(max_depth + 1):
+                elapsed = 0.0
+                if depth >= completed:
+                    start = time.time()
+                    self._build_level(depth)
+                    elapsed = time.time() - start
+                elif not os.path.exists(self.level_path(depth)):
+                    self._merge_level(depth)
+
+                self.counts.append(len(self.load_level(depth)))
+                if verbose and depth > 0:
+                    print(f"Depth {depth:2d}: {self.counts[-1]:>14,} states ({elapsed:.2f}s, "
+                          f"{len(self.addresses)} shards)")
+                if self.counts[-1] == 0:
+                    break
+        finally:
+            for sock in self._sockets:
+                sock.close()
+            self._sockets = []
+
+        self._write_summary()
+        return self.counts
+
+    def shutdown_workers(self):
+        """Ask every worker to stop serving."""
+        for address in self.addresses:
+            with socket.create_connection(address) as sock:
+                send_message(sock, {'op': 'shutdown'})
+                recv_message(sock)
+
+    def _request_all(self, header):
+        # Every worker works on the request at once; replies are collected in shard order
+        for sock in self._sockets:
+            send_message(sock, header)
+        replies = [recv_message(sock)[0] for sock in self._sockets]
+        for reply in replies:
+            if reply is None or 'error' in reply:
+                raise RuntimeError(reply['error'] if reply else "a worker closed its connection")
+        return replies
+
+    def _build_level(self, depth):
+        self._request_all({'op': 'level', 'depth': depth})
+        self._merge_level(depth)
+
+    def _merge_level(self, depth):
+        temp_dir = os.path.join(self.workdir, f"tmp_depth_{depth:02d}")
+        os.makedirs(temp_dir, exist_ok=True)
+        runs = []
+        for shard, sock in enumerate(self._sockets):
+            path = os.path.join(temp_dir, f"shard_{shard:04d}.bin")
+            send_message(sock, {'op': 'fetch', 'depth': depth})
+            with open(path, 'wb') as f:
+                while True:
+                    header, records = recv_message(sock)
+                    if header is None:
+                        raise RuntimeError(f"shard {shard} closed its connection")
+                    if header['op'] == 'end':
+                        break
+                    records.tofile(f)
+            runs.append(np.memmap(path, dtype=RANK_DTYPE, mode='r') if os.path.getsize(path)
+                        else np.empty(0, dtype=RANK_DTYPE))
+
+        partial_path = self.level_path(depth) + '.partial'
+        merge_sorted_runs(runs, [], partial_path, self.block_size)
+        os.replace(partial_path, self.level_path(depth))
+
+        del runs
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _serve_local_worker(shard, shards, workdir, settings, addresses):
+    worker = ShardWorker(shard, shards, workdir, **settings)
+    addresses.put((shard, worker.start()))
+    worker.serve_forever()
+
+
+def start_local_workers(shards, workdir, **settings):
+    """
+    Start one worker process per shard on this machine.
+
+    Args:
+        shards: number of worker processes
+        workdir: each worker keeps its levels in workdir/shard_XXX
+        settings: chunk_size, memory_limit and block_size for the workers
+
+    Returns:
+        tuple: (processes, addresses in shard order)
+    """
+    context = mp.get_context('spawn')
+    addresses = context.Queue()
+    processes = [
+        context.Process(target=_serve_local_worker, daemon=True,
+                        args=(shard, shards, os.path.join(workdir, f"shard_{shard:03d}"), settings, addresses))
+        for shard in range(shards)
+    ]
+    for process in processes:
+        process.start()
+    bound = dict(addresses.get(timeout=60) for _ in processes)
+    return processes, [bound[shard] for shard in range(shards)]
@@ -0,0 +1,244 @@
+"""
+Peephole optimizer for move sequences.
+
+Every prefix of the input algorithm is a point on a state path. The
+segment between two points i < j of the path, at most `window` tokens
+apart, is one group element; its optimal length is found with a
+bidirectional lookup. It expands search_depth moves forward from the
+segment and meets every state within `depth` moves of solved in a table
+built once from DistanceExplorer's levels: the ranks of those states,
+sorted, and their distances, two .npy files memmapped and binary
+searched. A shortest path over the segments (a DP over the points) then
+chooses the replacement segments, and the words are merged across the
+joins with simplify.
+
+All segments of a batch of algorithms are looked up in a few vectorized
+calls. The defaults (depth 6, one forward move) replace segments of up
+to 7 moves optimally at about half a millisecond per input move; the
+table (8.2M states, 134 MB) takes about a minute to build.
+
+Any string accepted by Cube.execute_algorithm is optimized, and the
+result is always plain face turns. Slices, wide turns and rotations move
+the centers, so every point of the path is first turned back to centers
+at home by a whole-cube rotation. The result then reaches the same cube
+seen in that orientation. For face-turn input this is exactly the same
+state.
+"""
+
+import os
+import shutil
+
+import numpy as np
+
+from environment.cubie import rank_states
+from environment.moves import MOVE_NAMES, MOVE_PERMS, NUM_MOVES, SOLVED_STATE, expand
+from environment.notation import reorient, token_perm, tokenize
+from search import TABLES_DIR
+from search.bfs import DistanceExplorer
+from search.cases import invert, simplify
+
+UNREACHED = 255
+
+
+def path_perms(algorithm):
+    """
+    The points of an algorithm's state path.
+
+    Args:
+        algorithm: move string in any notation execute_algorithm accepts
+
+    Returns:
+        np.ndarray: (tokens + 1, 54) reoriented permutations of every prefix
+    """
+    perm = np.arange(54)
+    points = [perm]
+    for token in tokenize(algorithm):
+        perm = perm[token_perm(token)]
+        points.append(reorient(perm))
+    return np.stack(points)
+
+
+class SolutionOptimizer:
+    """
+    Shortens move sequences by replacing segments with optimal ones.
+    """
+
+    def __init__(self, cache_dir=None, depth=6, search_depth=1, window=12):
+        """
+        Args:
+            cache_dir: directory of the table files, TABLES_DIR when None;
+                built on first use
+            depth: BFS depth of the memmapped table
+            search_depth: forward moves searched from every segment; segments
+                of up to depth + search_depth moves are replaced optimally
+            window: longest segment, in input tokens, that is looked up
+        """
+        cache_dir = TABLES_DIR if cache_dir is None else cache_dir
+        if depth + search_depth < 2:
+            raise ValueError("depth + search_depth must be at least 2 to cover a single slice move")
+        paths = [os.path.join(cache_dir, f"optimizer_depth_{depth:02d}_{name}.npy") for name in ('ranks', 'depths')]
+        if not all(os.path.exists(path) for path in paths):
+            self._build_table(cache_dir, depth, paths)
+        self.ranks, self.depths = (np.load(path, mmap_mode='r') for path in paths)
+        self.depth = depth
+        self.search_depth = search_depth
+        self.window = window
+
+    @staticmethod
+    def _build_table(cache_dir, depth, paths):
+        # Every state within depth, sorted by rank, with its distance alongside
+        workdir = os.path.join(cache_dir, f"optimizer_depth_{depth:02d}_levels")
+        explorer = DistanceExplorer(workdir)
+        explorer.run(depth, verbose=False)
+        levels = [np.asarray(explorer.load_level(level)) for level in range(depth + 1)]
+        ranks = np.concatenate(levels)
+        depths = np.repeat(np.arange(depth + 1, dtype=np.uint8), [len(level) for level in levels])
+        order = np.lexsort((ranks['edge'], ranks['corner']))
+        for path, table in zip(paths, (ranks[order], depths[order])):
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.save(f, table)
+            os.replace(temp_path, path)
+        del levels
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    def table_depths(self, states):
+        """
+        Distances of states from solved when at most `depth`.
+
+        Args:
+            states: (N, 54) sticker states with the centers at home
+
+        Returns:
+            np.ndarray: (N,) uint8 distances, UNREACHED beyond the table
+        """
+        ranks = rank_states(states)
+        found = np.minimum(np.searchsorted(self.ranks, ranks), len(self.ranks) - 1)
+        return np.where(self.ranks[found] == ranks, self.depths[found], UNREACHED).astype(np.uint8)
+
+    def distances(self, states):
+        """
+        Exact distances up to depth + search_depth, meeting the table from the states' side.
+
+        Args:
+            states: (N, 54) sticker states with the centers at home
+
+        Returns:
+            tuple: ((N,) int distances, UNREACHED beyond the search, and (N,)
+            the forward moves of the best meeting point as a list of move lists)
+        """
+        best = self.table_depths(states).astype(np.int64)
+        first = [[] for _ in range(len(states))]
+        # Only states beyond the table are searched forward
+        rows = np.flatnonzero(best == UNREACHED)
+        frontier = states[rows, None, :]
+        for step in range(1, self.search_depth + 1 if len(rows) else 1):
+            frontier = expand(frontier.reshape(-1, 54)).reshape(len(rows), -1, 54)
+            totals = self.table_depths(frontier.reshape(-1, 54)).reshape(len(rows), -1).astype(np.int64) + step
+            candidate = np.argmin(totals, axis=1)
+            lowest = totals[np.arange(len(rows)), candidate]
+            for index in np.flatnonzero(lowest < best[rows]):
+                best[rows[index]] = lowest[index]
+                # Flat child index -> base-18 move digits, first move most significant
+                digits = np.unravel_index(candidate[index], (NUM_MOVES,) * step)
+                first[rows[index]] = [int(move) for move in digits]
+        best[best >= UNREACHED] = UNREACHED
+        return best, first
+
+    def solve_segments(self, states):
+        """
+        Optimal move sequences that solve states within reach of the lookup.
+
+        Args:
+            states: (N, 54) sticker states with the centers at home
+
+        Returns:
+            list: N lists of move indices
+        """
+        distances, solutions = self.distances(states)
+        if (distances == UNREACHED).any():
+            raise ValueError("a state is beyond depth + search_depth")
+        states = states.copy()
+        for row, moves in enumerate(solutions):
+            for move in moves:
+                states[row] = states[row][MOVE_PERMS[move]]
+        # Descend through the table levels, one move per step for every state at once
+        depths = self.table_depths(states).astype(np.intp)
+        for _ in range(int(depths.max(initial=0))):
+            active = np.flatnonzero(depths > 0)
+            children = expand(states[active])
+            child_depths = self.table_depths(children.reshape(-1, 54)).reshape(len(active), NUM_MOVES)
+            moves = np.argmax(child_depths == depths[active, None] - 1, axis=1)
+            states[active] = children[np.arange(len(active)), moves]
+            depths[active] -= 1
+            for row, move in zip(active, moves):
+                solutions[row].append(int(move))
+        return solutions
+
+    def optimize_batch(self, algorithms):
+        """
+        Optimize a batch of algorithms with one lookup for all their segments.
+
+        Args:
+            algorithms: move strings (or lists of move indices)
+
+        Returns:
+            list: optimized move index lists, never longer in face turns than
+            the input's face turns, slices counting two
+        """
+        algorithms = [algorithm if isinstance(algorithm, str) else ' '.join(MOVE_NAMES[move] for move in algorithm)
+                      for algorithm in algorithms]
+        paths = [path_perms(algorithm) for algorithm in algorithms]
+
+        # Every segment of every path: (path, start, end), as the state it takes the solved cube to
+        segments = [(number, start, end) for number, path in enumerate(paths)
+                    for end in range(1, len(path)) for start in range(max(0, end - self.window), end)]
+        numbers, starts, ends = np.array(segments, dtype=np.intp).reshape(-1, 3).T
+        lengths = np.empty(0, dtype=np.int64)
+        if segments:
+            inverses = {number: np.argsort(path, axis=1) for number, path in enumerate(paths)}
+            perms = np.stack([inverses[number][start][paths[number][end]]
+                              for number, start, end in segments])
+            lengths = self.distances(SOLVED_STATE[perms])[0]
+
+        results = []
+        for number, path in enumerate(paths):
+            # Shortest path over the points, preferring the longest segment on ties
+            best = np.full(len(path), np.iinfo(np.int64).max)
+            previous = np.zeros(len(path), dtype=np.intp)
+            best[0] = 0
+            first_row, end_row = np.searchsorted(numbers, [number, number + 1])
+            for row in range(first_row, end_row):
+                start, end, length = starts[row], ends[row], lengths[row]
+                if length != UNREACHED and best[start] + length < best[end]:
+                    best[end] = best[start] + length
+                    previous[end] = start
+            chosen = []
+            end = len(path) - 1
+            while end > 0:
+                chosen.append((previous[end], end))
+                end = previous[end]
+            results.append(chosen[::-1])
+
+        chosen_perms = [np.argsort(paths[number][start])[paths[number][end]]
+                        for number, chosen in enumerate(results) for start, end in chosen]
+        words = iter(self.solve_segments(SOLVED_STATE[np.array(chosen_perms)]) if chosen_perms else [])
+        optimized = []
+        for chosen in results:
+            moves = []
+            for _ in chosen:
+                moves.extend(invert(next(words)))
+            optimized.append(simplify(moves))
+        return optimized
+
+    def optimize(self, algorithm):
+        """
+        Optimize one algorithm.
+
+        Args:
+            algorithm: move string in any notation execute_algorithm accepts
+
+        Returns:
+            str: the optimized face-turn algorithm
+        """
+        return ' '.join(MOVE_NAMES[move] for move in self.optimize_batch([algorithm])[0])
@@ -0,0 +1,225 @@
+import sys
+import os
+import tempfile
+
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, project_root)
+
+import numpy as np
+
+from environment.cube import Cube
+from environment.moves import SOLVED_STATE
+from search.bfs import DistanceExplorer
+from search.cases import F2L_SLOTS, case_index, recognize
+from search.cfop import STAGES, CFOPSolver
+from search.thistlethwaite import PHASES, UNREACHED, ThistlethwaiteSolver
+
+# Known number of positions at each distance in the face-turn metric
+FACE_TURN_DISTRIBUTION = [1, 18, 243, 3240, 43239]
+
+
+def test_distance_distribution():
+    """BFS counts must match the known face-turn distribution."""
+    with tempfile.TemporaryDirectory() as workdir:
+        counts = DistanceExplorer(workdir).run(4, verbose=False)
+        assert counts == FACE_TURN_DISTRIBUTION, f"expected {FACE_TURN_DISTRIBUTION}, got {counts}"
+
+
+def test_external_merge_matches_in_memory():
+    """Spilling runs to disk must produce the same level files as the in-memory path."""
+    with tempfile.TemporaryDirectory() as workdir:
+        in_memory = DistanceExplorer(os.path.join(workdir, 'ram'))
+        external = DistanceExplorer(os.path.join(workdir, 'disk'), chunk_size=500, memory_limit=2000, block_size=700)
+        in_memory.run(4, verbose=False)
+        external.run(4, verbose=False)
+
+        for depth in range(5):
+            assert np.array_equal(in_memory.load_level(depth), external.load_level(depth)), \
+                f"level {depth} differs between in-memory and external merge"
+
+
+def test_distributed_bfs_matches_single_node():
+    """Sharded workers produce the single-node level files and resume from their checkpoints."""
+    from search.distributed import DistributedExplorer, start_local_workers
+
+    with tempfile.TemporaryDirectory() as workdir:
+        single = DistanceExplorer(os.path.join(workdir, 'single'))
+        single.run(4, verbose=False)
+
+        shards = os.path.join(workdir, 'shards')
+        processes, addresses = start_local_workers(3, shards, chunk_size=1000, memory_limit=5000, block_size=3000)
+        try:
+            explorer = DistributedExplorer(os.path.join(workdir, 'merged'), addresses, block_size=2000)
+            assert explorer.run(3, verbose=False) == FACE_TURN_DISTRIBUTION[:4]
+            os.remove(explorer.level_path(2))
+            counts = explorer.run(4, verbose=False)
+        finally:
+            explorer.shutdown_workers()
+            for process in processes:
+                process.join(timeout=10)
+
+        assert counts == FACE_TURN_DISTRIBUTION, counts
+        for depth in range(5):
+            assert np.array_equal(single.load_level(depth), explorer.load_level(depth)), f"level {depth} differs"
+            shard_counts = [os.path.getsize(os.path.join(shards, f"shard_{shard:03d}", f"depth_{depth:02d}.bin"))
+                            for shard in range(3)]
+            assert sum(shard_counts) == os.path.getsize(explorer.level_path(depth))
+        assert all(count > 0 for count in shard_counts), "every shard should own part of the deepest level"
+        for name in ('summary.json',):
+            with open(os.path.join(single.workdir, name)) as a, open(os.path.join(explorer.workdir, name)) as b:
+                assert a.read() == b.read()
+        assert not any(process.is_alive() for process in processes)
+
+
+def test_case_index_covers_every_case():
+    """Every F2L pair position, OLL pattern and PLL permutation has a case that solves it."""
+    index = case_index()
+    # 5 corner spots x 3 twists x 5 edge spots x 2 flips per slot, 216 orientation
+    # patterns and 4! * 4! / 2 permutations of the last layer
+    assert [(index.f2l_table[slot] >= 0).sum() for slot in range(len(F2L_SLOTS))] == [150] * 4
+    assert (index.oll_table >= 0).sum() == 216
+    assert (index.pll_table >= 0).sum() == 288
+
+    for case in index.cases:
+        state = SOLVED_STATE[np.argsort(case.perm)]
+        cube = Cube()
+        cube.state = state.tolist()
+        cube.execute_algorithm(case.algorithm)
+        assert cube.is_solved(), f"{case} does not solve its case"
+
+    cube = Cube()
+    cube.execute_algorithm("R U R' U'")
+    case = recognize(cube)
+    assert case.stage == 'F2L' and case.algorithm == "U R U' R'", case
+    cube = Cube()
+    cube.execute_algorithm("R U2 R' U' R U' R'")
+    assert recognize(cube).name == 'OLL 27'
+    cube = Cube()
+    cube.execute_algorithm("R U R' U' R' F R2 U' R' U' R U R' F' U")
+    assert recognize(cube).name == 'T'
+
+
+def test_cfop_solves_random_cubes():
+    """CFOP solutions solve every cube, stage counts add up and tables are cached."""
+    from environment.generators import random_states
+    from environment.moves import MOVE_PERMS
+
+    states = random_states(500, np.random.default_rng(7))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        solver = CFOPSolver(cache_dir)
+        assert sorted(os.listdir(cache_dir)) == ['cases.npz', 'cross_distances.npy']
+        assert solver.cross_distances.max(initial=0) == 255 and (solver.cross_distances <= 8).sum() == 190080
+
+        solutions, stage_lengths = solver.solve_batch(states)
+        assert stage_lengths.shape == (500, len(STAGES))
+        assert (stage_lengths[:, 0] <= 8).all(), "the cross is solved optimally"
+        for state, moves, lengths in zip(states, solutions, stage_lengths):
+            for move in moves:
+                state = state[MOVE_PERMS[move]]
+            assert np.array_equal(state, SOLVED_STATE)
+            assert len(moves) <= lengths.sum()
+
+        cube = Cube()
+        scramble = cube.scramble()
+        algorithm, counts = CFOPSolver(cache_dir).solve(cube)
+        cube.execute_algorithm(algorithm)
+        assert cube.is_solved(), f"{scramble} / {algorithm}"
+        assert list(counts) == list(STAGES)
+
+
+def test_thistlethwaite_solves_random_cubes():
+    """Every coset is reached within its phase's bound and solutions stay within 45 moves."""
+    from environment.generators import random_states
+    from environment.moves import MOVE_PERMS
+
+    states = random_states(300, np.random.default_rng(11))
+    with tempfile.TemporaryDirectory() as cache_dir:
+        solver = ThistlethwaiteSolver(cache_dir)
+        assert os.listdir(cache_dir) == ['thistlethwaite.npy']
+        reached = [int((table != UNREACHED).sum()) for table in solver.tables]
+        depths = [int(table[table != UNREACHED].max()) for table in solver.tables]
+        assert reached == [2048, 1082565, 29400, 663552], reached
+        assert depths == [7, 10, 13, 15], depths
+
+        solutions, phase_lengths = ThistlethwaiteSolver(cache_dir).solve_batch(states)
+        assert phase_lengths.shape == (300, len(PHASES))
+        for state, moves, lengths in zip(states, solutions, phase_lengths):
+            for move in moves:
+                state = state[MOVE_PERMS[move]]
+            assert np.array_equal(state, SOLVED_STATE)
+            assert len(moves) <= lengths.sum() <= 45
+
+        cube = Cube()
+        scramble = cube.scramble()
+        algorithm, counts = solver.solve(cube)
+        cube.execute_algorithm(algorithm)
+        assert cube.is_solved(), f"{scramble} / {algorithm}"
+        assert list(counts) == list(PHASES)
+
+
+def test_optimizer_shortens_solutions():
+    """Optimized sequences do the same as their input and drop what cancels out."""
+    from environment.moves import MOVE_NAMES
+    from environment.notation import compile_algorithm
+    from search.optimizer import SolutionOptimizer, reorient
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        optimizer = SolutionOptimizer(cache_dir, depth=4, search_depth=1, window=8)
+        assert sorted(os.listdir(cache_dir)) == ['optimizer_depth_04_depths.npy', 'optimizer_depth_04_ranks.npy']
+
+        assert optimizer.optimize("R L R' L'") == ''
+        assert optimizer.optimize("R U R' U' U R U' R'") == ''
+        assert optimizer.optimize("F R R R U U U U") == "F R'"
+        assert optimizer.optimize("U D U' L D' R") == "D L D' R"
+
+        rng = np.random.default_rng(5)
+        algorithms = [' '.join(MOVE_NAMES[move] for move in rng.integers(0, 18, 25)) for _ in range(10)]
+        algorithms += ["M2 U M2 U2 M2 U M2 x y' r U R' U' S E' z2 Lw2"]
+        for algorithm, moves in zip(algorithms, optimizer.optimize_batch(algorithms)):
+            optimized = ' '.join(MOVE_NAMES[move] for move in moves)
+            assert np.array_equal(reorient(compile_algorithm(algorithm)), compile_algorithm(optimized)), algorithm
+            assert len(moves) <= len(algorithm.split()) + algorithm.count('M') + algorithm.count('S')
+
+
+TESTS = [
+    test_distance_distribution,
+    test_external_merge_matches_in_memory,
+    test_distributed_bfs_matches_single_node,
+    test_case_index_covers_every_case,
+    test_cfop_solves_random_cubes,
+    test_thistlethwaite_solves_random_cubes,
+    test_optimizer_shortens_solutions,
+]
+
+
+def run_all_tests():
+    """Run all search tests."""
+    passed_tests = 0
+
+    for test in TESTS:
+        print(f"\n=== {test.__name__} ===")
+        try:
+            test()
+            passed_tests += 1
+            print(f"✓ {test.__name__} passed!")
+        except AssertionError as e:
+            print(f"Test failed: {e}")
+        except Exception as e:
+            print(f"Unexpected error in {test.__name__}: {e}")
+
+    print(f"\n=== Search Test Summary ===")
+    print(f"Passed: {passed_tests}/{len(TESTS)}")
+    if passed_tests == len(TESTS):
+        print("All tests passed!")
+    else:
+        print(f"   {len(TESTS) - passed_tests} tests failed")
+
+
+def main():
+    """Main function for running tests."""
+    run_all_tests()
+
+
+if __name__ == "__main__":
+    main()
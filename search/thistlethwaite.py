@@ -0,0 +1,350 @@
+"""
+Thistlethwaite's four-phase solver over table lookups.
+
+Each phase moves the cube into the next subgroup of the chain
+
+    G0 = <U, D, L, R, F, B>
+    G1 = <U, D, L, R, F2, B2>       edges oriented                      2,048 cosets, <= 7 moves
+    G2 = <U, D, L2, R2, F2, B2>     corners oriented, E edges in E    1,082,565 cosets, <= 10 moves
+    G3 = <U2, D2, L2, R2, F2, B2>   corners in their tetrads with the
+                                    right twist, M edges in M            29,400 cosets, <= 13 moves
+    G4 = {solved}                                                       663,552 states, <= 15 moves
+
+using only the moves of the current group, so solutions have at most 45
+face turns. A phase's position is a pair of cubie coordinates, and a
+coordinate only depends on the coset (it is unchanged by relabeling the
+cubies with elements of the target group), so every phase is a BFS over
+at most 1.3M keys. The corner coordinate of phase 3 is the orbit of the
+corner permutation under relabeling by the 96 corner permutations of G3.
+
+The four distance tables are built once and stored together as one uint8
+.npy file, loaded with mmap_mode='r' so that every solver (and every
+process) shares the same pages. solve_batch descends all states of a
+batch in lockstep, one table lookup per step and phase.
+"""
+
+import functools
+import itertools
+import os
+
+import numpy as np
+
+from environment.cubie import (
+    NUM_CORNERS, NUM_EDGES, facelets_to_cubies, rank_orientations, rank_permutations, unrank_orientations,
+)
+from environment.moves import MOVE_NAMES, MOVE_PERMS, NUM_MOVES, SOLVED_STATE
+from search import TABLES_DIR
+from search.cases import simplify
+
+PHASES = ('edges', 'domino', 'half turns', 'solve')
+UNREACHED = 255
+
+_TABLE_FILE = 'thistlethwaite.npy'
+
+# Move indices allowed in each phase (face * 3 + turn; turn 2 is a half turn)
+_HALF_TURNS = [face * 3 + 2 for face in range(6)]
+PHASE_MOVES = [
+    list(range(NUM_MOVES)),
+    [move for move in range(NUM_MOVES) if move // 3 not in (1, 3) or move % 3 == 2],     # F, B only halved
+    [move for move in range(NUM_MOVES) if move // 3 in (0, 5) or move % 3 == 2],         # U, D quarter turns
+    _HALF_TURNS,
+]
+
+E_EDGES = (8, 9, 10, 11)            # FR, FL, BL, BR
+M_EDGES = (1, 3, 5, 7)              # UF, UB, DF, DB
+S_EDGES = (0, 2, 4, 6)              # UR, UL, DR, DL
+
+
+# What every move does to the solved cube, as cubie arrays
+_MOVE_CP, _MOVE_CO, _MOVE_EP, _MOVE_EO = facelets_to_cubies(SOLVED_STATE[MOVE_PERMS])
+
+
+def apply_cubie_move(cubies, moves):
+    """
+    Apply one move per state to cubie arrays.
+
+    Args:
+        cubies: (cp, co, ep, eo) batch
+        moves: (N,) move indices, or one move for the whole batch
+
+    Returns:
+        tuple: (cp, co, ep, eo) after the moves
+    """
+    cp, co, ep, eo = cubies
+    moves = np.broadcast_to(np.asarray(moves), (len(cp),))
+    corner_from, edge_from = _MOVE_CP[moves].astype(np.intp), _MOVE_EP[moves].astype(np.intp)
+    return (
+        np.take_along_axis(cp, corner_from, axis=1),
+        (np.take_along_axis(co, corner_from, axis=1) + _MOVE_CO[moves]) % 3,
+        np.take_along_axis(ep, edge_from, axis=1),
+        np.take_along_axis(eo, edge_from, axis=1) ^ _MOVE_EO[moves],
+    )
+
+
+def _identity_cubies(count):
+    return (
+        np.tile(np.arange(NUM_CORNERS, dtype=np.uint8), (count, 1)),
+        np.zeros((count, NUM_CORNERS), dtype=np.uint8),
+        np.tile(np.arange(NUM_EDGES, dtype=np.uint8), (count, 1)),
+        np.zeros((count, NUM_EDGES), dtype=np.uint8),
+    )
+
+
+# Positions of four marked edges, as a rank among the C(12, 4) = 495 choices
+_COMBINATIONS = np.array(list(itertools.combinations(range(NUM_EDGES), 4)), dtype=np.uint8)
+_COMBINATION_RANKS = np.full(1 << NUM_EDGES, -1, dtype=np.int64)
+_COMBINATION_RANKS[(1 << _COMBINATIONS.astype(np.int64)).sum(axis=1)] = np.arange(len(_COMBINATIONS))
+
+
+def _edge_set_keys(ep, edges):
+    marked = np.isin(ep, edges)
+    return _COMBINATION_RANKS[marked.astype(np.int64) @ (1 << np.arange(NUM_EDGES))]
+
+
+def _edge_set_states(edges):
+    # Representative edge permutations for every placement of the marked edges
+    others = [edge for edge in range(NUM_EDGES) if edge not in edges]
+    ep = np.empty((len(_COMBINATIONS), NUM_EDGES), dtype=np.uint8)
+    for row, positions in enumerate(_COMBINATIONS):
+        rest = [position for position in range(NUM_EDGES) if position not in positions]
+        ep[row, positions] = edges
+        ep[row, rest] = others
+    return ep
+
+
+def _g3_corner_perms():
+    # The 96 corner permutations reachable with half turns, by closure
+    found = {tuple(range(NUM_CORNERS))}
+    frontier = list(found)
+    while frontier:
+        cp = np.array(frontier, dtype=np.uint8)
+        frontier = []
+        for move in _HALF_TURNS:
+            for perm in map(tuple, cp[:, _MOVE_CP[move]]):
+                if perm not in found:
+                    found.add(perm)
+                    frontier.append(perm)
+    return np.array(sorted(found), dtype=np.uint8)
+
+
+@functools.lru_cache(maxsize=None)
+def _corner_data():
+    """
+    Corner permutation tables of phases 3 and 4.
+
+    Returns:
+        tuple: (all 40,320 permutations, class of each permutation rank under
+        relabeling by G3, one representative rank per class, the 96 G3
+        permutations, index of each permutation rank among them or -1)
+    """
+    perms = np.array(list(itertools.permutations(range(NUM_CORNERS))), dtype=np.uint8)
+    # Relabeling by the half turns generates the G3 orbits; spread the smallest rank until stable
+    neighbours = np.stack([rank_permutations(_MOVE_CP[move][perms]) for move in _HALF_TURNS])
+    labels = np.arange(len(perms))
+    while True:
+        spread = np.minimum(labels, labels[neighbours].min(axis=0))
+        if np.array_equal(spread, labels):
+            break
+        labels = spread
+    representatives, classes = np.unique(labels, return_inverse=True)
+    g3_perms = _g3_corner_perms()
+    g3_index = np.full(len(perms), -1, dtype=np.int64)
+    g3_index[rank_permutations(g3_perms)] = np.arange(len(g3_perms))
+    return perms, classes, representatives, g3_perms, g3_index
+
+
+_SLICES = (M_EDGES, S_EDGES, E_EDGES)
+_S4_PERMS = np.array(list(itertools.permutations(range(4))), dtype=np.uint8)
+_SLICE_WEIGHTS = np.array([24 * 24, 24, 1])
+
+
+def _slice_perm_keys(ep):
+    # Order of the edges inside each slice (all three slices must hold their own edges)
+    key = np.zeros(len(ep), dtype=np.int64)
+    for edges, weight in zip(_SLICES, _SLICE_WEIGHTS):
+        inside = np.searchsorted(np.array(edges), ep[:, list(edges)])
+        key += rank_permutations(inside) * weight
+    return key
+
+
+def _slice_perm_states():
+    ranks = np.arange(24 ** 3)
+    ep = np.empty((len(ranks), NUM_EDGES), dtype=np.uint8)
+    for edges, weight in zip(_SLICES, _SLICE_WEIGHTS):
+        ep[:, list(edges)] = np.array(edges, dtype=np.uint8)[_S4_PERMS[(ranks // weight) % 24]]
+    return ep
+
+
+class Coordinate:
+    """A cubie coordinate: how to compute it and a representative state for every value."""
+
+    def __init__(self, size, encode, states):
+        """
+        Args:
+            size: number of values
+            encode: maps cubies (cp, co, ep, eo) to (N,) values in [0, size)
+            states: cubies with states[v] encoding to v (None where v is unused)
+        """
+        self.size = size
+        self.encode = encode
+        self.states = states
+
+    def move_table(self, moves):
+        """(len(moves), size) values after each move, -1 for unused values."""
+        table = np.full((len(moves), self.size), -1, dtype=np.int64)
+        values = self.encode(self.states)
+        for row, move in enumerate(moves):
+            table[row, values] = self.encode(apply_cubie_move(self.states, move))
+        return table
+
+
+def _coordinates():
+    cp, co, ep, eo = _identity_cubies(2048)
+    flips = Coordinate(2048, lambda cubies: rank_orientations(cubies[3], 2),
+                       (cp, co, ep, unrank_orientations(np.arange(2048), NUM_EDGES, 2)))
+    cp, co, ep, eo = _identity_cubies(2187)
+    twists = Coordinate(2187, lambda cubies: rank_orientations(cubies[1], 3),
+                        (cp, unrank_orientations(np.arange(2187), NUM_CORNERS, 3), ep, eo))
+    cp, co, _, eo = _identity_cubies(len(_COMBINATIONS))
+    e_slice = Coordinate(len(_COMBINATIONS), lambda cubies: _edge_set_keys(cubies[2], E_EDGES),
+                         (cp, co, _edge_set_states(E_EDGES), eo))
+    m_slice = Coordinate(len(_COMBINATIONS), lambda cubies: _edge_set_keys(cubies[2], M_EDGES),
+                         (cp, co, _edge_set_states(M_EDGES), eo))
+    perms, classes, representatives, g3_perms, g3_index = _corner_data()
+    _, co, ep, eo = _identity_cubies(len(representatives))
+    tetrads = Coordinate(len(representatives), lambda cubies: classes[rank_permutations(cubies[0])],
+                         (perms[representatives], co, ep, eo))
+    _, co, ep, eo = _identity_cubies(len(g3_perms))
+    g3_corners = Coordinate(len(g3_perms), lambda cubies: g3_index[rank_permutations(cubies[0])],
+                            (g3_perms, co, ep, eo))
+    cp, co, _, eo = _identity_cubies(24 ** 3)
+    slice_perms = Coordinate(24 ** 3, lambda cubies: _slice_perm_keys(cubies[2]),
+                             (cp, co, _slice_perm_states(), eo))
+    single = Coordinate(1, lambda cubies: np.zeros(len(cubies[0]), dtype=np.int64), _identity_cubies(1))
+    return [(flips, single), (twists, e_slice), (tetrads, m_slice), (g3_corners, slice_perms)]
+
+
+class Phase:
+    """One step of the subgroup chain: its moves, coordinates and move tables."""
+
+    def __init__(self, moves, first, second):
+        self.moves = np.array(moves, dtype=np.intp)
+        self.first, self.second = first, second
+        self.size = first.size * second.size
+        self.first_table = first.move_table(moves)
+        self.second_table = second.move_table(moves)
+
+    def keys(self, cubies):
+        return self.first.encode(cubies) * self.second.size + self.second.encode(cubies)
+
+    def children(self, keys):
+        """(N, len(moves)) keys after each of the phase's moves."""
+        first, second = np.divmod(keys, self.second.size)
+        return self.first_table[:, first].T * self.second.size + self.second_table[:, second].T
+
+    def build_table(self):
+        """Breadth-first move distances from the solved key; UNREACHED elsewhere."""
+        distances = np.full(self.size, UNREACHED, dtype=np.uint8)
+        frontier = self.keys(_identity_cubies(1))
+        distances[frontier] = 0
+        depth = 0
+        while len(frontier):
+            depth += 1
+            children = self.children(frontier).ravel()
+            distances[children[distances[children] == UNREACHED]] = depth
+            frontier = np.flatnonzero(distances == depth)
+        return distances
+
+
+def build_phases():
+    """The four Phase objects of the chain."""
+    return [Phase(moves, first, second) for moves, (first, second) in zip(PHASE_MOVES, _coordinates())]
+
+
+class ThistlethwaiteSolver:
+    """
+    Four-phase subgroup solver.
+
+    Solutions average about 31 face turns and never exceed 45; a batch of
+    a thousand cubes takes about 0.1 s once the tables are loaded.
+    """
+
+    def __init__(self, cache_dir=None):
+        """
+        Args:
+            cache_dir: directory of the distance table file, TABLES_DIR when
+                None; written on first use
+        """
+        cache_dir = TABLES_DIR if cache_dir is None else cache_dir
+        self.phases = build_phases()
+        offsets = np.cumsum([0] + [phase.size for phase in self.phases])
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, _TABLE_FILE)
+        if not os.path.exists(path):
+            tables = np.concatenate([phase.build_table() for phase in self.phases])
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as f:
+                np.save(f, tables)
+            os.replace(temp_path, path)
+        tables = np.load(path, mmap_mode='r')
+        if tables.shape != (offsets[-1],):
+            raise ValueError(f"{path} has {tables.shape[0]} entries, expected {offsets[-1]}; delete it to rebuild")
+        self.tables = [tables[start:end] for start, end in zip(offsets[:-1], offsets[1:])]
+
+    def solve_batch(self, states):
+        """
+        Solve a batch of reachable states.
+
+        Args:
+            states: (N, 54) sticker states
+
+        Returns:
+            tuple: (solutions, phase_lengths) with solutions a list of N lists
+            of move indices and phase_lengths an (N, 4) array of the moves
+            spent on each of PHASES (before merging moves across phases)
+
+        Raises:
+            ValueError: for a state outside the tables (an invalid input)
+            RuntimeError: if a state is not solved at the end
+        """
+        states = np.array(states, dtype=np.uint8)
+        count = len(states)
+        phase_moves = []
+        for phase, table in zip(self.phases, self.tables):
+            keys = phase.keys(facelets_to_cubies(states))
+            distances = table[keys].astype(np.intp)
+            if (distances == UNREACHED).any():
+                raise ValueError("unreachable state; check input with environment.validation first")
+            moves = np.full((count, int(distances.max(initial=0))), -1, dtype=np.intp)
+            for step in range(moves.shape[1]):
+                active = np.flatnonzero(distances > 0)
+                children = phase.children(keys[active])
+                choice = np.argmax(table[children] < distances[active, None], axis=1)
+                move = phase.moves[choice]
+                moves[active, step] = move
+                states[active] = states[active[:, None], MOVE_PERMS[move]]
+                keys[active] = children[np.arange(len(active)), choice]
+                distances[active] -= 1
+            phase_moves.append(moves)
+
+        if not (states == SOLVED_STATE).all():
+            raise RuntimeError("Thistlethwaite phases left a state unsolved")
+        phase_lengths = np.stack([(moves >= 0).sum(axis=1) for moves in phase_moves], axis=1)
+        all_moves = np.concatenate(phase_moves, axis=1)
+        solutions = [simplify([int(move) for move in row if move >= 0]) for row in all_moves]
+        return solutions, phase_lengths
+
+    def solve(self, cube):
+        """
+        Solve a single cube without changing it.
+
+        Args:
+            cube: Cube (or a sticker state)
+
+        Returns:
+            tuple: (algorithm string, dict of phase name -> move count)
+        """
+        state = np.asarray(getattr(cube, 'state', cube), dtype=np.uint8)
+        solutions, phase_lengths = self.solve_batch(state[None, :])
+        algorithm = ' '.join(MOVE_NAMES[move] for move in solutions[0])
+        return algorithm, dict(zip(PHASES, phase_lengths[0].tolist()))
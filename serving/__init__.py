@@ -0,0 +1 @@
+"""Serving package: a local batching server for solutions and network scores."""
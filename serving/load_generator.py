@@ -0,0 +1,181 @@
+"""
+Client and load generator for the batching server.
+
+CubeClient keeps any number of requests in flight on one connection and
+matches responses to requests by id. run_load opens several clients,
+keeps `concurrency` requests open in total and reports throughput and
+client-side latency percentiles. Run with:
+
+    python -m serving.load_generator --port 8765 --requests 5000 --concurrency 256
+    python -m serving.load_generator --socket /tmp/cube.sock --op score
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+
+if __name__ == "__main__":
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from environment.generators import random_states
+
+
+class CubeClient:
+    """One connection to a CubeServer with pipelined requests."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count()
+        self._pending = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, address):
+        """
+        Args:
+            address: Unix socket path or (host, port) tuple
+        """
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+        return cls(reader, writer)
+
+    async def request(self, op, state=None, facelets=None):
+        """
+        Send one request and wait for its response.
+
+        Args:
+            op: 'solve', 'score' or 'metrics'
+            state: optional 54 colors (list or array)
+            facelets: optional facelet string instead of state
+
+        Returns:
+            dict: the response without its id
+        """
+        request_id = next(self._ids)
+        message = {'id': request_id, 'op': op}
+        if state is not None:
+            message['state'] = np.asarray(state).tolist()
+        if facelets is not None:
+            message['facelets'] = facelets
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.writer.write(json.dumps(message).encode() + b'\n')
+        await self.writer.drain()
+        response = await future
+        response.pop('id', None)
+        return response
+
+    async def close(self):
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+        self._receiver.cancel()
+
+    async def _receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._pending.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("server closed the connection"))
+
+
+async def run_load(address, requests=1000, concurrency=64, connections=4, op='solve', seed=0):
+    """
+    Send uniformly random states to a server and measure it.
+
+    Args:
+        address: Unix socket path or (host, port) tuple
+        requests: total number of requests
+        concurrency: requests kept open at once over all connections
+        connections: number of client connections
+        op: 'solve' or 'score'
+        seed: seed of the random states
+
+    Returns:
+        dict: requests, errors, seconds, requests_per_s, p50/p90/p99/max
+        latency in milliseconds and the server's own metrics afterwards
+    """
+    states = random_states(requests, np.random.default_rng(seed))
+    clients = [await CubeClient.connect(address) for _ in range(connections)]
+    latencies = np.zeros(requests)
+    errors = 0
+    next_request = itertools.count()
+
+    async def worker(client):
+        nonlocal errors
+        while True:
+            index = next(next_request)
+            if index >= requests:
+                return
+            started = time.perf_counter()
+            response = await client.request(op, states[index])
+            latencies[index] = time.perf_counter() - started
+            errors += 'error' in response
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(clients[slot % connections]) for slot in range(concurrency)))
+    seconds = time.perf_counter() - started
+    server_metrics = (await clients[0].request('metrics'))['metrics']
+    for client in clients:
+        await client.close()
+
+    p50, p90, p99 = np.percentile(latencies * 1000, [50, 90, 99])
+    return {
+        'requests': requests,
+        'errors': errors,
+        'seconds': seconds,
+        'requests_per_s': requests / seconds,
+        'p50_ms': p50,
+        'p90_ms': p90,
+        'p99_ms': p99,
+        'max_ms': latencies.max() * 1000,
+        'server': server_metrics,
+    }
+
+
+def print_load_report(report, op='solve'):
+    print(f"{report['requests']:,} requests in {report['seconds']:.2f}s "
+          f"({report['requests_per_s']:,.0f}/s), {report['errors']} errors")
+    print(f"latency ms: p50 {report['p50_ms']:.2f}  p90 {report['p90_ms']:.2f}  "
+          f"p99 {report['p99_ms']:.2f}  max {report['max_ms']:.2f}")
+    server = report['server'][op]
+    print(f"server: {server['batches']:,} batches, mean batch {server['mean_batch']}, "
+          f"max queue depth {server['max_queue_depth']}, p99 {server['p99_ms']} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for main.py serve")
+    parser.add_argument('--socket', default=None, help='Unix socket path (TCP when omitted)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--op', choices=['solve', 'score'], default='solve')
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--connections', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    address = args.socket if args.socket else (args.host, args.port)
+    report = asyncio.run(run_load(address, args.requests, args.concurrency, args.connections, args.op, args.seed))
+    print_load_report(report, args.op)
+
+
+if __name__ == "__main__":
+    main()
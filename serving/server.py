@@ -0,0 +1,365 @@
+"""
+Asynchronous solve / score server with dynamic request batching.
+
+Clients talk newline-delimited JSON over a Unix or TCP socket, any number
+of requests in flight per connection; responses carry the request id and
+are written as soon as they are ready, so they may come back out of order.
+
+    {"id": 1, "op": "solve", "state": [54 colors]}     -> {"id": 1, "solution": "R U ...", "length": 57}
+    {"id": 2, "op": "score", "facelets": "UUU..."}     -> {"id": 2, "value": 3.2, "q_values": [18 floats]}
+    {"id": 3, "op": "metrics"}                         -> {"id": 3, "metrics": {...}}
+    anything invalid                                   -> {"id": ..., "error": "..."}
+
+Each op has a Batcher: requests wait in a bounded queue, and a worker
+takes the first one, keeps collecting for at most `window` seconds (or
+until max_batch) and runs the whole batch in one vectorized call on a
+worker thread (CFOPSolver.solve_batch for solve, QNetwork.forward for
+score) while the next batch is already being collected. When a queue is
+full, the connection handler waits on it and stops reading its socket,
+which pushes the backpressure back to the client; max_inflight bounds
+the open requests of a single connection the same way. A request line
+longer than MAX_LINE_BYTES is answered with an error and closes its
+connection.
+"""
+
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import time
+
+import numpy as np
+
+from environment.serialization import from_facelet_strings, moves_to_algorithm
+from environment.validation import BAD_COLOR, REASONS, VALID, validate_states
+
+DEFAULT_WINDOW = 0.002              # seconds a batch keeps collecting after its first request
+DEFAULT_MAX_BATCH = 1024
+DEFAULT_QUEUE_SIZE = 4096           # waiting requests per op before clients are held back
+DEFAULT_MAX_INFLIGHT = 256          # open requests per connection
+MAX_LINE_BYTES = 1 << 16            # longest request line; a longer one closes the connection
+LATENCY_WINDOW = 10000              # latencies kept per op for the percentiles
+
+OPS = ('solve', 'score')
+
+
+class ServerMetrics:
+    """Counters, batch sizes and latency percentiles of a running server."""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.started = time.perf_counter()
+        self.requests = collections.Counter()
+        self.errors = 0
+        self.batches = collections.Counter()
+        self.batched = collections.Counter()
+        self.max_queue_depth = collections.Counter()
+        self.backpressure_waits = 0
+        self.latencies = {op: collections.deque(maxlen=window) for op in OPS}
+
+    def record_batch(self, op, size, queue_depth):
+        self.batches[op] += 1
+        self.batched[op] += size
+        self.max_queue_depth[op] = max(self.max_queue_depth[op], queue_depth + size)
+
+    def record_latency(self, op, seconds):
+        self.requests[op] += 1
+        self.latencies[op].append(seconds)
+
+    def snapshot(self, queue_depths=None):
+        """
+        Current metrics as a JSON-ready dict.
+
+        Args:
+            queue_depths: optional dict op -> requests waiting right now
+
+        Returns:
+            dict: uptime, requests per second, errors, backpressure waits and
+            for every op its count, batches, mean batch size, queue depth
+            (current and maximum) and p50/p90/p99 latency in milliseconds
+        """
+        uptime = time.perf_counter() - self.started
+        snapshot = {
+            'uptime_s': round(uptime, 3),
+            'requests_per_s': round(sum(self.requests.values()) / max(uptime, 1e-9), 1),
+            'errors': self.errors,
+            'backpressure_waits': self.backpressure_waits,
+        }
+        for op in OPS:
+            latencies = np.array(self.latencies[op]) * 1000
+            percentiles = np.percentile(latencies, [50, 90, 99]) if len(latencies) else [0.0] * 3
+            snapshot[op] = {
+                'requests': self.requests[op],
+                'batches': self.batches[op],
+                'mean_batch': round(self.batched[op] / max(self.batches[op], 1), 2),
+                'queue_depth': (queue_depths or {}).get(op, 0),
+                'max_queue_depth': self.max_queue_depth[op],
+                'p50_ms': round(float(percentiles[0]), 3),
+                'p90_ms': round(float(percentiles[1]), 3),
+                'p99_ms': round(float(percentiles[2]), 3),
+            }
+        return snapshot
+
+
+class Batcher:
+    """Collects concurrent requests of one op into batches for a vectorized function."""
+
+    def __init__(self, op, function, metrics, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Args:
+            op: op name, for the metrics
+            function: maps an (N, 54) uint8 batch to a list of N response dicts;
+                runs on a dedicated worker thread
+            metrics: ServerMetrics to report to
+            window: seconds to keep collecting after the first request of a batch
+            max_batch: largest batch
+            queue_size: waiting requests before submit blocks
+        """
+        self.op = op
+        self.function = function
+        self.metrics = metrics
+        self.window = window
+        self.max_batch = max_batch
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"{op}-batch")
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def submit(self, state):
+        """Queue one (54,) state, waiting while the queue is full, and return its response."""
+        if self.queue.full():
+            self.metrics.backpressure_waits += 1
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((state, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        batch = [await self.queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.window
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            self.metrics.record_batch(self.op, len(batch), self.queue.qsize())
+            states = np.stack([state for state, _, _ in batch])
+            try:
+                responses = await loop.run_in_executor(self._executor, self.function, states)
+            except Exception as e:
+                responses = [{'error': f"{type(e).__name__}: {e}"}] * len(batch)
+            finished = time.perf_counter()
+            for (_, future, started), response in zip(batch, responses):
+                self.metrics.record_latency(self.op, finished - started)
+                if not future.done():
+                    future.set_result(response)
+
+
+def solve_function(solver):
+    """Batch function answering solve requests with a CFOPSolver."""
+    def solve(states):
+        codes = validate_states(states)
+        responses = [{'error': REASONS[code][1]} for code in codes]
+        valid = np.flatnonzero(codes == VALID)
+        if len(valid):
+            solutions, _ = solver.solve_batch(states[valid])
+            for row, moves in zip(valid, solutions):
+                responses[row] = {'solution': moves_to_algorithm(moves), 'length': len(moves)}
+        return responses
+    return solve
+
+
+def score_function(network):
+    """Batch function answering score requests with a Q-network."""
+    def score(states):
+        q_values = network.forward(states)
+        return [{'value': float(row.max()), 'q_values': row.tolist()} for row in q_values]
+    return score
+
+
+def parse_state(message):
+    """
+    The (54,) uint8 state of a request, from "state" or "facelets".
+
+    Raises:
+        ValueError: when neither is present or the state is malformed
+    """
+    if 'facelets' in message:
+        return from_facelet_strings([message['facelets']])[0]
+    state = message.get('state')
+    if not isinstance(state, list) or len(state) != 54 or not all(isinstance(color, int) for color in state):
+        raise ValueError("a request needs a 'state' of 54 integers or a 'facelets' string")
+    if not all(0 <= color < 6 for color in state):
+        raise ValueError(REASONS[BAD_COLOR][1])
+    return np.array(state, dtype=np.uint8)
+
+
+class CubeServer:
+    """Batching server for solve and score requests."""
+
+    def __init__(self, solver=None, network=None, window=DEFAULT_WINDOW, max_batch=DEFAULT_MAX_BATCH,
+                 queue_size=DEFAULT_QUEUE_SIZE, max_inflight=DEFAULT_MAX_INFLIGHT):
+        """
+        Args:
+            solver: CFOPSolver for solve requests (None disables them)
+            network: QNetwork for score requests (None disables them)
+            window, max_batch, queue_size: Batcher settings shared by both ops
+            max_inflight: open requests per connection before it stops being read
+        """
+        self.metrics = ServerMetrics()
+        self.functions = {}
+        if solver is not None:
+            self.functions['solve'] = solve_function(solver)
+        if network is not None:
+            self.functions['score'] = score_function(network)
+        self.batch_settings = dict(window=window, max_batch=max_batch, queue_size=queue_size)
+        self.max_inflight = max_inflight
+        self.batchers = {}
+        self.address = None
+        self._server = None
+
+    async def start(self, path=None, host='127.0.0.1', port=0):
+        """
+        Start listening on a Unix socket (path) or on TCP (host, port).
+
+        Returns:
+            the bound address: the socket path or a (host, port) tuple
+        """
+        self.batchers = {op: Batcher(op, function, self.metrics, **self.batch_settings)
+                         for op, function in self.functions.items()}
+        for batcher in self.batchers.values():
+            batcher.start()
+        if path is not None:
+            if os.path.exists(path):
+                os.unlink(path)
+            self._server = await asyncio.start_unix_server(self._handle, path=path, limit=MAX_LINE_BYTES)
+            self.address = path
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port, limit=MAX_LINE_BYTES)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        return self.address
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        for batcher in self.batchers.values():
+            await batcher.close()
+        if isinstance(self.address, str) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def snapshot(self):
+        return self.metrics.snapshot({op: batcher.queue.qsize() for op, batcher in self.batchers.items()})
+
+    async def _respond(self, message):
+        op = message.get('op')
+        if op == 'metrics':
+            return {'metrics': self.snapshot()}
+        if op not in self.batchers:
+            available = ', '.join(['metrics', *self.batchers])
+            raise ValueError(f"unknown or disabled op {op!r}; this server answers {available}")
+        return await self.batchers[op].submit(parse_state(message))
+
+    async def _handle(self, reader, writer):
+        inflight = asyncio.Semaphore(self.max_inflight)
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            message = None
+            try:
+                message = json.loads(line)
+                if not isinstance(message, dict):
+                    raise ValueError("a request must be a JSON object")
+                response = await self._respond(message)
+            except (ValueError, TypeError) as e:
+                response = {'error': str(e)}
+            except Exception as e:
+                response = {'error': f"{type(e).__name__}: {e}"}
+            finally:
+                inflight.release()
+            if 'error' in response:
+                self.metrics.errors += 1
+            request_id = message.get('id') if isinstance(message, dict) else None
+            async with write_lock:
+                writer.write(json.dumps({'id': request_id, **response}).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The rest of the line cannot be told apart from the next request
+                    self.metrics.errors += 1
+                    async with write_lock:
+                        error = {'id': None, 'error': f"request line longer than {MAX_LINE_BYTES} bytes"}
+                        writer.write(json.dumps(error).encode() + b'\n')
+                        await writer.drain()
+                    break
+                if not line:
+                    break
+                await inflight.acquire()
+                task = asyncio.ensure_future(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(server, path=None, host='127.0.0.1', port=8765, metrics_interval=10.0):
+    """
+    Run a CubeServer until cancelled, printing its metrics periodically.
+
+    Args:
+        server: CubeServer
+        path: Unix socket path; TCP on host:port when None
+        metrics_interval: seconds between metric lines (0 disables them)
+    """
+    address = await server.start(path=path, host=host, port=port)
+    print(f"Serving {', '.join(server.batchers)} on {address}")
+
+    async def report():
+        while True:
+            await asyncio.sleep(metrics_interval)
+            print(json.dumps(server.snapshot()))
+
+    reporter = asyncio.ensure_future(report()) if metrics_interval > 0 else None
+    try:
+        await server.serve_forever()
+    finally:
+        if reporter is not None:
+            reporter.cancel()
+        await server.close()
@@ -0,0 +1,158 @@
+import sys
+import os
+import tempfile
+
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, project_root)
+
+import asyncio
+import json
+
+import numpy as np
+
+from agent.network import QNetwork
+from environment.generators import random_states
+from environment.moves import SOLVED_STATE
+from environment.notation import compile_algorithm
+from search.cfop import CFOPSolver
+from serving.load_generator import CubeClient, run_load
+from serving.server import CubeServer
+
+
+def test_batched_solve_and_score_over_tcp():
+    """Concurrent requests are batched, answered correctly and matched to their ids."""
+    network = QNetwork((32,), seed=0)
+    states = random_states(8, np.random.default_rng(1))
+
+    async def scenario(solver):
+        server = CubeServer(solver, network, window=0.005)
+        address = await server.start(port=0)
+        try:
+            report = await run_load(address, requests=300, concurrency=64, connections=4, op='solve')
+            assert report['errors'] == 0, f"{report['errors']} solve requests failed"
+            assert report['server']['solve']['mean_batch'] > 1, "concurrent requests were not batched"
+
+            client = await CubeClient.connect(address)
+            responses = await asyncio.gather(
+                *(client.request('solve', state) for state in states),
+                *(client.request('score', state) for state in states),
+            )
+            broken = SOLVED_STATE.copy()
+            broken[[0, 9]] = broken[[9, 0]]
+            errors = await asyncio.gather(
+                client.request('solve', broken),
+                client.request('score', [9] * 54),
+                client.request('shuffle', states[0]),
+                client.request('solve'),
+            )
+            metrics = (await client.request('metrics'))['metrics']
+            await client.close()
+            return responses, errors, metrics
+        finally:
+            await server.close()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        responses, errors, metrics = asyncio.run(scenario(CFOPSolver(cache_dir)))
+
+    solves, scores = responses[:len(states)], responses[len(states):]
+    for state, response in zip(states, solves):
+        assert np.array_equal(state[compile_algorithm(response['solution'])], SOLVED_STATE)
+        assert response['length'] == len(response['solution'].split())
+    expected = network.forward(states)
+    for row, response in zip(expected, scores):
+        assert np.allclose(response['q_values'], row, atol=1e-5) and np.isclose(response['value'], row.max())
+
+    assert all('error' in response for response in errors), errors
+    assert 'corner' in errors[0]['error'] or 'edge' in errors[0]['error'], errors[0]
+    assert metrics['solve']['requests'] >= 300 + len(states) and metrics['score']['requests'] == len(states)
+    assert metrics['errors'] >= 4 and metrics['solve']['p99_ms'] >= metrics['solve']['p50_ms'] > 0
+
+
+def test_backpressure_over_unix_socket():
+    """A tiny queue holds clients back without losing or failing requests."""
+    network = QNetwork((32,), seed=0)
+
+    async def scenario(path):
+        server = CubeServer(network=network, window=0.001, max_batch=4, queue_size=4)
+        await server.start(path=path)
+        try:
+            report = await run_load(path, requests=400, concurrency=64, connections=2, op='score')
+        finally:
+            await server.close()
+        return report
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'cube.sock')
+        report = asyncio.run(scenario(path))
+        assert not os.path.exists(path), "the socket file should be removed on close"
+
+    server = report['server']
+    assert report['errors'] == 0 and server['score']['requests'] == 400
+    assert server['backpressure_waits'] > 0, "a full queue should have held clients back"
+    assert server['score']['max_queue_depth'] <= 4 + 4 and server['score']['mean_batch'] <= 4
+
+
+def test_malformed_lines_are_answered():
+    """Unexpected parse failures and over-long lines still get an error response."""
+    from serving.server import MAX_LINE_BYTES
+
+    async def scenario():
+        server = CubeServer(network=QNetwork((32,), seed=0))
+        host, port = await server.start(port=0)
+        try:
+            reader, writer = await asyncio.open_connection(host, port)
+            # Nesting deep enough for json to raise RecursionError
+            writer.write(b'[' * 50000 + b'\n')
+            writer.write(b'{"id": 1, "op": "score", "pad": "' + b'x' * MAX_LINE_BYTES + b'"}\n')
+            await writer.drain()
+            lines = [await reader.readline(), await reader.readline()]
+            rest = await reader.read()
+            writer.close()
+        finally:
+            await server.close()
+        return [json.loads(line) for line in lines], rest
+
+    responses, rest = asyncio.run(scenario())
+    errors = sorted(response['error'] for response in responses)
+    assert errors[0].startswith('RecursionError') and 'longer than' in errors[1], errors
+    assert rest == b'', "the connection should be closed after an over-long line"
+
+
+TESTS = [
+    test_batched_solve_and_score_over_tcp,
+    test_backpressure_over_unix_socket,
+    test_malformed_lines_are_answered,
+]
+
+
+def run_all_tests():
+    """Run all serving tests."""
+    passed_tests = 0
+
+    for test in TESTS:
+        print(f"\n=== {test.__name__} ===")
+        try:
+            test()
+            passed_tests += 1
+            print(f"✓ {test.__name__} passed!")
+        except AssertionError as e:
+            print(f"Test failed: {e}")
+        except Exception as e:
+            print(f"Unexpected error in {test.__name__}: {e}")
+
+    print(f"\n=== Serving Test Summary ===")
+    print(f"Passed: {passed_tests}/{len(TESTS)}")
+    if passed_tests == len(TESTS):
+        print("All tests passed!")
+    else:
+        print(f"   {len(TESTS) - passed_tests} tests failed")
+
+
+def main():
+    """Main function for running tests."""
+    run_all_tests()
+
+
+if __name__ == "__main__":
+    main()
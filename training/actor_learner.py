@@ -0,0 +1,456 @@
+"""
+Multi-process actor/learner training.
+
+N actor processes step vectorized cube environments with a local copy of
+the Q-network and push transitions into a shared-memory replay buffer.
+One learner process samples from the buffer, updates the network and
+broadcasts its weights through shared memory every few updates. The
+coordinating process only starts the workers and reports throughput.
+
+With the curriculum enabled the learner also runs greedy evaluation
+rollouts, updates a CurriculumScheduler and shares its scramble-depth
+mixture with the actors, whose environments draw episode depths from it.
+
+When checkpointing is enabled the learner periodically asks every actor
+for its state, holds them at a consistent point while it copies the
+replay buffer, and hands everything to a CheckpointManager whose writes
+happen in a background thread.
+"""
+
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from agent.dqn import DQNLearner, epsilon_greedy
+from agent.network import QNetwork
+from environment.generators import scramble_states
+from .checkpoint import CheckpointManager, read_checkpoint
+from .curriculum import CurriculumScheduler, stratified_depths
+from .evaluation import greedy_rollouts
+from .replay_buffer import SharedReplayBuffer
+from .vector_env import VectorCubeEnv
+
+
+class TrainingConfig:
+    def __init__(self):
+        self.num_actors = 2
+        self.envs_per_actor = 64
+        self.scramble_depth = 6
+        self.max_episode_steps = 20
+        self.epsilon = 0.1
+
+        self.hidden_sizes = (256, 256)
+        self.learning_rate = 1e-3
+        self.gamma = 0.9
+        self.target_update_interval = 500
+        self.batch_size = 256
+        self.replay_capacity = 200000
+        self.min_replay_size = 2000
+        self.max_updates = 10000
+
+        self.weight_broadcast_interval = 50   # learner updates between weight publications
+        self.weight_sync_interval = 10        # actor steps between checks for new weights
+        self.report_interval = 5.0            # seconds between throughput reports
+
+        self.use_curriculum = True            # otherwise every episode uses scramble_depth
+        self.curriculum_max_depth = 20
+        self.curriculum_threshold = 0.8       # frontier solve rate needed to go one move deeper
+        self.curriculum_eval_interval = 200   # learner updates between evaluation rounds
+        self.curriculum_eval_episodes = 512
+
+        self.checkpoint_dir = None            # disabled when None
+        self.checkpoint_interval = 1000       # learner updates between checkpoints
+        self.checkpoints_to_keep = 3
+
+        self.seed = 0
+        self.start_method = 'spawn'
+
+
+class SharedWeights:
+    """Flat float32 parameter vector in shared memory with a version counter."""
+
+    def __init__(self, size, lock, version, name=None):
+        self.size = size
+        self.lock = lock
+        self.version = version
+        self.owner = name is None
+        if self.owner:
+            self._segment = shared_memory.SharedMemory(create=True, size=size * 4)
+        else:
+            self._segment = shared_memory.SharedMemory(name=name)
+        self.array = np.ndarray((size,), dtype=np.float32, buffer=self._segment.buf)
+
+    def handle(self):
+        return {'size': self.size, 'name': self._segment.name}
+
+    @classmethod
+    def attach(cls, handle, lock, version):
+        return cls(handle['size'], lock, version, name=handle['name'])
+
+    def publish(self, flat):
+        with self.lock:
+            self.array[:] = flat
+            self.version.value += 1
+
+    def pull(self, network, known_version):
+        """
+        Copy the weights into network if a newer version was published.
+
+        Returns:
+            int: the version now held by network
+        """
+        if self.version.value == known_version:
+            return known_version
+        with self.lock:
+            network.set_flat_parameters(self.array)
+            return self.version.value
+
+    def close(self):
+        self.array = None
+        self._segment.close()
+
+    def unlink(self):
+        self.close()
+        if self.owner:
+            self._segment.unlink()
+
+
+class ThroughputMeter:
+    """Turns monotonically increasing counters into per-second rates."""
+
+    def __init__(self):
+        self.last_time = time.perf_counter()
+        self.last_values = {}
+
+    def rates(self, **counters):
+        now = time.perf_counter()
+        elapsed = max(now - self.last_time, 1e-9)
+        rates = {name: (value - self.last_values.get(name, 0)) / elapsed for name, value in counters.items()}
+        self.last_time = now
+        self.last_values = dict(counters)
+        return rates
+
+
+class SharedDepthSampler:
+    """Depth sampler reading the curriculum mixture published by the learner."""
+
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+
+    def __call__(self, count, rng):
+        with self.probabilities.get_lock():
+            probabilities = np.array(self.probabilities[:])
+        return stratified_depths(probabilities, count, rng)
+
+
+def publish_curriculum(curriculum, probabilities):
+    with probabilities.get_lock():
+        probabilities[:] = curriculum.depth_probabilities().tolist()
+
+
+def make_environment(config, actor_id, depth_sampler=None):
+    """Build the vectorized environment stepped by one actor."""
+    return VectorCubeEnv(config.envs_per_actor, config.scramble_depth, config.max_episode_steps,
+                         seed=config.seed + 1000 + actor_id, depth_sampler=depth_sampler)
+
+
+def make_curriculum(config):
+    return CurriculumScheduler(config.curriculum_max_depth, promote_threshold=config.curriculum_threshold)
+
+
+def make_learner(config):
+    return DQNLearner(config.hidden_sizes, config.learning_rate, config.gamma,
+                      config.target_update_interval, seed=config.seed)
+
+
+class CheckpointSync:
+    """
+    Shared flags used by the learner to gather a consistent snapshot.
+
+    The learner bumps requested; each actor answers on states_queue at its
+    next step and then waits until released reaches the same generation.
+    """
+
+    def __init__(self, ctx):
+        self.requested = ctx.Value('q', 0)
+        self.released = ctx.Value('q', 0)
+        self.states_queue = ctx.Queue()
+
+
+def actor_main(actor_id, config, buffer_handle, buffer_lock, weights_handle, weights_lock,
+               weights_version, env_steps, depth_probabilities, stop_event, sync, resume_state=None):
+    """Actor process: step environments with the latest synced policy."""
+    buffer = SharedReplayBuffer.attach(buffer_handle, buffer_lock)
+    weights = SharedWeights.attach(weights_handle, weights_lock, weights_version)
+    network = QNetwork(config.hidden_sizes)
+    sampler = SharedDepthSampler(depth_probabilities) if config.use_curriculum else None
+    env = make_environment(config, actor_id, sampler)
+    rng = np.random.default_rng(config.seed + actor_id)
+
+    if resume_state is None:
+        env.reset()
+        step = 0
+    else:
+        meta, arrays = resume_state
+        env.load_state_dict(meta['env'], arrays)
+        rng.bit_generator.state = meta['rng']
+        step = meta['step']
+
+    version = weights.pull(network, -1)
+    generation = sync.requested.value
+
+    try:
+        while not stop_event.is_set():
+            if sync.requested.value != generation:
+                generation = sync.requested.value
+                env_meta, env_arrays = env.state_dict()
+                meta = {'env': env_meta, 'rng': rng.bit_generator.state, 'step': step}
+                sync.states_queue.put((generation, actor_id, meta, env_arrays))
+                while sync.released.value < generation and not stop_event.is_set():
+                    time.sleep(0.001)
+                # The learner republishes its weights before releasing, so every
+                # actor continues from the weights stored in the checkpoint
+                version = weights.pull(network, version)
+
+            if step % config.weight_sync_interval == 0:
+                version = weights.pull(network, version)
+
+            actions = epsilon_greedy(network, env.states, config.epsilon, rng)
+            states = env.states
+            next_states, rewards, dones = env.step(actions)
+            buffer.push(states, actions, rewards, next_states, dones)
+
+            step += 1
+            with env_steps.get_lock():
+                env_steps.value += env.num_envs
+    finally:
+        buffer.close()
+        weights.close()
+
+
+def _with_prefix(arrays, prefix):
+    """Select the arrays stored under prefix and strip it from their names."""
+    return {name[len(prefix):]: array for name, array in arrays.items() if name.startswith(prefix)}
+
+
+def _gather_checkpoint(config, learner, rng, curriculum, buffer, weights, env_steps, sync, stop_event):
+    """Collect a consistent snapshot of the whole run, or None if stopped meanwhile."""
+    with sync.requested.get_lock():
+        sync.requested.value += 1
+        generation = sync.requested.value
+
+    actor_states = {}
+    while len(actor_states) < config.num_actors:
+        if stop_event.is_set():
+            return None
+        try:
+            answer_generation, actor_id, meta, arrays = sync.states_queue.get(timeout=0.1)
+        except queue.Empty:
+            continue
+        if answer_generation == generation:
+            actor_states[actor_id] = (meta, arrays)
+
+    # Every actor is now paused, so the buffer and counters are consistent
+    learner_meta, learner_arrays = learner.state_dict()
+    arrays = {f"learner_{name}": array for name, array in learner_arrays.items()}
+    arrays.update({f"replay_{field}": array for field, array in buffer.snapshot().items()})
+    meta = {
+        'learner': learner_meta,
+        'learner_rng': rng.bit_generator.state,
+        'env_steps': env_steps.value,
+        'curriculum': curriculum.state_dict() if curriculum is not None else None,
+        'actors': {},
+    }
+    for actor_id, (actor_meta, actor_arrays) in actor_states.items():
+        meta['actors'][str(actor_id)] = actor_meta
+        arrays.update({f"actor{actor_id}_{name}": array for name, array in actor_arrays.items()})
+
+    weights.publish(learner.network.get_flat_parameters())
+    sync.released.value = generation
+    return meta, arrays
+
+
+def learner_main(config, buffer_handle, buffer_lock, weights_handle, weights_lock, weights_version,
+                 env_steps, updates_counter, depth_probabilities, stop_event, sync, resume_path=None):
+    """Learner process: sample batches, update the network, broadcast weights."""
+    buffer = SharedReplayBuffer.attach(buffer_handle, buffer_lock)
+    weights = SharedWeights.attach(weights_handle, weights_lock, weights_version)
+    learner = make_learner(config)
+    rng = np.random.default_rng(config.seed)
+    checkpoints = CheckpointManager(config.checkpoint_dir, config.checkpoints_to_keep) if config.checkpoint_dir else None
+
+    curriculum = make_curriculum(config) if config.use_curriculum else None
+
+    if resume_path is not None:
+        meta, arrays = read_checkpoint(resume_path)
+        learner.load_state_dict(meta['learner'], _with_prefix(arrays, 'learner_'))
+        rng.bit_generator.state = meta['learner_rng']
+        if curriculum is not None and meta.get('curriculum') is not None:
+            curriculum.load_state_dict(meta['curriculum'])
+
+    if curriculum is not None:
+        publish_curriculum(curriculum, depth_probabilities)
+
+    try:
+        while len(buffer) < config.min_replay_size and not stop_event.is_set():
+            time.sleep(0.01)
+
+        while learner.updates < config.max_updates and not stop_event.is_set():
+            learner.update(*buffer.sample(config.batch_size, rng))
+            updates_counter.value = learner.updates
+
+            if learner.updates % config.weight_broadcast_interval == 0:
+                weights.publish(learner.network.get_flat_parameters())
+
+            if curriculum is not None and learner.updates % config.curriculum_eval_interval == 0:
+                depths = curriculum.evaluation_depths(config.curriculum_eval_episodes, rng)
+                states = scramble_states(len(depths), depths, rng)
+                solved, _ = greedy_rollouts(learner.network, states, config.max_episode_steps)
+                if curriculum.record(depths, solved):
+                    publish_curriculum(curriculum, depth_probabilities)
+
+            if checkpoints is not None and learner.updates % config.checkpoint_interval == 0:
+                snapshot = _gather_checkpoint(config, learner, rng, curriculum, buffer, weights, env_steps,
+                                              sync, stop_event)
+                if snapshot is not None:
+                    checkpoints.save(learner.updates, *snapshot)
+
+        weights.publish(learner.network.get_flat_parameters())
+    finally:
+        stop_event.set()
+        if checkpoints is not None:
+            checkpoints.close()
+        buffer.close()
+        weights.close()
+
+
+class ActorLearnerTrainer:
+    """Starts the actor and learner processes and reports throughput."""
+
+    def __init__(self, config=None):
+        self.config = config or TrainingConfig()
+        self.network = QNetwork(self.config.hidden_sizes, seed=self.config.seed)
+        self.stats = {}
+
+    def run(self, duration=None, verbose=True, resume=False):
+        """
+        Train until the learner reaches config.max_updates or duration seconds pass.
+
+        Args:
+            duration: optional wall-clock limit in seconds
+            verbose: print periodic throughput reports
+            resume: continue from the newest checkpoint in config.checkpoint_dir
+
+        Returns:
+            dict: totals and average rates of env steps and learner updates
+        """
+        config = self.config
+        ctx = mp.get_context(config.start_method)
+
+        buffer = SharedReplayBuffer(config.replay_capacity, ctx.Lock())
+        weights = SharedWeights(self.network.num_parameters(), ctx.Lock(), ctx.Value('q', 0))
+        weights.publish(self.network.get_flat_parameters())
+
+        env_steps = ctx.Value('q', 0)
+        updates = ctx.Value('q', 0, lock=False)
+        stop_event = ctx.Event()
+        sync = CheckpointSync(ctx)
+        depth_probabilities = ctx.Array('d', config.curriculum_max_depth + 1)
+        if config.use_curriculum:
+            publish_curriculum(make_curriculum(config), depth_probabilities)
+
+        resume_path = self._latest_checkpoint() if resume else None
+        actor_states = [None] * config.num_actors
+        if resume_path is not None:
+            actor_states = self._restore(resume_path, buffer, weights, env_steps, updates, depth_probabilities)
+            if verbose:
+                print(f"Resuming from {resume_path} at update {updates.value:,}")
+        elif resume and verbose:
+            print("No checkpoint found, starting a new run")
+
+        common = (buffer.handle(), buffer.lock, weights.handle(), weights.lock, weights.version)
+        actors = [
+            ctx.Process(target=actor_main,
+                        args=(actor_id, config) + common + (env_steps, depth_probabilities, stop_event, sync,
+                                                            actor_states[actor_id]),
+                        daemon=True)
+            for actor_id in range(config.num_actors)
+        ]
+        learner = ctx.Process(target=learner_main,
+                              args=(config,) + common + (env_steps, updates, depth_probabilities, stop_event, sync,
+                                                         resume_path),
+                              daemon=True)
+
+        start = time.perf_counter()
+        start_env_steps, start_updates = env_steps.value, updates.value
+        meter = ThroughputMeter()
+        meter.rates(env_steps=start_env_steps, updates=start_updates)
+        try:
+            for process in actors + [learner]:
+                process.start()
+
+            while not stop_event.is_set():
+                stop_event.wait(config.report_interval)
+                if verbose:
+                    rates = meter.rates(env_steps=env_steps.value, updates=updates.value)
+                    print(f"env-steps/sec: {rates['env_steps']:>10,.0f} | "
+                          f"learner-updates/sec: {rates['updates']:>8,.1f} | "
+                          f"updates: {updates.value:>7,} | replay: {len(buffer):>8,}"
+                          + (f" | depth frontier: {self._frontier(depth_probabilities)}" if config.use_curriculum else ""))
+                if duration is not None and time.perf_counter() - start >= duration:
+                    stop_event.set()
+        finally:
+            stop_event.set()
+            for process in actors + [learner]:
+                process.join(timeout=30)
+                if process.is_alive():
+                    process.terminate()
+
+            elapsed = time.perf_counter() - start
+            self.network.set_flat_parameters(weights.array)
+            self.stats = {
+                'env_steps': env_steps.value,
+                'updates': updates.value,
+                'elapsed': elapsed,
+                'env_steps_per_sec': (env_steps.value - start_env_steps) / elapsed,
+                'updates_per_sec': (updates.value - start_updates) / elapsed,
+            }
+            buffer.unlink()
+            weights.unlink()
+
+        return self.stats
+
+    @staticmethod
+    def _frontier(depth_probabilities):
+        with depth_probabilities.get_lock():
+            return int(np.flatnonzero(np.array(depth_probabilities[:]))[-1])
+
+    def _latest_checkpoint(self):
+        if not self.config.checkpoint_dir:
+            return None
+        return CheckpointManager(self.config.checkpoint_dir).latest_path()
+
+    def _restore(self, path, buffer, weights, env_steps, updates, depth_probabilities):
+        """Load a checkpoint into the shared state and return the per-actor states."""
+        meta, arrays = read_checkpoint(path)
+        if len(meta['actors']) != self.config.num_actors:
+            raise ValueError(f"Checkpoint has {len(meta['actors'])} actors, config has {self.config.num_actors}")
+
+        buffer.restore(_with_prefix(arrays, 'replay_'))
+        self.network.set_flat_parameters(arrays['learner_network'])
+        weights.publish(self.network.get_flat_parameters())
+        env_steps.value = meta['env_steps']
+        updates.value = meta['learner']['updates']
+        if self.config.use_curriculum and meta.get('curriculum') is not None:
+            curriculum = make_curriculum(self.config)
+            curriculum.load_state_dict(meta['curriculum'])
+            publish_curriculum(curriculum, depth_probabilities)
+
+        actor_states = []
+        for actor_id in range(self.config.num_actors):
+            actor_arrays = {name: np.array(array) for name, array in _with_prefix(arrays, f"actor{actor_id}_").items()}
+            actor_states.append((meta['actors'][str(actor_id)], actor_arrays))
+        return actor_states
@@ -0,0 +1,195 @@
+"""
+Atomic, asynchronous checkpoints of training runs.
+
+A checkpoint is a directory holding one .npy file per array (network
+weights, optimizer moments, replay buffer fields, environment states) and
+a meta.json with scalars and RNG states. It is written under a temporary
+name and renamed into place once complete, so a run preempted mid-write
+never leaves a half-written checkpoint behind. Writing happens in a
+background thread; the caller only pays for copying the arrays.
+
+Arrays are reloaded with np.load(mmap_mode='r'), so restoring a large
+replay buffer does not read it into memory twice.
+"""
+
+import json
+import os
+import queue
+import shutil
+import threading
+
+import numpy as np
+
+LATEST_FILE = 'latest'
+
+
+def _fsync_directory(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_checkpoint(path, meta, arrays):
+    """
+    Write a checkpoint directory atomically.
+
+    Args:
+        path: final checkpoint directory (must not exist yet)
+        meta: JSON-serializable metadata
+        arrays: dict of name -> np.ndarray
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    temp_path = os.path.join(parent, f".tmp-{os.path.basename(path)}-{os.getpid()}")
+    shutil.rmtree(temp_path, ignore_errors=True)
+    os.makedirs(temp_path)
+
+    for name, array in arrays.items():
+        if array.size == 0:
+            np.save(os.path.join(temp_path, f"{name}.npy"), array)
+            continue
+        target = np.lib.format.open_memmap(os.path.join(temp_path, f"{name}.npy"), mode='w+',
+                                           dtype=array.dtype, shape=array.shape)
+        target[...] = array
+        target.flush()
+        del target
+
+    meta_path = os.path.join(temp_path, 'meta.json')
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+        f.flush()
+        os.fsync(f.fileno())
+
+    _fsync_directory(temp_path)
+    os.replace(temp_path, path)
+    _fsync_directory(parent)
+
+
+def read_checkpoint(path):
+    """
+    Load a checkpoint directory.
+
+    Returns:
+        tuple: (meta dict, dict of name -> read-only memmapped array)
+    """
+    with open(os.path.join(path, 'meta.json')) as f:
+        meta = json.load(f)
+
+    arrays = {}
+    for filename in os.listdir(path):
+        if filename.endswith('.npy'):
+            arrays[filename[:-4]] = np.load(os.path.join(path, filename), mmap_mode='r')
+    return meta, arrays
+
+
+class CheckpointManager:
+    """Writes numbered checkpoints from a background thread and keeps the newest few."""
+
+    def __init__(self, directory, keep=3):
+        """
+        Args:
+            directory: directory holding the step_XXXXXXXXXX checkpoints, created
+                by the first save
+            keep: number of most recent checkpoints to keep
+        """
+        self.directory = directory
+        self.keep = keep
+        self._queue = queue.Queue()
+        self._error = None
+        self._thread = None
+
+    def checkpoint_path(self, step):
+        return os.path.join(self.directory, f"step_{step:010d}")
+
+    def save(self, step, meta, arrays):
+        """
+        Schedule a checkpoint. The arrays are copied before returning, so the
+        caller may keep mutating them.
+
+        Args:
+            step: training step used to name the checkpoint
+            meta: JSON-serializable metadata
+            arrays: dict of name -> np.ndarray
+        """
+        self._raise_pending_error()
+        snapshot = {name: np.array(array, copy=True) for name, array in arrays.items()}
+
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._writer_loop, daemon=True)
+            self._thread.start()
+        self._queue.put((step, meta, snapshot))
+
+    def wait(self):
+        """Block until every scheduled checkpoint is on disk."""
+        self._queue.join()
+        self._raise_pending_error()
+
+    def close(self):
+        self.wait()
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self._thread = None
+
+    def latest_path(self):
+        """Return the newest complete checkpoint directory, or None."""
+        try:
+            with open(os.path.join(self.directory, LATEST_FILE)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        path = os.path.join(self.directory, name)
+        return path if os.path.isdir(path) else None
+
+    def load_latest(self):
+        """
+        Load the newest checkpoint.
+
+        Returns:
+            tuple: (meta, arrays) or None when there is no checkpoint
+        """
+        path = self.latest_path()
+        return read_checkpoint(path) if path else None
+
+    def _writer_loop(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                step, meta, arrays = item
+                self._write(step, meta, arrays)
+            except Exception as e:
+                self._error = e
+            finally:
+                self._queue.task_done()
+
+    def _write(self, step, meta, arrays):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.checkpoint_path(step)
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        write_checkpoint(path, meta, arrays)
+
+        latest_temp = os.path.join(self.directory, f".{LATEST_FILE}.tmp")
+        with open(latest_temp, 'w') as f:
+            f.write(os.path.basename(path))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(latest_temp, os.path.join(self.directory, LATEST_FILE))
+
+        checkpoints = sorted(name for name in os.listdir(self.directory) if name.startswith('step_'))
+        for name in checkpoints[:-self.keep]:
+            shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+    def _raise_pending_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError(f"Checkpoint write failed: {error}") from error
+
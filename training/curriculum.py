@@ -0,0 +1,154 @@
+"""
+Adaptive scramble-depth curriculum.
+
+Instead of always scrambling with a fixed number of moves, training states
+are drawn from a mixture of depths. The scheduler keeps per-depth solve
+rates measured by greedy evaluation rollouts, raises its frontier depth
+once the agent solves the frontier reliably, and spends the rest of the
+batch on shallower depths in proportion to how often they still fail.
+"""
+
+import numpy as np
+
+from environment.generators import scramble_states
+
+
+def stratified_depths(probabilities, count, rng):
+    """
+    Draw depths whose counts match the probabilities as closely as possible.
+
+    Each depth gets floor(p * count) samples; the remaining slots are drawn
+    in proportion to the fractional parts. The result is shuffled.
+
+    Args:
+        probabilities: (D,) array, probabilities[d] for depth d
+        count: number of depths to draw
+        rng: numpy Generator
+
+    Returns:
+        np.ndarray: (count,) depths
+    """
+    probabilities = np.asarray(probabilities, dtype=np.float64)
+    probabilities = probabilities / probabilities.sum()
+    expected = probabilities * count
+    counts = np.floor(expected).astype(np.int64)
+
+    remainder = count - int(counts.sum())
+    if remainder > 0:
+        fractions = expected - counts
+        extra = rng.choice(len(probabilities), size=remainder, replace=False, p=fractions / fractions.sum())
+        counts[extra] += 1
+
+    depths = np.repeat(np.arange(len(probabilities)), counts)
+    rng.shuffle(depths)
+    return depths
+
+
+class CurriculumScheduler:
+    """Tracks per-depth solve rates and turns them into a scramble-depth mixture."""
+
+    def __init__(self, max_depth=20, start_depth=1, promote_threshold=0.8, frontier_weight=0.5,
+                 min_weight=0.05, min_episodes=100, decay=0.9):
+        """
+        Args:
+            max_depth: deepest scramble the curriculum will reach
+            start_depth: initial frontier depth
+            promote_threshold: frontier solve rate needed to raise the frontier
+            frontier_weight: share of each batch spent on the frontier depth
+            min_weight: relative weight kept on mastered shallower depths
+            min_episodes: (decayed) evaluation episodes at the frontier before promoting
+            decay: factor applied to older evaluation counts when new ones arrive
+        """
+        self.max_depth = max_depth
+        self.frontier = start_depth
+        self.promote_threshold = promote_threshold
+        self.frontier_weight = frontier_weight
+        self.min_weight = min_weight
+        self.min_episodes = min_episodes
+        self.decay = decay
+
+        self.attempts = np.zeros(max_depth + 1, dtype=np.float64)
+        self.solves = np.zeros(max_depth + 1, dtype=np.float64)
+
+    def solve_rates(self):
+        """Return the smoothed solve rate per depth (NaN where never evaluated)."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.attempts > 0, self.solves / self.attempts, np.nan)
+
+    def record(self, depths, solved):
+        """
+        Record the outcome of evaluation rollouts and update the frontier.
+
+        Args:
+            depths: (N,) scramble depth of each rollout
+            solved: (N,) bool, whether the rollout solved its cube
+
+        Returns:
+            bool: True if the frontier depth changed
+        """
+        depths = np.asarray(depths, dtype=np.intp)
+        evaluated = np.bincount(depths, minlength=self.max_depth + 1) > 0
+        self.attempts[evaluated] *= self.decay
+        self.solves[evaluated] *= self.decay
+        np.add.at(self.attempts, depths, 1.0)
+        np.add.at(self.solves, depths, np.asarray(solved, dtype=np.float64))
+
+        if (self.frontier < self.max_depth
+                and self.attempts[self.frontier] >= self.min_episodes
+                and self.solves[self.frontier] / self.attempts[self.frontier] >= self.promote_threshold):
+            self.frontier += 1
+            return True
+        return False
+
+    def depth_probabilities(self):
+        """
+        Return the current scramble-depth mixture.
+
+        Returns:
+            np.ndarray: (max_depth + 1,) probabilities, zero at depth 0
+        """
+        probabilities = np.zeros(self.max_depth + 1, dtype=np.float64)
+        probabilities[self.frontier] = self.frontier_weight
+
+        if self.frontier > 1:
+            rates = self.solve_rates()[1:self.frontier]
+            failure = np.where(np.isnan(rates), 1.0, 1.0 - rates)
+            weights = np.maximum(failure, self.min_weight)
+            probabilities[1:self.frontier] = (1.0 - self.frontier_weight) * weights / weights.sum()
+        else:
+            probabilities[self.frontier] = 1.0
+
+        return probabilities
+
+    def evaluation_depths(self, count, rng):
+        """Depths for an evaluation round: every depth up to the frontier, equally."""
+        probabilities = np.zeros(self.max_depth + 1, dtype=np.float64)
+        probabilities[1:self.frontier + 1] = 1.0
+        return stratified_depths(probabilities, count, rng)
+
+    def sample_depths(self, count, rng):
+        """Draw a depth-stratified set of scramble depths from the current mixture."""
+        return stratified_depths(self.depth_probabilities(), count, rng)
+
+    def generate_batch(self, count, rng):
+        """
+        Generate a depth-stratified batch of scrambled states.
+
+        Returns:
+            tuple: ((count, 54) uint8 states, (count,) depths)
+        """
+        depths = self.sample_depths(count, rng)
+        return scramble_states(count, depths, rng), depths
+
+    def state_dict(self):
+        """JSON-serializable curriculum position."""
+        return {
+            'frontier': self.frontier,
+            'attempts': self.attempts.tolist(),
+            'solves': self.solves.tolist(),
+        }
+
+    def load_state_dict(self, state):
+        self.frontier = state['frontier']
+        self.attempts = np.array(state['attempts'], dtype=np.float64)
+        self.solves = np.array(state['solves'], dtype=np.float64)
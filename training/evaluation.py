@@ -0,0 +1,203 @@
+"""
+Batched policy evaluation.
+
+Greedy rollouts and beam search advance every test cube in lockstep, with
+one network call per step for the whole batch. Test sets are generated
+from a fixed seed and saved to disk so results stay comparable across
+runs and agents.
+"""
+
+import os
+import time
+
+import numpy as np
+
+from environment.generators import scramble_states
+from environment.moves import MOVE_PERMS, SOLVED_STATE, INVERSE_MOVES, NUM_MOVES, expand
+
+
+def greedy_rollouts(network, states, max_steps, return_evaluations=False):
+    """
+    Follow the greedy policy from every state in lockstep.
+
+    All unsolved cubes advance together, with one network call per step.
+
+    Args:
+        network: Q-network with a forward(states) method
+        states: (N, 54) start states
+        max_steps: move limit per cube
+        return_evaluations: also return the number of states scored by the network
+
+    Returns:
+        tuple: ((N,) bool solved, (N,) int solution lengths, -1 when unsolved)
+    """
+    states = np.array(states, dtype=np.uint8)
+    lengths = np.full(len(states), -1, dtype=np.int64)
+    already_solved = (states == SOLVED_STATE).all(axis=1)
+    lengths[already_solved] = 0
+    active = np.flatnonzero(~already_solved)
+    evaluations = 0
+
+    for step in range(1, max_steps + 1):
+        if len(active) == 0:
+            break
+        actions = np.argmax(network.forward(states[active]), axis=1)
+        evaluations += len(active)
+        states[active] = states[active[:, None], MOVE_PERMS[actions]]
+
+        solved = (states[active] == SOLVED_STATE).all(axis=1)
+        lengths[active[solved]] = step
+        active = active[~solved]
+
+    if return_evaluations:
+        return lengths >= 0, lengths, evaluations
+    return lengths >= 0, lengths
+
+
+def beam_search(network, states, beam_width, max_steps, return_evaluations=False):
+    """
+    Beam search guided by Q-values, for every state in lockstep.
+
+    Each step scores all beams of all unsolved cubes with one network call,
+    checks every child for the solved state and keeps the beam_width children
+    with the highest Q(s, a). Children undoing the move that led to their
+    parent are skipped.
+
+    Args:
+        network: Q-network with a forward(states) method
+        states: (N, 54) start states
+        beam_width: number of states kept per cube
+        max_steps: move limit per cube
+        return_evaluations: also return the number of states scored by the network
+
+    Returns:
+        tuple: ((N,) bool solved, (N,) int solution lengths, -1 when unsolved)
+    """
+    states = np.asarray(states, dtype=np.uint8)
+    count = len(states)
+    lengths = np.full(count, -1, dtype=np.int64)
+    already_solved = (states == SOLVED_STATE).all(axis=1)
+    lengths[already_solved] = 0
+
+    beams = np.repeat(states[:, None, :], beam_width, axis=1)
+    valid = np.zeros((count, beam_width), dtype=bool)
+    valid[:, 0] = True
+    last_moves = np.full((count, beam_width), -1, dtype=np.intp)
+    active = np.flatnonzero(~already_solved)
+    evaluations = 0
+
+    for step in range(1, max_steps + 1):
+        if len(active) == 0:
+            break
+        active_beams = beams[active]
+        active_valid = valid[active]
+
+        scores = np.full((len(active), beam_width, NUM_MOVES), -np.inf, dtype=np.float64)
+        scores[active_valid] = network.forward(active_beams[active_valid])
+        evaluations += int(active_valid.sum())
+
+        has_parent_move = last_moves[active] >= 0
+        rows, slots = np.nonzero(has_parent_move)
+        scores[rows, slots, INVERSE_MOVES[last_moves[active][rows, slots]]] = -np.inf
+
+        children = expand(active_beams)
+        child_solved = (children == SOLVED_STATE).all(axis=3) & active_valid[:, :, None]
+        solved = child_solved.any(axis=(1, 2))
+        lengths[active[solved]] = step
+
+        flat_scores = scores.reshape(len(active), -1)
+        best = np.argsort(-flat_scores, axis=1, kind='stable')[:, :beam_width]
+        parent, move = np.divmod(best, NUM_MOVES)
+        rows = np.arange(len(active))[:, None]
+
+        beams[active] = children[rows, parent, move]
+        valid[active] = np.isfinite(flat_scores[rows, best])
+        last_moves[active] = move
+
+        active = active[~solved]
+
+    if return_evaluations:
+        return lengths >= 0, lengths, evaluations
+    return lengths >= 0, lengths
+
+
+def create_test_set(path, depths=range(1, 21), per_depth=1000, seed=0):
+    """
+    Generate a seeded scramble test set and save it as .npz.
+
+    Args:
+        path: destination file
+        depths: scramble depths to include
+        per_depth: cubes per depth
+        seed: RNG seed
+
+    Returns:
+        dict: {'states', 'depths', 'seed'}
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    depths = np.repeat(np.asarray(list(depths), dtype=np.intp), per_depth)
+    states = scramble_states(len(depths), depths, np.random.default_rng(seed))
+    np.savez_compressed(path, states=states, depths=depths, seed=seed)
+    return {'states': states, 'depths': depths, 'seed': seed}
+
+
+def load_test_set(path, depths=range(1, 21), per_depth=1000, seed=0):
+    """Load a test set, creating it with the given parameters if the file does not exist."""
+    if not os.path.exists(path):
+        return create_test_set(path, depths, per_depth, seed)
+    with np.load(path) as data:
+        return {'states': data['states'], 'depths': data['depths'], 'seed': int(data['seed'])}
+
+
+def evaluate(network, test_set, beam_width=1, max_steps=30):
+    """
+    Evaluate a network on a test set.
+
+    Args:
+        network: Q-network with a forward(states) method
+        test_set: dict with 'states' and 'depths'
+        beam_width: 1 for greedy rollouts, K for beam search of width K
+        max_steps: move limit per cube
+
+    Returns:
+        dict: per-depth rows plus overall wall-clock time and states/sec
+    """
+    start = time.perf_counter()
+    if beam_width == 1:
+        solved, lengths, evaluations = greedy_rollouts(network, test_set['states'], max_steps,
+                                                       return_evaluations=True)
+    else:
+        solved, lengths, evaluations = beam_search(network, test_set['states'], beam_width, max_steps,
+                                                   return_evaluations=True)
+    elapsed = time.perf_counter() - start
+
+    rows = []
+    for depth in np.unique(test_set['depths']):
+        mask = test_set['depths'] == depth
+        solved_lengths = lengths[mask & solved]
+        rows.append({
+            'depth': int(depth),
+            'cubes': int(mask.sum()),
+            'solve_rate': float(solved[mask].mean()),
+            'mean_length': float(solved_lengths.mean()) if len(solved_lengths) else float('nan'),
+        })
+
+    return {
+        'method': 'greedy' if beam_width == 1 else f"beam (K={beam_width})",
+        'rows': rows,
+        'solve_rate': float(solved.mean()),
+        'elapsed': elapsed,
+        'states_evaluated': evaluations,
+        'states_per_sec': evaluations / elapsed if elapsed > 0 else float('inf'),
+    }
+
+
+def print_report(report):
+    """Print the solve-rate-by-depth table of an evaluate() report."""
+    print(f"Method: {report['method']}")
+    print(f"{'Depth':>5} | {'Cubes':>6} | {'Solved':>7} | {'Mean length':>11}")
+    print("-" * 40)
+    for row in report['rows']:
+        print(f"{row['depth']:>5} | {row['cubes']:>6} | {row['solve_rate']:>7.1%} | {row['mean_length']:>11.2f}")
+    print(f"Overall solve rate: {report['solve_rate']:.1%}")
+    print(f"Wall-clock: {report['elapsed']:.2f}s, {report['states_per_sec']:,.0f} states/sec")
@@ -0,0 +1,122 @@
+"""
+Transition ring buffer stored in shared memory so that actor processes can
+push and the learner process can sample without pickling arrays.
+"""
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+TRANSITION_FIELDS = {
+    'states': ((54,), np.uint8),
+    'actions': ((), np.uint8),
+    'rewards': ((), np.float32),
+    'next_states': ((54,), np.uint8),
+    'dones': ((), np.bool_),
+}
+
+
+class SharedReplayBuffer:
+    """
+    Fixed-capacity FIFO of transitions backed by multiprocessing.shared_memory.
+
+    The creating process owns the segments and must call unlink() when done;
+    other processes rebuild the buffer from handle() with attach().
+    """
+
+    def __init__(self, capacity, lock, names=None):
+        """
+        Args:
+            capacity: maximum number of stored transitions
+            lock: multiprocessing lock shared by every process using the buffer
+            names: shared memory segment names, used when attaching
+        """
+        self.capacity = capacity
+        self.lock = lock
+        self.owner = names is None
+        self._segments = {}
+        self.arrays = {}
+
+        fields = dict(TRANSITION_FIELDS)
+        fields['cursor'] = ((2,), np.int64)
+
+        for field, (shape, dtype) in fields.items():
+            full_shape = shape if field == 'cursor' else (capacity,) + shape
+            size = max(1, int(np.prod(full_shape)) * np.dtype(dtype).itemsize)
+            if self.owner:
+                segment = shared_memory.SharedMemory(create=True, size=size)
+            else:
+                segment = shared_memory.SharedMemory(name=names[field])
+            self._segments[field] = segment
+            self.arrays[field] = np.ndarray(full_shape, dtype=dtype, buffer=segment.buf)
+
+        if self.owner:
+            self.arrays['cursor'][:] = 0
+
+    @classmethod
+    def attach(cls, handle, lock):
+        """Open a buffer created in another process from its handle()."""
+        return cls(handle['capacity'], lock, names=handle['names'])
+
+    def handle(self):
+        """Picklable description used by attach()."""
+        return {
+            'capacity': self.capacity,
+            'names': {field: segment.name for field, segment in self._segments.items()},
+        }
+
+    def __len__(self):
+        return int(self.arrays['cursor'][1])
+
+    def push(self, states, actions, rewards, next_states, dones):
+        """Append a batch of transitions, overwriting the oldest ones when full."""
+        count = len(actions)
+        with self.lock:
+            head, size = self.arrays['cursor']
+            indices = (head + np.arange(count)) % self.capacity
+            self.arrays['states'][indices] = states
+            self.arrays['actions'][indices] = actions
+            self.arrays['rewards'][indices] = rewards
+            self.arrays['next_states'][indices] = next_states
+            self.arrays['dones'][indices] = dones
+            self.arrays['cursor'][0] = (head + count) % self.capacity
+            self.arrays['cursor'][1] = min(size + count, self.capacity)
+
+    def sample(self, batch_size, rng):
+        """
+        Sample transitions uniformly with replacement.
+
+        Returns:
+            tuple: (states, actions, rewards, next_states, dones) copies
+        """
+        with self.lock:
+            indices = rng.integers(0, len(self), size=batch_size)
+            return tuple(self.arrays[field][indices] for field in TRANSITION_FIELDS)
+
+    def snapshot(self):
+        """
+        Copy the buffer contents, including the ring cursor.
+
+        Returns:
+            dict: field name -> array copy
+        """
+        with self.lock:
+            return {field: array.copy() for field, array in self.arrays.items()}
+
+    def restore(self, arrays):
+        """Load contents produced by snapshot (for example from memmapped checkpoint files)."""
+        with self.lock:
+            for field, array in self.arrays.items():
+                array[...] = arrays[field]
+
+    def close(self):
+        self.arrays = {}
+        for segment in self._segments.values():
+            segment.close()
+
+    def unlink(self):
+        """Release the shared memory segments (owner only)."""
+        self.close()
+        if self.owner:
+            for segment in self._segments.values():
+                segment.unlink()
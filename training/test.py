@@ -0,0 +1,284 @@
+import sys
+import os
+
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, project_root)
+
+import multiprocessing as mp
+import tempfile
+
+import numpy as np
+
+from agent.dqn import DQNLearner
+from environment.moves import MOVE_PERMS, SOLVED_STATE, INVERSE_MOVES
+from training.actor_learner import ActorLearnerTrainer, TrainingConfig
+from training.checkpoint import CheckpointManager
+from training.curriculum import CurriculumScheduler, stratified_depths
+from training.evaluation import greedy_rollouts, beam_search, load_test_set, evaluate
+from training.replay_buffer import SharedReplayBuffer
+from training.vector_env import VectorCubeEnv
+
+
+def test_replay_buffer_wrap_around():
+    """Pushing past capacity must overwrite the oldest transitions and cap len."""
+    buffer = SharedReplayBuffer(10, mp.Lock())
+    try:
+        for start in (0, 7):
+            count = 7
+            states = np.full((count, 54), 0, dtype=np.uint8)
+            actions = np.arange(start, start + count, dtype=np.uint8)
+            buffer.push(states, actions, actions.astype(np.float32), states, np.zeros(count, dtype=bool))
+
+        assert len(buffer) == 10, f"expected len 10, got {len(buffer)}"
+        stored = sorted(buffer.arrays['actions'].tolist())
+        assert stored == list(range(4, 14)), f"oldest transitions were not overwritten: {stored}"
+
+        _, actions, rewards, _, _ = buffer.sample(100, np.random.default_rng(0))
+        assert ((actions >= 4) & (actions < 14)).all(), "sampled an overwritten transition"
+        assert (rewards == actions).all(), "sampled fields are not aligned"
+    finally:
+        buffer.unlink()
+
+
+def test_vector_env_auto_reset():
+    """step() must return the pre-reset next states and mark only solved ones as done."""
+    env = VectorCubeEnv(4, scramble_depth=1, max_steps=1, seed=0)
+    env.reset()
+    env.states[0] = SOLVED_STATE[MOVE_PERMS[0]]
+    env.states[1:] = SOLVED_STATE[MOVE_PERMS[3]]
+
+    actions = np.array([INVERSE_MOVES[0], 0, 0, 0])
+    next_states, rewards, dones = env.step(actions)
+
+    assert (next_states[0] == SOLVED_STATE).all(), "next_states[0] should be the solved state before reset"
+    assert (next_states[1] == SOLVED_STATE[MOVE_PERMS[3]][MOVE_PERMS[0]]).all(), "next_states[1] is wrong"
+    assert dones.tolist() == [True, False, False, False], f"dones should only mark solved cubes: {dones}"
+    assert rewards[0] == env.solved_reward and (rewards[1:] == env.step_reward).all(), "wrong rewards"
+    # max_steps=1 resets every environment, each to a one-move scramble
+    assert (env.states != SOLVED_STATE).any(axis=1).all(), "environments were not reset to scrambles"
+    assert (env.steps == 0).all(), "step counters were not reset"
+
+
+def test_actor_learner_smoke():
+    """A short multi-process run must make progress on both counters."""
+    config = TrainingConfig()
+    config.num_actors = 2
+    config.envs_per_actor = 16
+    config.hidden_sizes = (32,)
+    config.batch_size = 32
+    config.min_replay_size = 200
+    config.max_updates = 20
+    config.report_interval = 0.5
+
+    trainer = ActorLearnerTrainer(config)
+    stats = trainer.run(duration=60, verbose=False)
+
+    assert stats['env_steps'] > 0 and stats['env_steps_per_sec'] > 0, f"no env steps recorded: {stats}"
+    assert stats['updates'] > 0 and stats['updates_per_sec'] > 0, f"no learner updates recorded: {stats}"
+
+
+def _random_batch(rng, size=32):
+    from environment.generators import scramble_states
+
+    states = scramble_states(size, 3, rng)
+    return (states, rng.integers(0, 18, size=size), rng.random(size).astype(np.float32),
+            scramble_states(size, 2, rng), rng.random(size) < 0.2)
+
+
+def test_checkpoint_manager():
+    """Checkpoints must be renamed into place, pruned, and reload the same arrays."""
+    with tempfile.TemporaryDirectory() as root:
+        directory = os.path.join(root, 'run')
+        assert CheckpointManager(directory).load_latest() is None, "found a checkpoint in an empty path"
+        assert not os.path.exists(directory), "looking for a checkpoint created the directory"
+
+        manager = CheckpointManager(directory, keep=2)
+        for step in (1, 2, 3):
+            manager.save(step, {'step': step}, {'values': np.arange(step, step + 5)})
+        manager.wait()
+
+        names = sorted(os.listdir(directory))
+        assert names == ['latest', 'step_0000000002', 'step_0000000003'], f"unexpected files: {names}"
+        meta, arrays = manager.load_latest()
+        assert meta == {'step': 3}, f"wrong metadata {meta}"
+        assert isinstance(arrays['values'], np.memmap), "arrays should be memory-mapped"
+        assert arrays['values'].tolist() == [3, 4, 5, 6, 7], "array contents changed"
+        manager.close()
+
+
+def test_learner_resume_is_bit_exact():
+    """A learner restored from a checkpoint must continue exactly like the original."""
+    rng = np.random.default_rng(0)
+    original = DQNLearner((32,), target_update_interval=3, seed=0)
+    for _ in range(5):
+        original.update(*_random_batch(rng))
+
+    with tempfile.TemporaryDirectory() as directory:
+        manager = CheckpointManager(directory)
+        manager.save(original.updates, *original.state_dict())
+        manager.close()
+        meta, arrays = manager.load_latest()
+
+        restored = DQNLearner((32,), target_update_interval=3, seed=1)
+        restored.load_state_dict(meta, arrays)
+
+    for _ in range(4):
+        batch = _random_batch(rng)
+        original.update(*batch)
+        restored.update(*batch)
+
+    for name in ('network', 'target_network'):
+        assert np.array_equal(getattr(original, name).get_flat_parameters(),
+                              getattr(restored, name).get_flat_parameters()), f"{name} diverged after resume"
+
+
+def test_trainer_resume():
+    """A resumed run must continue from the checkpointed update count and replay buffer."""
+    with tempfile.TemporaryDirectory() as directory:
+        config = TrainingConfig()
+        config.envs_per_actor = 16
+        config.hidden_sizes = (32,)
+        config.batch_size = 32
+        config.min_replay_size = 200
+        config.replay_capacity = 5000
+        config.max_updates = 20
+        config.checkpoint_dir = directory
+        config.checkpoint_interval = 10
+
+        ActorLearnerTrainer(config).run(duration=60, verbose=False)
+        meta, arrays = CheckpointManager(directory).load_latest()
+        assert meta['learner']['updates'] == 20, f"last checkpoint at {meta['learner']['updates']}"
+        assert sorted(meta['actors']) == ['0', '1'], "actor states missing from checkpoint"
+        assert meta['curriculum']['frontier'] >= 1, "curriculum position missing from checkpoint"
+
+        trainer = ActorLearnerTrainer(config)
+        config.max_updates = 30
+        stats = trainer.run(duration=60, verbose=False, resume=True)
+        assert stats['updates'] == 30, f"resumed run stopped at {stats['updates']} updates"
+        assert stats['env_steps'] > meta['env_steps'], "env step counter was not restored"
+
+
+def test_stratified_depths():
+    """Depth counts must match the mixture up to rounding."""
+    probabilities = np.array([0.0, 0.1, 0.2, 0.7])
+    depths = stratified_depths(probabilities, 1003, np.random.default_rng(0))
+    counts = np.bincount(depths, minlength=4)
+    assert counts.sum() == 1003 and counts[0] == 0, f"wrong counts {counts}"
+    assert (np.abs(counts - probabilities * 1003) < 1).all(), f"counts {counts} are not stratified"
+
+
+def test_curriculum_promotion():
+    """The frontier must advance once it is solved reliably and the mixture must follow it."""
+    curriculum = CurriculumScheduler(max_depth=5, promote_threshold=0.8, min_episodes=50)
+    rng = np.random.default_rng(0)
+    assert curriculum.depth_probabilities()[1] == 1.0, "a new curriculum should only train depth 1"
+
+    depths = curriculum.evaluation_depths(40, rng)
+    assert not curriculum.record(depths, np.ones(40, dtype=bool)), "promoted before min_episodes"
+    assert curriculum.record(curriculum.evaluation_depths(40, rng), np.ones(40, dtype=bool)), "did not promote"
+    assert curriculum.frontier == 2, f"frontier should be 2, got {curriculum.frontier}"
+
+    depths = curriculum.evaluation_depths(100, rng)
+    curriculum.record(depths, depths == 1)
+    probabilities = curriculum.depth_probabilities()
+    assert curriculum.frontier == 2, "promoted although the frontier is never solved"
+    assert np.isclose(probabilities.sum(), 1.0) and probabilities[2] == curriculum.frontier_weight, \
+        f"unexpected mixture {probabilities}"
+
+    restored = CurriculumScheduler(max_depth=5)
+    restored.load_state_dict(curriculum.state_dict())
+    assert np.array_equal(restored.depth_probabilities(), probabilities), "curriculum state did not round-trip"
+
+    states, batch_depths = curriculum.generate_batch(64, rng)
+    assert states.shape == (64, 54) and set(batch_depths.tolist()) <= {1, 2}, "batch depths outside the mixture"
+
+
+class _OracleNetwork:
+    """Scores highest the move that solves a one-move scramble."""
+
+    def forward(self, states):
+        children = states[:, MOVE_PERMS]
+        return (children == SOLVED_STATE).all(axis=2).astype(np.float32)
+
+
+def test_greedy_rollouts():
+    """Lockstep rollouts must report solve flags and solution lengths per cube."""
+    states = np.stack([SOLVED_STATE, SOLVED_STATE[MOVE_PERMS[4]], SOLVED_STATE[MOVE_PERMS[0]][MOVE_PERMS[3]]])
+    solved, lengths = greedy_rollouts(_OracleNetwork(), states, max_steps=3)
+    assert solved.tolist() == [True, True, False], f"unexpected solve flags {solved}"
+    assert lengths.tolist() == [0, 1, -1], f"unexpected lengths {lengths}"
+
+
+def test_beam_search_lockstep():
+    """A beam wide enough to keep every child must solve all two-move scrambles."""
+    from environment.generators import scramble_states
+
+    states = scramble_states(40, 2, np.random.default_rng(0))
+    solved, lengths = beam_search(_OracleNetwork(), states, beam_width=18, max_steps=2)
+    assert solved.all(), "beam search missed a two-move solution"
+    assert (lengths <= 2).all() and (lengths >= 1).all(), f"unexpected lengths {lengths}"
+
+
+def test_seeded_test_set_and_report():
+    """Test sets must be reproducible from their seed and reload unchanged from disk."""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'sets', 'scrambles.npz')
+        created = load_test_set(path, range(1, 4), 30, seed=7)
+        reloaded = load_test_set(path, range(1, 4), 30, seed=123)
+        other = load_test_set(os.path.join(directory, 'again.npz'), range(1, 4), 30, seed=7)
+
+        assert np.array_equal(created['states'], reloaded['states']), "reloading changed the test set"
+        assert np.array_equal(created['states'], other['states']), "the same seed gave a different test set"
+
+        report = evaluate(_OracleNetwork(), created, beam_width=1, max_steps=5)
+        rows = {row['depth']: row for row in report['rows']}
+        assert sorted(rows) == [1, 2, 3] and rows[1]['solve_rate'] == 1.0, f"unexpected report {report['rows']}"
+        assert report['states_evaluated'] > 0 and report['states_per_sec'] > 0, "throughput was not measured"
+
+
+TESTS = [
+    test_replay_buffer_wrap_around,
+    test_vector_env_auto_reset,
+    test_actor_learner_smoke,
+    test_checkpoint_manager,
+    test_learner_resume_is_bit_exact,
+    test_trainer_resume,
+    test_stratified_depths,
+    test_curriculum_promotion,
+    test_greedy_rollouts,
+    test_beam_search_lockstep,
+    test_seeded_test_set_and_report,
+]
+
+
+def run_all_tests():
+    """Run all training tests."""
+    passed_tests = 0
+
+    for test in TESTS:
+        print(f"\n=== {test.__name__} ===")
+        try:
+            test()
+            passed_tests += 1
+            print(f"✓ {test.__name__} passed!")
+        except AssertionError as e:
+            print(f"Test failed: {e}")
+        except Exception as e:
+            print(f"Unexpected error in {test.__name__}: {e}")
+
+    print(f"\n=== Training Test Summary ===")
+    print(f"Passed: {passed_tests}/{len(TESTS)}")
+    if passed_tests == len(TESTS):
+        print("All tests passed!")
+    else:
+        print(f"   {len(TESTS) - passed_tests} tests failed")
+
+
+def main():
+    """Main function for running tests."""
+    run_all_tests()
+
+
+if __name__ == "__main__":
+    main()
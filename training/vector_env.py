@@ -0,0 +1,102 @@
+"""
+Vectorized cube environment stepping many cubes at once on (N, 54) arrays.
+"""
+
+import numpy as np
+
+from environment.moves import MOVE_PERMS, SOLVED_STATE
+from environment.generators import scramble_states
+
+
+class VectorCubeEnv:
+    """
+    A batch of independent cube episodes.
+
+    Each episode starts from a scramble of scramble_depth moves and ends when
+    the cube is solved or after max_steps moves; finished episodes are reset
+    automatically inside step().
+    """
+
+    def __init__(self, num_envs, scramble_depth=10, max_steps=30, solved_reward=1.0,
+                 step_reward=0.0, seed=None, depth_sampler=None):
+        """
+        Args:
+            num_envs: number of cubes stepped together
+            scramble_depth: scramble length of each new episode
+            max_steps: episode length limit
+            solved_reward: reward for a move that solves the cube
+            step_reward: reward for any other move
+            seed: seed of the environment RNG
+            depth_sampler: optional callable (count, rng) -> depths replacing
+                the fixed scramble_depth, e.g. a curriculum
+        """
+        self.num_envs = num_envs
+        self.scramble_depth = scramble_depth
+        self.max_steps = max_steps
+        self.solved_reward = solved_reward
+        self.step_reward = step_reward
+        self.rng = np.random.default_rng(seed)
+        self.depth_sampler = depth_sampler
+
+        self.states = None
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+
+    def sample_depths(self, count):
+        """Scramble depths for count new episodes."""
+        if self.depth_sampler is not None:
+            return self.depth_sampler(count, self.rng)
+        return np.full(count, self.scramble_depth, dtype=np.intp)
+
+    def reset(self):
+        """
+        Start a new episode in every environment.
+
+        Returns:
+            np.ndarray: (num_envs, 54) initial states
+        """
+        self.states = scramble_states(self.num_envs, self.sample_depths(self.num_envs), self.rng)
+        self.steps[:] = 0
+        return self.states
+
+    def step(self, actions):
+        """
+        Apply one move per environment.
+
+        Args:
+            actions: (num_envs,) move indices
+
+        Returns:
+            tuple: (next_states, rewards, dones) where next_states are the states
+            reached by the moves, before any automatic reset
+        """
+        rows = np.arange(self.num_envs)[:, None]
+        next_states = self.states[rows, MOVE_PERMS[actions]]
+        solved = (next_states == SOLVED_STATE).all(axis=1)
+
+        rewards = np.where(solved, self.solved_reward, self.step_reward).astype(np.float32)
+        self.steps += 1
+        finished = solved | (self.steps >= self.max_steps)
+
+        self.states = next_states.copy()
+        if finished.any():
+            count = int(finished.sum())
+            self.states[finished] = scramble_states(count, self.sample_depths(count), self.rng)
+            self.steps[finished] = 0
+
+        # Running out of steps is a truncation, so only solved states are terminal
+        return next_states, rewards, solved
+
+    def state_dict(self):
+        """
+        Return the episode states, step counters and RNG state.
+
+        Returns:
+            tuple: (metadata dict, dict of arrays)
+        """
+        return {'rng': self.rng.bit_generator.state}, {'states': self.states.copy(), 'steps': self.steps.copy()}
+
+    def load_state_dict(self, meta, arrays):
+        """Restore a state produced by state_dict."""
+        self.rng.bit_generator.state = meta['rng']
+        self.states = np.array(arrays['states'], dtype=np.uint8)
+        self.steps = np.array(arrays['steps'], dtype=np.int64)
@@ -1,5 +1,51 @@
-from .cube_visualizer import *
-from .move_parser import *
-from .random_algorithm_generator import *
+"""
+Utilities for Rubik's Cube RL.
 
-__all__ = ['visualize_cube_3d', 'visualize_algorithm_3d', 'Cube3DVisualizer', 'parse_moves_to_tuples', 'random_moves_algorithm_generator']
\ No newline at end of file
+Attributes are resolved lazily through the module-level __getattr__, so
+importing this package (or a light submodule such as move_parser) does
+not import pygame, PyOpenGL or NumPy. The rendering stack is only loaded
+when a visualization function is first called.
+"""
+
+import importlib
+
+# Public name -> submodule defining it
+_LAZY_ATTRIBUTES = {
+    'Cube3DVisualizer': 'cube_visualizer',
+    'parse_moves_to_tuples': 'move_parser',
+    'random_moves_algorithm_generator': 'random_algorithm_generator',
+    'OffscreenRenderer': 'offscreen',
+    'save_frames': 'offscreen',
+    'write_png': 'offscreen',
+    'write_video': 'offscreen',
+    'MemoryTracker': 'memory',
+    'measure': 'memory',
+    'memory_report': 'memory',
+}
+
+__all__ = ['visualize_cube_3d', 'visualize_algorithm_3d'] + list(_LAZY_ATTRIBUTES)
+
+
+def visualize_cube_3d(cube):
+    """Open the interactive 3D view of a cube (imports pygame and PyOpenGL on first use)."""
+    from .cube_visualizer import visualize_cube_3d as visualize
+    return visualize(cube)
+
+
+def visualize_algorithm_3d(cube, algorithm):
+    """Animate an algorithm in the 3D view (imports pygame and PyOpenGL on first use)."""
+    from .cube_visualizer import visualize_algorithm_3d as visualize
+    return visualize(cube, algorithm)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module_name}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
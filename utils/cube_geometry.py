@@ -0,0 +1,256 @@
+"""
+Precomputed geometry of the 3D cube model.
+
+Sticker quads are stored in facelet order, so quad i shows state[i] and
+the colors of a whole state are a single gather from the palette. For
+every face and set of layers counted from it (LAYER_SETS: the outer
+layer, the middle slice, a wide turn and the whole cube) the quads and
+edge segments are listed as index ranges, which lets a renderer animate
+any move of the notation by transforming one range.
+
+Coordinates follow the visualizer: x to the right, y up, z towards the
+viewer, each cubie (x, y, z) in {0, 1, 2}^3 centered at (coord - 1) * cube_size.
+"""
+
+import numpy as np
+
+from environment.constants import WHITE, BLUE, RED, GREEN, ORANGE, YELLOW, UP, FRONT, LEFT, BACK, RIGHT, DOWN
+
+
+class RenderConfig:
+    def __init__(self):
+        self.cube_size = 0.97
+        self.small_cube_size = 0.95
+        self.line_width = 2
+        self.edge_color = (0.0, 0.0, 0.0)
+        self.background_color = (0.1, 0.1, 0.1, 1.0)
+        self.colors = {
+            WHITE: (1.0, 1.0, 1.0),
+            BLUE: (0.0, 0.0, 1.0),
+            RED: (1.0, 0.0, 0.0),
+            GREEN: (0.0, 0.8, 0.0),
+            ORANGE: (1.0, 0.5, 0.0),
+            YELLOW: (1.0, 1.0, 0.0)
+        }
+
+
+# Corners of a unit cube face (side 2, centered at the origin), counterclockwise seen from outside
+FACE_CORNERS = {
+    'front': [(-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)],
+    'back': [(1, -1, -1), (-1, -1, -1), (-1, 1, -1), (1, 1, -1)],
+    'left': [(-1, -1, -1), (-1, -1, 1), (-1, 1, 1), (-1, 1, -1)],
+    'right': [(1, -1, 1), (1, -1, -1), (1, 1, -1), (1, 1, 1)],
+    'top': [(-1, 1, 1), (1, 1, 1), (1, 1, -1), (-1, 1, -1)],
+    'bottom': [(-1, -1, -1), (1, -1, -1), (1, -1, 1), (-1, -1, 1)],
+}
+
+FACE_NORMALS = {
+    'front': (0, 0, 1), 'back': (0, 0, -1),
+    'left': (-1, 0, 0), 'right': (1, 0, 0),
+    'top': (0, 1, 0), 'bottom': (0, -1, 0),
+}
+
+CUBE_EDGES = [
+    ((-1, -1, 1), (1, -1, 1)), ((1, -1, 1), (1, 1, 1)), ((1, 1, 1), (-1, 1, 1)), ((-1, 1, 1), (-1, -1, 1)),
+    ((-1, -1, -1), (1, -1, -1)), ((1, -1, -1), (1, 1, -1)), ((1, 1, -1), (-1, 1, -1)), ((-1, 1, -1), (-1, -1, -1)),
+    ((-1, -1, 1), (-1, -1, -1)), ((1, -1, 1), (1, -1, -1)), ((1, 1, 1), (1, 1, -1)), ((-1, 1, 1), (-1, 1, -1)),
+]
+
+# Axis and sign used to animate each face turn, matching CubeRenderer._apply_rotation_for_face
+FACE_ROTATION_AXES = {
+    UP: ((0, 1, 0), -1), DOWN: ((0, 1, 0), 1),
+    FRONT: ((0, 0, 1), -1), BACK: ((0, 0, 1), 1),
+    RIGHT: ((1, 0, 0), -1), LEFT: ((1, 0, 0), 1),
+}
+
+
+# Layer depths counted from a face: outer layer, middle slice, wide turn, whole cube
+LAYER_SETS = ((0,), (1,), (0, 1), (0, 1, 2))
+
+
+def sticker_positions():
+    """
+    Locate every facelet on the cubie grid.
+
+    Returns:
+        list: 54 tuples (x, y, z, face_name), index i describing facelet i
+    """
+    positions = [None] * 54
+    for x in range(3):
+        for y in range(3):
+            for z in range(3):
+                if x == 0:
+                    positions[LEFT * 9 + (2 - y) * 3 + z] = (x, y, z, 'left')
+                if x == 2:
+                    positions[RIGHT * 9 + (2 - y) * 3 + (2 - z)] = (x, y, z, 'right')
+                if y == 0:
+                    positions[DOWN * 9 + (2 - z) * 3 + x] = (x, y, z, 'bottom')
+                if y == 2:
+                    positions[UP * 9 + z * 3 + x] = (x, y, z, 'top')
+                if z == 0:
+                    positions[BACK * 9 + (2 - y) * 3 + (2 - x)] = (x, y, z, 'back')
+                if z == 2:
+                    positions[FRONT * 9 + (2 - y) * 3 + x] = (x, y, z, 'front')
+    return positions
+
+
+def in_layer(coords, face, layers=(0,)):
+    """
+    Boolean mask of the cubie coordinates belonging to layers of a face.
+
+    Args:
+        coords: (..., 3) integer cubie coordinates
+        face: face constant
+        layers: layer depths counted from the face, 0 being its outer layer
+    """
+    coords = np.asarray(coords)
+    axis, value = {
+        UP: (1, 2), DOWN: (1, 0),
+        FRONT: (2, 2), BACK: (2, 0),
+        RIGHT: (0, 2), LEFT: (0, 0),
+    }[face]
+    return np.isin(coords[..., axis], [abs(value - depth) for depth in layers])
+
+
+class CubeGeometry:
+    """Sticker quads and cubie edge segments of the cube model, built once."""
+
+    def __init__(self, cube_size=0.97, small_cube_size=0.95):
+        """
+        Args:
+            cube_size: distance between neighbouring cubie centers
+            small_cube_size: side length of a drawn cubie
+        """
+        half = small_cube_size / 2
+
+        positions = sticker_positions()
+        self.sticker_coords = np.array([position[:3] for position in positions], dtype=np.int64)
+        self.sticker_faces = [position[3] for position in positions]
+        centers = (self.sticker_coords - 1) * cube_size
+
+        # (54, 4, 3): quad i is facelet i
+        corners = np.array([FACE_CORNERS[face] for face in self.sticker_faces], dtype=np.float64)
+        self.quad_vertices = (centers[:, None, :] + corners * half).astype(np.float32)
+        self.quad_normals = np.array([FACE_NORMALS[face] for face in self.sticker_faces], dtype=np.float32)
+
+        # Edge outlines of the 26 visible cubies
+        cubies = np.array([(x, y, z) for x in range(3) for y in range(3) for z in range(3)
+                           if (x, y, z) != (1, 1, 1)], dtype=np.int64)
+        edges = np.array(CUBE_EDGES, dtype=np.float64)
+        self.edge_coords = np.repeat(cubies, len(CUBE_EDGES), axis=0)
+        segments = ((cubies - 1) * cube_size)[:, None, None, :] + edges[None] * half
+        self.edge_vertices = segments.reshape(-1, 2, 3).astype(np.float32)
+
+        self.vertices = self.quad_vertices.reshape(-1, 3)
+        self.line_vertices = self.edge_vertices.reshape(-1, 3)
+
+        # Per (face, layers): vertex indices of the static quads followed by the rotating ones
+        self.quad_indices = {}
+        self.quad_split = {}
+        self.line_indices = {}
+        self.line_split = {}
+        for face in range(6):
+            for layers in LAYER_SETS:
+                key = (face, layers)
+                self.quad_indices[key], self.quad_split[key] = self._split_indices(
+                    in_layer(self.sticker_coords, face, layers), 4)
+                self.line_indices[key], self.line_split[key] = self._split_indices(
+                    in_layer(self.edge_coords, face, layers), 2)
+
+    @staticmethod
+    def _split_indices(rotating, vertices_per_primitive):
+        order = np.concatenate([np.flatnonzero(~rotating), np.flatnonzero(rotating)])
+        indices = (order[:, None] * vertices_per_primitive + np.arange(vertices_per_primitive)).ravel()
+        return indices.astype(np.uint32), int((~rotating).sum()) * vertices_per_primitive
+
+    def quad_colors(self, cube_state, palette):
+        """
+        Per-vertex colors of the sticker quads.
+
+        Args:
+            cube_state: 54 sticker colors
+            palette: (6, 3) float array of RGB colors indexed by color constant
+
+        Returns:
+            np.ndarray: (216, 3) float32 colors, four per quad
+        """
+        return np.repeat(np.asarray(palette, dtype=np.float32)[np.asarray(cube_state)], 4, axis=0)
+
+
+def palette_array(colors):
+    """Convert a RenderConfig.colors dict to a (6, 3) float32 array."""
+    return np.array([colors[color] for color in range(6)], dtype=np.float32)
+
+
+def rotation_matrix(face, angle):
+    """
+    3x3 rotation used to animate a turn of face by angle degrees.
+
+    Matches glRotatef in CubeRenderer._apply_rotation_for_face.
+    """
+    axis, sign = FACE_ROTATION_AXES[face]
+    theta = np.radians(sign * angle)
+    x, y, z = axis
+    c, s = np.cos(theta), np.sin(theta)
+    return np.array([
+        [c + x * x * (1 - c), x * y * (1 - c) - z * s, x * z * (1 - c) + y * s],
+        [y * x * (1 - c) + z * s, c + y * y * (1 - c), y * z * (1 - c) - x * s],
+        [z * x * (1 - c) - y * s, z * y * (1 - c) + x * s, c + z * z * (1 - c)],
+    ], dtype=np.float32)
+
+
+def animation_steps(algorithm):
+    """
+    Quarter turns animating an algorithm, in the notation of Cube.execute_algorithm.
+
+    Half turns become two clockwise quarter turns. Slices, wide turns and
+    rotations turn like a face (environment.notation), so every step is
+    drawn as that face's rotation of some layers.
+
+    Args:
+        algorithm: move string such as "r U M x"
+
+    Returns:
+        list: (name, face, layers, clockwise, perm) per quarter turn, with
+        layers a LAYER_SETS entry and perm the (54,) sticker gather permutation
+
+    Raises:
+        ValueError: for moves that do not exist on a 3x3 cube
+    """
+    from environment.notation import (
+        LETTER_FACES, ROTATION_FACES, ROTATION_LETTERS, SLICE_FACES, SLICE_LETTERS,
+        token_name, token_perm, tokenize,
+    )
+
+    steps = []
+    for token in tokenize(algorithm):
+        quarter = token._replace(turn=1 if token.turn == 1 else 0)
+        perm = token_perm(quarter)
+        if token.letter in SLICE_LETTERS:
+            face, layers = SLICE_FACES[token.letter], (1,)
+        elif token.letter in ROTATION_LETTERS:
+            face, layers = ROTATION_FACES[token.letter], (0, 1, 2)
+        else:
+            count = token.layers if token.layers is not None else (2 if token.wide else 1)
+            face, layers = LETTER_FACES[token.letter], tuple(range(count)) if token.wide else (count - 1,)
+        step = (token_name(token), face, layers, quarter.turn == 0, perm)
+        steps.extend([step] * (2 if token.turn == 2 else 1))
+    return steps
+
+
+def animation_angles(clockwise, speed):
+    """
+    Layer angles of the frames animating one quarter turn.
+
+    Args:
+        clockwise: direction of the turn
+        speed: degrees per frame
+
+    Returns:
+        list: angles in degrees, from 0 to +/-90 inclusive
+    """
+    total_angle = 90.0 if clockwise else -90.0
+    frames = int(abs(total_angle) / speed)
+    if frames == 0:
+        return [total_angle]
+    return [total_angle * frame / frames for frame in range(frames + 1)]
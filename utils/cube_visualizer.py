@@ -3,49 +3,41 @@ import os
 
 os.environ['SDL_AUDIODRIVER'] = 'dummy'
 
-import pygame
+import ctypes
 import math
+import time
+from collections import deque
+
+import numpy as np
+import pygame
 from pygame.locals import *
 
 try:
     from OpenGL.GL import *
     from OpenGL.GLU import *
 except ImportError as e:
-    print(f"OpenGL import error: {e}")
-    print("Install with: pip install PyOpenGL PyOpenGL_accelerate")
-    sys.exit(1)
+    raise ImportError(f"OpenGL import error: {e}. Install with: pip install PyOpenGL PyOpenGL_accelerate") from e
 
 if __name__ == "__main__":
     project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     sys.path.insert(0, project_root)
     from environment.constants import WHITE, BLUE, RED, GREEN, ORANGE, YELLOW, UP, FRONT, LEFT, BACK, RIGHT, DOWN
-    from .move_parser import parse_moves_to_tuples
+    from utils.cube_geometry import (
+        CubeGeometry, FACE_ROTATION_AXES, RenderConfig, animation_angles, animation_steps, palette_array,
+    )
 else:
     try:
         from ..environment.constants import WHITE, BLUE, RED, GREEN, ORANGE, YELLOW, UP, FRONT, LEFT, BACK, RIGHT, DOWN
-        from .move_parser import parse_moves_to_tuples
+        from .cube_geometry import (
+            CubeGeometry, FACE_ROTATION_AXES, RenderConfig, animation_angles, animation_steps, palette_array,
+        )
     except ImportError:
         project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         sys.path.insert(0, project_root)
         from environment.constants import WHITE, BLUE, RED, GREEN, ORANGE, YELLOW, UP, FRONT, LEFT, BACK, RIGHT, DOWN
-        from utils.move_parser import parse_moves_to_tuples
-
-
-class RenderConfig:
-    def __init__(self):
-        self.cube_size = 0.97
-        self.small_cube_size = 0.95
-        self.line_width = 2
-        self.edge_color = (0.0, 0.0, 0.0)
-        self.background_color = (0.1, 0.1, 0.1, 1.0)
-        self.colors = {
-            WHITE: (1.0, 1.0, 1.0),
-            BLUE: (0.0, 0.0, 1.0), 
-            RED: (1.0, 0.0, 0.0),
-            GREEN: (0.0, 0.8, 0.0),
-            ORANGE: (1.0, 0.5, 0.0),
-            YELLOW: (1.0, 1.0, 0.0)
-        }
+        from utils.cube_geometry import (
+            CubeGeometry, FACE_ROTATION_AXES, RenderConfig, animation_angles, animation_steps, palette_array,
+        )
 
 
 class ViewState:
@@ -55,10 +47,12 @@ class ViewState:
         self.zoom = -8.0
         self.mouse_dragging = False
         self.last_mouse_pos = (0, 0)
+        self.dirty = True
     
     def reset_rotation(self):
         self.rotation_x = 20
         self.rotation_y = -30
+        self.dirty = True
 
 
 class AnimationConfig:
@@ -118,16 +112,95 @@ class OpenGLSetup:
             return False
 
 
+class FrameStats:
+    """Render times and redraw rate over the most recent frames."""
+
+    def __init__(self, window=60):
+        self.frame_times = deque(maxlen=window)
+        self.timestamps = deque(maxlen=window)
+
+    def record(self, start, end):
+        self.frame_times.append(end - start)
+        self.timestamps.append(end)
+
+    def fps(self):
+        if len(self.timestamps) < 2:
+            return 0.0
+        span = self.timestamps[-1] - self.timestamps[0]
+        return (len(self.timestamps) - 1) / span if span > 0 else 0.0
+
+    def summary(self):
+        if not self.frame_times:
+            return "no frames"
+        mean_ms = 1000 * sum(self.frame_times) / len(self.frame_times)
+        max_ms = 1000 * max(self.frame_times)
+        return f"{self.fps():5.1f} fps  {mean_ms:5.2f} ms/frame  (max {max_ms:5.2f})"
+
+
+class FrameStatsOverlay:
+    """Draws the FrameStats summary in the top-left corner of the window."""
+
+    def __init__(self, stats):
+        self.stats = stats
+        self.visible = True
+        self._font = None
+
+    def toggle(self):
+        self.visible = not self.visible
+
+    def draw(self):
+        if not self.visible:
+            return
+        if self._font is None:
+            pygame.font.init()
+            self._font = pygame.font.SysFont('monospace', 14)
+
+        text = self._font.render(self.stats.summary(), True, (255, 255, 255), (0, 0, 0))
+        data = pygame.image.tostring(text, 'RGBA', True)
+        _, height = pygame.display.get_surface().get_size()
+
+        glDisable(GL_DEPTH_TEST)
+        glWindowPos2i(4, height - text.get_height() - 4)
+        glDrawPixels(text.get_width(), text.get_height(), GL_RGBA, GL_UNSIGNED_BYTE, data)
+        glEnable(GL_DEPTH_TEST)
+
+
 class EventHandler:
-    def __init__(self, view_state):
+    REDRAW_EVENTS = {VIDEOEXPOSE, VIDEORESIZE, WINDOWEXPOSED, WINDOWSHOWN, WINDOWRESTORED, WINDOWRESIZED,
+                     WINDOWSIZECHANGED, WINDOWFOCUSGAINED}
+
+    def __init__(self, view_state, overlay=None):
         self.view_state = view_state
+        self.overlay = overlay
 
     def handle_events(self):
         for event in pygame.event.get():
-            if self._is_quit_event(event):
+            if not self.handle_event(event):
                 return False
-            self._handle_mouse_events(event)
-            self._handle_keyboard_events(event)
+        return True
+
+    def wait_for_events(self, timeout=0):
+        """
+        Sleep until at least one event arrives, then handle every pending event.
+
+        Args:
+            timeout: maximum wait in milliseconds, 0 waits indefinitely
+
+        Returns:
+            bool: False when the user asked to quit
+        """
+        event = pygame.event.wait(timeout) if timeout else pygame.event.wait()
+        if event.type != NOEVENT and not self.handle_event(event):
+            return False
+        return self.handle_events()
+
+    def handle_event(self, event):
+        if self._is_quit_event(event):
+            return False
+        if event.type in self.REDRAW_EVENTS:
+            self.view_state.dirty = True
+        self._handle_mouse_events(event)
+        self._handle_keyboard_events(event)
         return True
 
     def _is_quit_event(self, event):
@@ -146,190 +219,147 @@ class EventHandler:
             self.view_state.rotation_y += dx * 0.5
             self.view_state.rotation_x += dy * 0.5
             self.view_state.last_mouse_pos = event.pos
+            self.view_state.dirty = True
 
     def _handle_keyboard_events(self, event):
         if event.type == KEYDOWN and event.key == K_r:
             self.view_state.reset_rotation()
+        elif event.type == KEYDOWN and event.key == K_f and self.overlay is not None:
+            self.overlay.toggle()
+            self.view_state.dirty = True
 
 
 class CubeRenderer:
+    """
+    Retained-mode renderer: the cube geometry lives in vertex buffers created
+    once per GL context, and only the sticker colors are re-uploaded, and only
+    when the cube state changes. An animated move draws the static and the
+    rotating part of the cube as two index ranges of the same buffers.
+    """
+
     def __init__(self, config):
         self.config = config
+        self.geometry = CubeGeometry(config.cube_size, config.small_cube_size)
+        self.palette = palette_array(config.colors)
+        self.overlay = None
+        self._buffers = None
+        self._uploaded_state = None
 
     def render_cube(self, cube_state):
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
         self._draw_rubiks_cube(cube_state)
-        pygame.display.flip()
+        self._flip()
 
-    def render_animated_cube(self, cube_state, rotating_face, angle):
+    def render_animated_cube(self, cube_state, rotating_face, angle, layers=(0,)):
         glClear(GL_COLOR_BUFFER_BIT | GL_DEPTH_BUFFER_BIT)
-        self._draw_animated_rubiks_cube(cube_state, rotating_face, angle)
+        self._draw_animated_rubiks_cube(cube_state, rotating_face, angle, layers)
+        self._flip()
+
+    def _flip(self):
+        if self.overlay is not None:
+            self.overlay.draw()
         pygame.display.flip()
 
+    def release(self):
+        """Delete the GL buffers; call before the GL context is destroyed."""
+        if self._buffers is not None:
+            glDeleteBuffers(len(self._buffers), list(self._buffers.values()))
+        self._buffers = None
+        self._uploaded_state = None
+
+    def _ensure_buffers(self):
+        if self._buffers is not None:
+            return
+
+        geometry = self.geometry
+        names = ['quad_vertices', 'quad_colors', 'quad_indices', 'line_vertices', 'line_indices']
+        self._buffers = dict(zip(names, glGenBuffers(len(names))))
+
+        self._upload(GL_ARRAY_BUFFER, 'quad_vertices', geometry.vertices, GL_STATIC_DRAW)
+        self._upload(GL_ARRAY_BUFFER, 'quad_colors', np.zeros((len(geometry.vertices), 3), dtype=np.float32),
+                     GL_DYNAMIC_DRAW)
+        self._upload(GL_ARRAY_BUFFER, 'line_vertices', geometry.line_vertices, GL_STATIC_DRAW)
+
+        # One element buffer per primitive type with the six per-face orderings back to back
+        self._quad_offsets = self._upload_indices('quad_indices', geometry.quad_indices)
+        self._line_offsets = self._upload_indices('line_indices', geometry.line_indices)
+
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
+
+    def _upload(self, target, name, data, usage):
+        data = np.ascontiguousarray(data)
+        glBindBuffer(target, self._buffers[name])
+        glBufferData(target, data.nbytes, data, usage)
+
+    def _upload_indices(self, name, layer_indices):
+        offsets = {}
+        position = 0
+        for key, indices in layer_indices.items():
+            offsets[key] = position * 4
+            position += len(indices)
+        self._upload(GL_ELEMENT_ARRAY_BUFFER, name, np.concatenate(list(layer_indices.values())), GL_STATIC_DRAW)
+        return offsets
+
+    def _update_colors(self, cube_state):
+        state = np.asarray(cube_state)
+        if self._uploaded_state is not None and np.array_equal(state, self._uploaded_state):
+            return
+        colors = self.geometry.quad_colors(state, self.palette)
+        glBindBuffer(GL_ARRAY_BUFFER, self._buffers['quad_colors'])
+        glBufferSubData(GL_ARRAY_BUFFER, 0, colors.nbytes, colors)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
+        self._uploaded_state = state.copy()
+
     def _draw_rubiks_cube(self, cube_state):
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    pos_x = (x - 1) * self.config.cube_size
-                    pos_y = (y - 1) * self.config.cube_size  
-                    pos_z = (z - 1) * self.config.cube_size
-                    
-                    glPushMatrix()
-                    glTranslatef(pos_x, pos_y, pos_z)
-                    self._draw_small_cube(x, y, z, cube_state)
-                    glPopMatrix()
-
-    def _draw_small_cube(self, x, y, z, cube_state):
-        faces_to_draw = self._get_visible_faces(x, y, z, cube_state)
-        
-        for face_name, color in faces_to_draw:
-            glColor3f(*color)
-            self._draw_cube_face(face_name, self.config.small_cube_size)
-            
+        self._draw_animated_rubiks_cube(cube_state, None, 0.0)
+
+    def _draw_animated_rubiks_cube(self, cube_state, rotating_face, angle, layers=(0,)):
+        self._ensure_buffers()
+        self._update_colors(cube_state)
+
+        glEnableClientState(GL_VERTEX_ARRAY)
+
+        glBindBuffer(GL_ARRAY_BUFFER, self._buffers['quad_vertices'])
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        glEnableClientState(GL_COLOR_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, self._buffers['quad_colors'])
+        glColorPointer(3, GL_FLOAT, 0, None)
+        self._draw_layers(GL_QUADS, 'quad_indices', len(self.geometry.vertices), self.geometry.quad_split,
+                          self._quad_offsets, rotating_face, angle, layers)
+        glDisableClientState(GL_COLOR_ARRAY)
+
         glColor3f(*self.config.edge_color)
         glLineWidth(self.config.line_width)
-        self._draw_cube_edges(self.config.small_cube_size)
+        glBindBuffer(GL_ARRAY_BUFFER, self._buffers['line_vertices'])
+        glVertexPointer(3, GL_FLOAT, 0, None)
+        self._draw_layers(GL_LINES, 'line_indices', len(self.geometry.line_vertices), self.geometry.line_split,
+                          self._line_offsets, rotating_face, angle, layers)
 
-    def _get_visible_faces(self, x, y, z, cube_state):
-        faces_to_draw = []
-        
-        if x == 0:
-            color_idx = cube_state[LEFT * 9 + (2-y) * 3 + z]
-            faces_to_draw.append(('left', self.config.colors[color_idx]))
-        if x == 2:
-            color_idx = cube_state[RIGHT * 9 + (2-y) * 3 + (2-z)]
-            faces_to_draw.append(('right', self.config.colors[color_idx]))
-        if y == 0:
-            color_idx = cube_state[DOWN * 9 + (2-z) * 3 + x]
-            faces_to_draw.append(('bottom', self.config.colors[color_idx]))
-        if y == 2:
-            color_idx = cube_state[UP * 9 + z * 3 + x]
-            faces_to_draw.append(('top', self.config.colors[color_idx]))
-        if z == 0:
-            color_idx = cube_state[BACK * 9 + (2-y) * 3 + (2-x)]
-            faces_to_draw.append(('back', self.config.colors[color_idx]))
-        if z == 2:
-            color_idx = cube_state[FRONT * 9 + (2-y) * 3 + x]
-            faces_to_draw.append(('front', self.config.colors[color_idx]))
-            
-        return faces_to_draw
+        glDisableClientState(GL_VERTEX_ARRAY)
+        glBindBuffer(GL_ARRAY_BUFFER, 0)
 
-    def _draw_cube_face(self, face_name, size):
-        s = size / 2
-        
-        glBegin(GL_QUADS)
-        
-        if face_name == 'front':
-            glVertex3f(-s, -s, s)
-            glVertex3f(s, -s, s)
-            glVertex3f(s, s, s)
-            glVertex3f(-s, s, s)
-        elif face_name == 'back':
-            glVertex3f(s, -s, -s)
-            glVertex3f(-s, -s, -s)
-            glVertex3f(-s, s, -s)
-            glVertex3f(s, s, -s)
-        elif face_name == 'left':
-            glVertex3f(-s, -s, -s)
-            glVertex3f(-s, -s, s)
-            glVertex3f(-s, s, s)
-            glVertex3f(-s, s, -s)
-        elif face_name == 'right':
-            glVertex3f(s, -s, s)
-            glVertex3f(s, -s, -s)
-            glVertex3f(s, s, -s)
-            glVertex3f(s, s, s)
-        elif face_name == 'top':
-            glVertex3f(-s, s, s)
-            glVertex3f(s, s, s)
-            glVertex3f(s, s, -s)
-            glVertex3f(-s, s, -s)
-        elif face_name == 'bottom':
-            glVertex3f(-s, -s, -s)
-            glVertex3f(s, -s, -s)
-            glVertex3f(s, -s, s)
-            glVertex3f(-s, -s, s)
-            
-        glEnd()
+    def _draw_layers(self, mode, index_buffer, vertex_count, split, offsets, rotating_face, angle, layers):
+        if rotating_face is None or angle == 0:
+            glDrawArrays(mode, 0, vertex_count)
+            return
 
-    def _draw_cube_edges(self, size):
-        s = size / 2
-        
-        glBegin(GL_LINES)
-        glVertex3f(-s, -s, s); glVertex3f(s, -s, s)
-        glVertex3f(s, -s, s); glVertex3f(s, s, s)
-        glVertex3f(s, s, s); glVertex3f(-s, s, s)
-        glVertex3f(-s, s, s); glVertex3f(-s, -s, s)
-        
-        glVertex3f(-s, -s, -s); glVertex3f(s, -s, -s)
-        glVertex3f(s, -s, -s); glVertex3f(s, s, -s)
-        glVertex3f(s, s, -s); glVertex3f(-s, s, -s)
-        glVertex3f(-s, s, -s); glVertex3f(-s, -s, -s)
-        
-        glVertex3f(-s, -s, s); glVertex3f(-s, -s, -s)
-        glVertex3f(s, -s, s); glVertex3f(s, -s, -s)
-        glVertex3f(s, s, s); glVertex3f(s, s, -s)
-        glVertex3f(-s, s, s); glVertex3f(-s, s, -s)
-        glEnd()
-
-    def _draw_animated_rubiks_cube(self, cube_state, rotating_face, angle):
-        rotating_cubes, static_cubes = self._separate_cubes_by_rotation(rotating_face)
-        
-        for x, y, z, pos_x, pos_y, pos_z in static_cubes:
-            glPushMatrix()
-            glTranslatef(pos_x, pos_y, pos_z)
-            self._draw_small_cube(x, y, z, cube_state)
-            glPopMatrix()
-        
-        for x, y, z, pos_x, pos_y, pos_z in rotating_cubes:
-            glPushMatrix()
-            self._apply_rotation_for_face(rotating_face, angle)
-            glTranslatef(pos_x, pos_y, pos_z)
-            self._draw_small_cube(x, y, z, cube_state)
-            glPopMatrix()
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, self._buffers[index_buffer])
+        offset = offsets[rotating_face, layers]
+        static_count = split[rotating_face, layers]
 
-    def _separate_cubes_by_rotation(self, rotating_face):
-        rotating_cubes = []
-        static_cubes = []
-        
-        for x in range(3):
-            for y in range(3):
-                for z in range(3):
-                    pos_x = (x - 1) * self.config.cube_size
-                    pos_y = (y - 1) * self.config.cube_size  
-                    pos_z = (z - 1) * self.config.cube_size
-                    
-                    cube_info = (x, y, z, pos_x, pos_y, pos_z)
-                    
-                    if self._is_cube_in_rotating_face(x, y, z, rotating_face):
-                        rotating_cubes.append(cube_info)
-                    else:
-                        static_cubes.append(cube_info)
-        
-        return rotating_cubes, static_cubes
+        glDrawElements(mode, static_count, GL_UNSIGNED_INT, ctypes.c_void_p(offset))
 
-    def _is_cube_in_rotating_face(self, x, y, z, face):
-        if face == UP and y == 2:
-            return True
-        elif face == DOWN and y == 0:
-            return True
-        elif face == FRONT and z == 2:
-            return True
-        elif face == BACK and z == 0:
-            return True
-        elif face == RIGHT and x == 2:
-            return True
-        elif face == LEFT and x == 0:
-            return True
-        return False
+        glPushMatrix()
+        self._apply_rotation_for_face(rotating_face, angle)
+        glDrawElements(mode, vertex_count - static_count, GL_UNSIGNED_INT, ctypes.c_void_p(offset + static_count * 4))
+        glPopMatrix()
+
+        glBindBuffer(GL_ELEMENT_ARRAY_BUFFER, 0)
 
     def _apply_rotation_for_face(self, face, angle):
-        if face == UP or face == DOWN:
-            glRotatef(-angle if face == UP else angle, 0, 1, 0)
-        elif face == FRONT or face == BACK:
-            glRotatef(-angle if face == FRONT else angle, 0, 0, 1)
-        elif face == RIGHT or face == LEFT:
-            glRotatef(-angle if face == RIGHT else angle, 1, 0, 0)
+        axis, sign = FACE_ROTATION_AXES[face]
+        glRotatef(sign * angle, *axis)
 
 
 class CubeAnimator:
@@ -339,37 +369,26 @@ class CubeAnimator:
         self.view_state = view_state
 
     def execute_algorithm(self, cube, algorithm):
-        moves = parse_moves_to_tuples(algorithm.upper())
+        steps = animation_steps(algorithm)
         
-        for i, (face, clockwise) in enumerate(moves):
-            print(f"Executing move {i+1}/{len(moves)}: {self._move_to_string(face, clockwise)}")
+        for i, (name, face, layers, clockwise, perm) in enumerate(steps):
+            print(f"Executing step {i+1}/{len(steps)}: {name}")
             
-            if not self._animate_single_move(cube, face, clockwise):
+            if not self._animate_single_move(cube, face, layers, clockwise, perm):
                 return False
                 
         return True
 
-    def _animate_single_move(self, cube, face, clockwise):
-        initial_state = cube.state.copy()
-        
-        cube.rotate(face, clockwise)
-        final_state = cube.state.copy()
-        
-        cube.state = initial_state
-        
-        total_angle = 90.0 if clockwise else -90.0
-        frames = int(abs(total_angle) / self.config.speed)
+    def _animate_single_move(self, cube, face, layers, clockwise, perm):
+        final_state = [cube.state[index] for index in perm.tolist()]
         
         clock = pygame.time.Clock()
         
-        for frame in range(frames + 1):
-            t = frame / frames if frames > 0 else 1.0
-            current_angle = total_angle * t
-            
+        for current_angle in animation_angles(clockwise, self.config.speed):
             glPushMatrix()
             glRotatef(self.view_state.rotation_x, 1, 0, 0)
             glRotatef(self.view_state.rotation_y, 0, 1, 0)
-            self.renderer.render_animated_cube(cube.state, face, current_angle)
+            self.renderer.render_animated_cube(cube.state, face, current_angle, layers)
             glPopMatrix()
             
             clock.tick(self.config.fps)
@@ -386,18 +405,6 @@ class CubeAnimator:
         
         return True
 
-    def _move_to_string(self, face, clockwise):
-        face_map = {
-            FRONT: 'F', BACK: 'B', RIGHT: 'R',
-            LEFT: 'L', UP: 'U', DOWN: 'D'
-        }
-        
-        move = face_map.get(face, '?')
-        if not clockwise:
-            move += "'"
-            
-        return move
-
 
 class Cube3DVisualizer:
     def __init__(self):
@@ -405,8 +412,14 @@ class Cube3DVisualizer:
         self.view_state = ViewState()
         self.animation_config = AnimationConfig()
         
+        self.frame_stats = FrameStats()
+        self.overlay = FrameStatsOverlay(self.frame_stats)
+        self.max_fps = 144
+        self.idle_timeout = 0
+
         self.renderer = CubeRenderer(self.render_config)
-        self.event_handler = EventHandler(self.view_state)
+        self.renderer.overlay = self.overlay
+        self.event_handler = EventHandler(self.view_state, self.overlay)
         self.animator = CubeAnimator(self.renderer, self.animation_config, self.view_state)
 
     def set_animation_speed(self, speed):
@@ -417,19 +430,14 @@ class Cube3DVisualizer:
             print("Failed to initialize display")
             return
             
-        print("Visualizer started. ESC to exit, R to reset view, drag to rotate.")
-        
-        clock = pygame.time.Clock()
-        running = True
+        print("Visualizer started. ESC to exit, R to reset view, F to toggle FPS overlay, drag to rotate.")
         
         try:
-            while running:
-                running = self.event_handler.handle_events()
-                self._render_with_view_transform(cube)
-                clock.tick(144)
+            self._run_event_loop(cube)
         except Exception as e:
             print(f"Visualization error: {e}")
         finally:
+            self.renderer.release()
             pygame.quit()
 
     def run_animated_visualization(self, cube, algorithm):
@@ -449,14 +457,37 @@ class Cube3DVisualizer:
         except Exception as e:
             print(f"Animation error: {e}")
         finally:
+            self.renderer.release()
             pygame.quit()
 
+    def _run_event_loop(self, cube):
+        """
+        Redraw only when the view, the window or the cube state changed, and
+        otherwise sleep in pygame.event.wait until the next event.
+        """
+        clock = pygame.time.Clock()
+        self.view_state.dirty = True
+        rendered_state = None
+        running = True
+
+        while running:
+            if self.view_state.dirty or list(cube.state) != rendered_state:
+                self._render_with_view_transform(cube)
+                self.view_state.dirty = False
+                rendered_state = list(cube.state)
+                clock.tick(self.max_fps)
+                running = self.event_handler.handle_events()
+            else:
+                running = self.event_handler.wait_for_events(self.idle_timeout)
+
     def _render_with_view_transform(self, cube):
+        start = time.perf_counter()
         glPushMatrix()
         glRotatef(self.view_state.rotation_x, 1, 0, 0)
         glRotatef(self.view_state.rotation_y, 0, 1, 0)
         self.renderer.render_cube(cube.state)
         glPopMatrix()
+        self.frame_stats.record(start, time.perf_counter())
 
     def _show_initial_state(self, cube):
         glPushMatrix()
@@ -472,14 +503,8 @@ class Cube3DVisualizer:
         else:
             print("Animation was interrupted.")
             
-        print("Final state displayed. ESC to exit, R to reset view, drag to rotate.")
-        
-        clock = pygame.time.Clock()
-        running = True
-        while running:
-            running = self.event_handler.handle_events()
-            self._render_with_view_transform(cube)
-            clock.tick(60)
+        print("Final state displayed. ESC to exit, R to reset view, F to toggle FPS overlay, drag to rotate.")
+        self._run_event_loop(cube)
 
 
 def visualize_cube_3d(cube):
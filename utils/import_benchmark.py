@@ -0,0 +1,83 @@
+"""
+Import-time benchmark for the light packages.
+
+Every measurement runs in a fresh interpreter, so nothing is cached in
+sys.modules. Run with: python -m utils.import_benchmark
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+# Package -> import time budget in milliseconds
+IMPORT_TARGETS_MS = {
+    'environment': 50.0,
+    'utils': 50.0,
+}
+
+# Modules that must not be pulled in by importing the light packages
+HEAVY_MODULES = ('pygame', 'OpenGL', 'numpy')
+
+_MEASURE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - start) * 1000
+heavy = sorted(name for name in {heavy!r} if name in sys.modules)
+print(json.dumps({{'ms': elapsed, 'heavy': heavy}}))
+"""
+
+
+def measure_import(module, repeats=5):
+    """
+    Time `import module` in fresh interpreters.
+
+    Args:
+        module: module name to import
+        repeats: number of interpreters to start
+
+    Returns:
+        dict: 'best_ms' and 'median_ms' over the runs, 'heavy' modules loaded
+    """
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = _MEASURE.format(module=module, heavy=HEAVY_MODULES)
+    times = []
+    heavy = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', code], cwd=project_root, check=True,
+                                capture_output=True, text=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result['ms'])
+        heavy = result['heavy']
+
+    times.sort()
+    return {'best_ms': times[0], 'median_ms': times[len(times) // 2], 'heavy': heavy}
+
+
+def run_benchmark(targets=None, repeats=5, verbose=True):
+    """
+    Measure every package against its budget.
+
+    Returns:
+        bool: True if every package is within budget and imports no heavy module
+    """
+    targets = targets or IMPORT_TARGETS_MS
+    passed = True
+    for module, target in targets.items():
+        result = measure_import(module, repeats)
+        ok = result['best_ms'] <= target and not result['heavy']
+        passed = passed and ok
+        if verbose:
+            heavy = ', '.join(result['heavy']) or 'none'
+            print(f"import {module:<12} best {result['best_ms']:7.2f} ms  median {result['median_ms']:7.2f} ms  "
+                  f"target {target:5.1f} ms  heavy modules: {heavy}  {'OK' if ok else 'FAIL'}")
+    return passed
+
+
+def main():
+    sys.exit(0 if run_benchmark() else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Memory accounting for states, buffers, networks and lookup tables.
+
+measure() walks an object graph once and splits its bytes into heap
+memory and mapped memory. Heap is the private memory of the process.
+Mapped memory is memmapped table files and shared-memory segments, which
+are shared between processes and paged in on demand. Objects reached
+twice are counted once, which includes the small ints shared by every
+Cube.state list and the base array behind numpy views.
+
+MemoryTracker records wall time, RSS and peak RSS around named phases,
+plus the peak of traced allocations when tracemalloc is running (NumPy
+reports its buffers to it). memory_report puts it all together:
+
+    representations   bytes per state of every state format side by side
+    structures        Q-networks, the replay buffer at its configured
+                      capacity, move tables and caches
+    tables            pattern databases and lookup tables already built in
+                      the tables directory, plus BFS level files (the
+                      search's visited sets)
+    phases            RSS and peak RSS while each section was measured
+
+    python main.py memreport
+    python main.py memreport --states 100000 --tables-dir tables --output bfs_levels
+"""
+
+import contextlib
+import mmap
+import os
+import sys
+import time
+import tracemalloc
+import types
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:             # not on Windows
+    resource = None
+
+_OPAQUE = (type, types.ModuleType, types.FunctionType, types.BuiltinFunctionType, types.MethodType,
+           types.CodeType, types.FrameType)
+
+
+def format_bytes(count):
+    """Human-readable byte count, e.g. "1.5 MB"."""
+    if count is None:
+        return '-'
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(count) < 1024 or unit == 'GB':
+            return f"{count:.0f} {unit}" if unit == 'B' else f"{count:.1f} {unit}"
+        count /= 1024
+
+
+def measure(*objects):
+    """
+    Bytes held by objects and everything they reference.
+
+    Containers, instance attributes, numpy arrays (with their base buffer)
+    and mmaps are followed; modules, classes and functions are not.
+
+    Args:
+        objects: objects to measure together
+
+    Returns:
+        dict: 'heap' and 'mapped' byte counts
+    """
+    totals = {'heap': 0, 'mapped': 0}
+    seen = set()
+    stack = list(objects)
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen or isinstance(obj, _OPAQUE):
+            continue
+        seen.add(id(obj))
+
+        if isinstance(obj, mmap.mmap):
+            totals['mapped'] += len(obj)
+            continue
+        totals['heap'] += sys.getsizeof(obj)
+        if isinstance(obj, np.ndarray):
+            # An array owning its data includes it in getsizeof; a view adds its base once
+            if obj.base is not None:
+                stack.append(obj.base)
+        elif isinstance(obj, memoryview):
+            stack.append(obj.obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, '__dict__'):
+                stack.append(vars(obj))
+            for name in getattr(type(obj), '__slots__', ()):
+                if hasattr(obj, name):
+                    stack.append(getattr(obj, name))
+    return totals
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+
+def peak_rss():
+    """Highest resident set size of this process so far in bytes, or None where unavailable."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class MemoryTracker:
+    """Per-phase wall time, RSS and peak RSS of this process."""
+
+    def __init__(self):
+        self.phases = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """
+        Record one phase: with tracker.phase('build tables'): ...
+
+        The process peak RSS only moves when a phase exceeds every earlier
+        one, so traced_peak (the peak of traced allocations within the
+        phase, with tracemalloc running) is the sharper per-phase number.
+        """
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            traced_start = tracemalloc.get_traced_memory()[0]
+        row = {'phase': name, 'rss_before': current_rss()}
+        started = time.perf_counter()
+        try:
+            yield row
+        finally:
+            row['seconds'] = time.perf_counter() - started
+            row['rss_after'] = current_rss()
+            row['peak_rss'] = peak_rss()
+            row['traced_peak'] = tracemalloc.get_traced_memory()[1] - traced_start if tracing else None
+            self.phases.append(row)
+
+
+def _row(name, memory, count=None, note=''):
+    total = memory['heap'] + memory['mapped']
+    return {'name': name, 'heap': memory['heap'], 'mapped': memory['mapped'], 'count': count,
+            'per_item': total / count if count else None, 'note': note}
+
+
+def compare_representations(count=20000, seed=0):
+    """
+    Bytes per state of every state representation, on the same random states.
+
+    Args:
+        count: number of states
+        seed: seed of the random states
+
+    Returns:
+        list: rows with name, heap, mapped, count and per_item bytes
+    """
+    from agent.network import one_hot_states
+    from environment.cube import Cube
+    from environment.cubie import facelets_to_cubies, rank_states
+    from environment.generators import random_states
+    from environment.serialization import pack_states, pack_states_ranked
+
+    states = random_states(count, np.random.default_rng(seed))
+    cubes = []
+    for state in states[:min(count, 10000)].tolist():
+        cube = Cube()
+        cube.state = state
+        cubes.append(cube)
+
+    def contents(container):
+        # The items of a container without the container itself
+        memory = measure(container)
+        memory['heap'] -= sys.getsizeof(container)
+        return memory
+
+    return [
+        _row('Cube objects', contents(cubes), len(cubes), 'instance, __dict__ and state list'),
+        _row('Cube.state lists', contents(states.tolist()), count, 'list of 54 ints (ints 0-5 are shared)'),
+        _row('tuples', contents([tuple(state) for state in states.tolist()]), count, 'hashable dict keys'),
+        _row('one-hot float32', measure(one_hot_states(states[:min(count, 10000)])), min(count, 10000),
+             'network input'),
+        _row('uint8 array', measure(states), count, 'batched engine format'),
+        _row('cubies', measure(*facelets_to_cubies(states)), count, 'cp, co, ep, eo as uint8'),
+        _row('RANK_DTYPE records', measure(rank_states(states)), count, 'BFS level files'),
+        _row('packed colors', measure(pack_states(states)), count, '3 bits per sticker'),
+        _row('packed ranks', measure(pack_states_ranked(states)), count, 'smallest; needs a valid state'),
+    ]
+
+
+def structure_footprints(hidden_sizes=(256, 256), replay_capacity=None):
+    """
+    Bytes of the networks, the replay buffer and the in-process move tables and caches.
+
+    Args:
+        hidden_sizes: hidden layer widths of the Q-network
+        replay_capacity: transitions in the replay buffer (the training
+            default when None); projected from the field sizes, not allocated
+
+    Returns:
+        list: rows with name, heap, mapped, count and per_item bytes
+    """
+    from agent.network import QNetwork
+    from agent.quantized import QUANTIZATION_MODES, QuantizedNetwork
+    from environment.notation import compile_algorithm
+    from environment.nxn import move_table
+    from training.actor_learner import TrainingConfig
+    from training.replay_buffer import TRANSITION_FIELDS
+
+    # Whole objects, so that anything a network keeps besides its weights shows up too
+    network = QNetwork(hidden_sizes, seed=0)
+    rows = [_row(f"Q-network {hidden_sizes} float32", measure(network), network.num_parameters(), 'per parameter')]
+    for mode in QUANTIZATION_MODES:
+        rows.append(_row(f"Q-network {hidden_sizes} {mode}", measure(QuantizedNetwork(network, mode)),
+                         network.num_parameters(), 'per parameter'))
+
+    capacity = replay_capacity or TrainingConfig().replay_capacity
+    transition = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for shape, dtype in TRANSITION_FIELDS.values())
+    rows.append(_row('replay buffer', {'heap': 0, 'mapped': transition * capacity}, capacity,
+                     'shared memory, per transition'))
+
+    for size in (2, 3):
+        table = move_table(size)
+        rows.append(_row(f"{size}x{size} move table", measure(table), len(table.perms), 'per move'))
+    cached = compile_algorithm.cache_info().currsize
+    entry = measure(compile_algorithm.__wrapped__("R U R' U'"))
+    rows.append(_row('compile_algorithm cache', {'heap': entry['heap'] * cached, 'mapped': 0}, cached or None,
+                     f"{compile_algorithm.cache_info().maxsize} entries at most"))
+    return rows
+
+
+def table_footprints(tables_dir=None, levels_dir=None):
+    """
+    Bytes of the solvers' lookup tables that are already built, loaded the way the solvers load them.
+
+    Args:
+        tables_dir: cache directory of the solvers, TABLES_DIR when None
+        levels_dir: optional DistanceExplorer output directory
+
+    Returns:
+        list: rows with name, heap, mapped, count and per_item bytes
+    """
+    from search import TABLES_DIR
+    from search.cfop import CFOPSolver
+    from search.optimizer import SolutionOptimizer
+    from search.thistlethwaite import ThistlethwaiteSolver
+
+    tables_dir = TABLES_DIR if tables_dir is None else tables_dir
+
+    def built(*names):
+        return all(os.path.exists(os.path.join(tables_dir, name)) for name in names)
+
+    rows = []
+    if built('cross_distances.npy', 'cases.npz'):
+        solver = CFOPSolver(tables_dir)
+        rows.append(_row('CFOP cross table', measure(solver.cross_distances), solver.cross_distances.size,
+                         'uint8 distances'))
+        rows.append(_row('CFOP case index', measure(solver.index), None, 'F2L, OLL and PLL cases'))
+    if built('thistlethwaite.npy'):
+        solver = ThistlethwaiteSolver(tables_dir)
+        rows.append(_row('Thistlethwaite coset tables', measure(solver.tables), sum(t.size for t in solver.tables),
+                         'memmapped uint8 distances'))
+    for name in sorted(os.listdir(tables_dir)) if os.path.isdir(tables_dir) else []:
+        if name.startswith('optimizer_depth_') and name.endswith('_ranks.npy'):
+            depth = int(name[len('optimizer_depth_'):-len('_ranks.npy')])
+            optimizer = SolutionOptimizer(tables_dir, depth=depth)
+            rows.append(_row(f"optimizer table (depth {depth})", measure(optimizer.ranks, optimizer.depths),
+                             len(optimizer.ranks), 'memmapped ranks and distances'))
+    if levels_dir and os.path.isdir(levels_dir):
+        from search.bfs import DistanceExplorer
+
+        explorer = DistanceExplorer(levels_dir)
+        levels = []
+        while os.path.exists(explorer.level_path(len(levels))):
+            levels.append(explorer.load_level(len(levels)))
+        if levels:
+            rows.append(_row(f"BFS levels 0-{len(levels) - 1}", measure(levels), sum(len(level) for level in levels),
+                             'memmapped visited sets'))
+    return rows
+
+
+def memory_report(states=20000, tables_dir=None, levels_dir=None, hidden_sizes=(256, 256),
+                  replay_capacity=None, trace=True):
+    """
+    Measure every section of the report, each as a tracked phase.
+
+    Args:
+        states: states in the representation comparison
+        tables_dir: solver cache directory (TABLES_DIR when None); only tables
+            already built are loaded
+        levels_dir: optional BFS level directory
+        hidden_sizes: Q-network hidden layer widths
+        replay_capacity: replay buffer capacity (the training default when None)
+        trace: run tracemalloc for per-phase allocation peaks (slower)
+
+    Returns:
+        dict: 'representations', 'structures', 'tables' and 'phases' rows
+    """
+    tracker = MemoryTracker()
+    started_tracing = trace and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    try:
+        report = {}
+        with tracker.phase('representations'):
+            report['representations'] = compare_representations(states)
+        with tracker.phase('structures'):
+            report['structures'] = structure_footprints(hidden_sizes, replay_capacity)
+        with tracker.phase('tables'):
+            report['tables'] = table_footprints(tables_dir, levels_dir)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+    report['phases'] = tracker.phases
+    return report
+
+
+def print_memory_report(report):
+    sections = (('representations', 'State representations', 'per state'),
+                ('structures', 'Structures', 'per item'),
+                ('tables', 'Lookup tables', 'per entry'))
+    for key, title, per in sections:
+        print(f"\n{title}")
+        print(f"  {'':<34} {'heap':>10} {'mapped':>10} {per:>10}")
+        if not report[key]:
+            print("  (nothing built yet)")
+        for row in report[key]:
+            per_item = '-' if row['per_item'] is None else f"{row['per_item']:,.1f} B"
+            print(f"  {row['name']:<34} {format_bytes(row['heap']):>10} {format_bytes(row['mapped']):>10} "
+                  f"{per_item:>10}  {row['note']}")
+
+    print("\nPhases")
+    print(f"  {'':<34} {'seconds':>10} {'RSS after':>10} {'peak RSS':>10} {'traced':>10}")
+    for row in report['phases']:
+        print(f"  {row['phase']:<34} {row['seconds']:>10.2f} {format_bytes(row['rss_after']):>10} "
+              f"{format_bytes(row['peak_rss']):>10} {format_bytes(row['traced_peak']):>10}")
@@ -1,5 +1,4 @@
-import re
-from environment.constants import FRONT, BACK, LEFT, RIGHT, UP, DOWN
+from environment.notation import LETTER_FACES, is_face_turn, token_name, tokenize
 
 def parse_moves_to_tuples(move_sequence):
     """
@@ -10,36 +9,20 @@ def parse_moves_to_tuples(move_sequence):
 
     Returns:
         list: list of tuples (face, clockwise) for each individual move
+
+    Raises:
+        ValueError: for slices, wide turns and rotations, which are not single face rotations
     """
-    pattern = r"[FBLRUD](?:'?2?|2'?)"
-    moves = re.findall(pattern, move_sequence.strip().upper())
-    
-    face_map = {
-        'F': FRONT, 'B': BACK, 'R': RIGHT,
-        'L': LEFT, 'U': UP, 'D': DOWN
-    }
-    
     result = []
-    
-    for move in moves:
-        if not move or move[0] not in face_map:
-            continue
-        
-        face = face_map[move[0]]
-        modifier = move[1:] if len(move) > 1 else ""
-        
-        if not modifier:
-            clockwise, repetitions = True, 1
-        elif modifier == "'":
-            clockwise, repetitions = False, 1
-        elif modifier == "2":
-            clockwise, repetitions = True, 2
-        elif modifier in ["2'", "'2"]:
-            clockwise, repetitions = False, 2
+
+    for token in tokenize(move_sequence):
+        if not is_face_turn(token):
+            raise ValueError(f"{token_name(token)} is not a face turn")
+
+        face = LETTER_FACES[token.letter]
+        if token.turn == 2:
+            result += [(face, True), (face, True)]
         else:
-            clockwise, repetitions = True, 1
-        
-        for _ in range(repetitions):
-            result.append((face, clockwise))
-    
+            result.append((face, token.turn == 0))
+
     return result
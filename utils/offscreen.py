@@ -0,0 +1,314 @@
+"""
+Headless rendering of cube states without a window or a GL context.
+
+OffscreenRenderer is a small NumPy rasterizer drawing the same geometry
+and view as the 3D visualizer. Rasterizing does not depend on the cube
+state: for a given view and layer angle it produces a map from pixels to
+facelets once, and a whole batch of states is then colored with a single
+matrix product of the pixel coverage and the per-state sticker colors. Images are (H, W, 3) uint8 arrays and can be written as PNG
+frames or piped to ffmpeg as a video.
+"""
+
+import math
+import os
+import shutil
+import struct
+import subprocess
+import zlib
+
+import numpy as np
+
+from utils.cube_geometry import (
+    CubeGeometry, RenderConfig, animation_angles, animation_steps, in_layer, palette_array, rotation_matrix,
+)
+
+EDGE_ID = 54
+BACKGROUND_ID = 55
+
+
+def _axis_rotation(axis, angle):
+    theta = math.radians(angle)
+    c, s = math.cos(theta), math.sin(theta)
+    if axis == 'x':
+        return np.array([[1, 0, 0], [0, c, -s], [0, s, c]])
+    return np.array([[c, 0, s], [0, 1, 0], [-s, 0, c]])
+
+
+class OffscreenRenderer:
+    """Renders cube states to RGB arrays with the visualizer's default camera."""
+
+    def __init__(self, width=256, height=256, config=None, rotation_x=20, rotation_y=-30, zoom=-8.0,
+                 fov=45.0, supersample=2, batch_size=256, cache_size=64):
+        """
+        Args:
+            width: image width in pixels
+            height: image height in pixels
+            config: RenderConfig with sizes and colors (default RenderConfig())
+            rotation_x: view rotation around the x axis, degrees
+            rotation_y: view rotation around the y axis, degrees
+            zoom: camera distance along z, as in ViewState
+            fov: vertical field of view, degrees
+            supersample: samples per pixel along each axis, for antialiasing
+            batch_size: states colored together when rendering large batches
+            cache_size: number of pixel maps and coverage matrices kept for reuse
+        """
+        self.width = width
+        self.height = height
+        self.config = config or RenderConfig()
+        self.supersample = supersample
+        self.batch_size = batch_size
+        self.cache_size = cache_size
+        self.geometry = CubeGeometry(self.config.cube_size, self.config.small_cube_size)
+
+        self.view = _axis_rotation('x', rotation_x) @ _axis_rotation('y', rotation_y)
+        self.zoom = zoom
+        self.near = 0.1
+        self.half_height = math.tan(math.radians(fov) / 2) * self.near
+        self.half_width = self.half_height * width / height
+
+        self.lookup = np.zeros((56, 3), dtype=np.float32)
+        self.lookup[:6] = palette_array(self.config.colors)
+        self.lookup[EDGE_ID] = self.config.edge_color
+        self.lookup[BACKGROUND_ID] = self.config.background_color[:3]
+        self._pixel_maps = {}
+
+    def pixel_map(self, rotating_face=None, angle=0.0, layers=(0,)):
+        """
+        Facelet shown by every (supersampled) pixel.
+
+        Args:
+            rotating_face: face whose layers are turned, or None
+            angle: layer angle in degrees, as in CubeRenderer.render_animated_cube
+            layers: layer depths turned, counted from rotating_face (LAYER_SETS)
+
+        Returns:
+            np.ndarray: (H * s, W * s) int16 facelet indices, EDGE_ID or BACKGROUND_ID
+        """
+        if rotating_face is None:
+            angle = 0.0
+        key = ('pixels', rotating_face, tuple(layers), round(float(angle), 6))
+        if key not in self._pixel_maps:
+            self._cache(key, self._rasterize(rotating_face, angle, layers))
+        return self._pixel_maps[key]
+
+    def coverage(self, rotating_face=None, angle=0.0, layers=(0,)):
+        """
+        Fraction of every output pixel covered by each facelet, edges and background.
+
+        Returns:
+            np.ndarray: (H * W, 56) float32 weights, rows summing to one
+        """
+        if rotating_face is None:
+            angle = 0.0
+        key = ('coverage', rotating_face, tuple(layers), round(float(angle), 6))
+        if key not in self._pixel_maps:
+            s = self.supersample
+            pixel_map = self.pixel_map(rotating_face, angle, layers).astype(np.int64)
+            pixels = np.arange(self.height * self.width).reshape(self.height, self.width)
+            pixels = np.repeat(np.repeat(pixels, s, axis=0), s, axis=1)
+            counts = np.bincount((pixels * 56 + pixel_map).ravel(), minlength=self.height * self.width * 56)
+            self._cache(key, (counts.reshape(-1, 56) / (s * s)).astype(np.float32))
+        return self._pixel_maps[key]
+
+    def _cache(self, key, value):
+        if len(self._pixel_maps) >= self.cache_size:
+            self._pixel_maps.clear()
+        self._pixel_maps[key] = value
+
+    def _rasterize(self, rotating_face, angle, layers):
+        geometry = self.geometry
+        s = self.supersample
+        width, height = self.width * s, self.height * s
+        half_line = self.config.line_width * s / 2
+
+        vertices = geometry.quad_vertices.astype(np.float64)
+        normals = geometry.quad_normals.astype(np.float64)
+        if rotating_face is not None and angle != 0:
+            rotating = in_layer(geometry.sticker_coords, rotating_face, layers)
+            layer = rotation_matrix(rotating_face, angle).astype(np.float64)
+            vertices[rotating] = vertices[rotating] @ layer.T
+            normals[rotating] = normals[rotating] @ layer.T
+
+        vertices = vertices @ self.view.T
+        vertices[..., 2] += self.zoom
+        normals = normals @ self.view.T
+
+        # Perspective projection to pixel coordinates (row 0 at the top)
+        depth = -vertices[..., 2]
+        screen_x = (vertices[..., 0] * self.near / depth / self.half_width + 1) / 2 * width
+        screen_y = (1 - vertices[..., 1] * self.near / depth / self.half_height) / 2 * height
+        screen = np.stack([screen_x, screen_y], axis=-1)
+
+        ids = np.full((height, width), BACKGROUND_ID, dtype=np.int16)
+        zbuffer = np.full((height, width), np.inf)
+
+        for quad in range(54):
+            normal = normals[quad]
+            plane = normal @ vertices[quad, 0]
+            if plane >= 0:
+                continue  # facing away from the camera
+
+            corners = screen[quad]
+            x0, y0 = np.floor(corners.min(axis=0)).astype(int)
+            x1, y1 = np.ceil(corners.max(axis=0)).astype(int)
+            x0, y0 = max(x0, 0), max(y0, 0)
+            x1, y1 = min(x1, width), min(y1, height)
+            if x0 >= x1 or y0 >= y1:
+                continue
+
+            px, py = np.meshgrid(np.arange(x0, x1) + 0.5, np.arange(y0, y1) + 0.5)
+            edges = np.roll(corners, -1, axis=0) - corners
+            area = np.sum(edges[:, 0] * np.roll(edges[:, 1], -1) - edges[:, 1] * np.roll(edges[:, 0], -1))
+            orientation = 1.0 if area > 0 else -1.0
+
+            # Signed distance in pixels from each quad side, positive inside
+            distance = np.full(px.shape, np.inf)
+            for k in range(4):
+                ex, ey = edges[k]
+                side = (ex * (py - corners[k, 1]) - ey * (px - corners[k, 0])) * orientation / math.hypot(ex, ey)
+                distance = np.minimum(distance, side)
+            inside = distance >= 0
+
+            # Exact depth of the quad plane along each pixel ray
+            ray_x = ((px / width) * 2 - 1) * self.half_width
+            ray_y = (1 - (py / height) * 2) * self.half_height
+            ray_depth = plane / (normal[0] * ray_x + normal[1] * ray_y - normal[2] * self.near)
+
+            region_ids = ids[y0:y1, x0:x1]
+            region_z = zbuffer[y0:y1, x0:x1]
+            closer = inside & (ray_depth < region_z)
+            region_z[closer] = ray_depth[closer]
+            region_ids[closer] = np.where(distance[closer] < half_line, EDGE_ID, quad)
+
+        return ids
+
+    def render_states(self, states, rotating_face=None, angle=0.0, layers=(0,)):
+        """
+        Render a batch of cube states.
+
+        Args:
+            states: (N, 54) or (54,) sticker colors
+            rotating_face: face whose layers are drawn turned by angle, or None
+            angle: layer angle in degrees
+            layers: layer depths turned, counted from rotating_face (LAYER_SETS)
+
+        Returns:
+            np.ndarray: (N, H, W, 3) or (H, W, 3) uint8 images
+        """
+        states = np.asarray(states)
+        single = states.ndim == 1
+        states = states.reshape(-1, 54)
+
+        images = np.empty((len(states), self.height, self.width, 3), dtype=np.uint8)
+        if len(states) < self.supersample ** 2:
+            # Too few states to pay for building the coverage matrix
+            s = self.supersample
+            pixel_map = self.pixel_map(rotating_face, angle, layers)
+            for i, state in enumerate(states):
+                lookup = self.lookup.copy()
+                lookup[:54] = self.lookup[state]
+                pixels = lookup[pixel_map].reshape(self.height, s, self.width, s, 3).mean(axis=(1, 3))
+                images[i] = np.clip(pixels * 255 + 0.5, 0, 255)
+            return images[0] if single else images
+
+        coverage = self.coverage(rotating_face, angle, layers)
+
+        for start in range(0, len(states), self.batch_size):
+            chunk = states[start:start + self.batch_size]
+            lookup = np.broadcast_to(self.lookup, (len(chunk), 56, 3)).copy()
+            lookup[:, :54] = self.lookup[chunk]
+            # (pixels, 56) @ (56, chunk * 3): every pixel is a weighted sum of its samples' colors
+            pixels = coverage @ lookup.transpose(1, 0, 2).reshape(56, -1)
+            pixels = pixels.reshape(self.height, self.width, len(chunk), 3).transpose(2, 0, 1, 3)
+            images[start:start + len(chunk)] = np.clip(pixels * 255 + 0.5, 0, 255)
+
+        return images[0] if single else images
+
+    def render_algorithm(self, cube_state, algorithm, speed=2.5):
+        """
+        Render the frames of an animated algorithm, as played by CubeAnimator.
+
+        Args:
+            cube_state: 54 sticker colors of the starting state
+            algorithm: move string in the notation of Cube.execute_algorithm,
+                such as "r U M' x"
+            speed: degrees per frame
+
+        Returns:
+            np.ndarray: (F, H, W, 3) uint8 frames, ending with the final state
+
+        Raises:
+            ValueError: for moves that do not exist on a 3x3 cube
+        """
+        state = np.asarray(cube_state)
+        frames = [self.render_states(state)]
+        for _, face, layers, clockwise, perm in animation_steps(algorithm):
+            for angle in animation_angles(clockwise, speed)[1:-1]:
+                frames.append(self.render_states(state, face, angle, layers))
+            state = state[perm]
+            frames.append(self.render_states(state))
+        return np.stack(frames)
+
+
+def write_png(path, image):
+    """
+    Write an (H, W, 3) uint8 image as a PNG file.
+
+    Args:
+        path: output file path
+        image: RGB image array
+    """
+    image = np.ascontiguousarray(image, dtype=np.uint8)
+    height, width = image.shape[:2]
+    raw = np.zeros((height, width * 3 + 1), dtype=np.uint8)  # filter byte 0 on every row
+    raw[:, 1:] = image.reshape(height, width * 3)
+
+    def chunk(kind, data):
+        payload = kind + data
+        return struct.pack('>I', len(data)) + payload + struct.pack('>I', zlib.crc32(payload) & 0xffffffff)
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+def save_frames(images, directory, prefix='frame'):
+    """
+    Write a batch of images as numbered PNG files.
+
+    Returns:
+        list: paths of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    digits = max(4, len(str(len(images))))
+    paths = []
+    for i, image in enumerate(images):
+        path = os.path.join(directory, f"{prefix}_{i:0{digits}d}.png")
+        write_png(path, image)
+        paths.append(path)
+    return paths
+
+
+def write_video(frames, path, fps=60):
+    """
+    Encode frames into a video file with ffmpeg.
+
+    Args:
+        frames: (F, H, W, 3) uint8 frames
+        path: output file, the container is chosen by ffmpeg from the extension
+        fps: frame rate
+    """
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg not found on PATH; use save_frames to export PNG frames instead")
+
+    frames = np.ascontiguousarray(frames, dtype=np.uint8)
+    height, width = frames.shape[1:3]
+    command = [
+        ffmpeg, '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{width}x{height}", '-r', str(fps), '-i', '-',
+        '-pix_fmt', 'yuv420p', path,
+    ]
+    subprocess.run(command, input=frames.tobytes(), check=True)
@@ -0,0 +1,293 @@
+import sys
+import os
+import tempfile
+import zlib
+
+if __name__ == "__main__":
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, project_root)
+
+import numpy as np
+
+from environment.constants import UP, FRONT, LEFT, BACK, RIGHT, DOWN
+from environment.moves import MOVE_PERMS
+from environment.generators import scramble_states
+from environment.cube import Cube
+from utils.cube_geometry import LAYER_SETS, CubeGeometry, animation_angles, animation_steps, in_layer, rotation_matrix
+from utils.offscreen import OffscreenRenderer, BACKGROUND_ID, save_frames
+
+
+def test_geometry_layout():
+    """Every facelet gets its own quad on the outside of the cube, facing outwards."""
+    geometry = CubeGeometry()
+    assert geometry.quad_vertices.shape == (54, 4, 3)
+    assert geometry.edge_vertices.shape == (26 * 12, 2, 3)
+
+    centers = geometry.quad_vertices.mean(axis=1)
+    assert len(np.unique(np.round(centers, 4), axis=0)) == 54, "quads overlap"
+    # The quad center lies on the outside along its normal
+    outward = (centers * geometry.quad_normals).sum(axis=1)
+    assert (outward > 1.0).all()
+
+    # Counterclockwise winding seen from outside (back-face culling keeps every sticker)
+    v = geometry.quad_vertices
+    winding = np.cross(v[:, 1] - v[:, 0], v[:, 2] - v[:, 1])
+    assert ((winding * geometry.quad_normals).sum(axis=1) > 0).all()
+
+
+def test_layer_ranges():
+    """Each layer range splits into its rotating stickers and cubies and the rest static."""
+    geometry = CubeGeometry()
+    # Stickers and visible cubies of the outer layer, middle slice, wide turn and whole cube
+    expected = {(0,): (21, 9), (1,): (12, 8), (0, 1): (33, 17), (0, 1, 2): (54, 26)}
+    for face in range(6):
+        for layers in LAYER_SETS:
+            indices = geometry.quad_indices[face, layers]
+            split = geometry.quad_split[face, layers]
+            stickers, cubies = expected[layers]
+            assert sorted(indices.tolist()) == list(range(216))
+            assert len(indices) - split == stickers * 4
+            assert len(geometry.line_indices[face, layers]) - geometry.line_split[face, layers] == cubies * 12 * 2
+
+
+def test_animation_matches_moves():
+    """Rotating the layers of a step by its angle carries each sticker to where the step's permutation sends it."""
+    geometry = CubeGeometry()
+    centers = geometry.quad_vertices.mean(axis=1)
+    normals = geometry.quad_normals
+    keys = {tuple(key): i for i, key in enumerate(np.round(np.hstack([centers, normals]), 3))}
+
+    for face in (UP, FRONT, LEFT, BACK, RIGHT, DOWN):
+        # Clockwise moves animate from 0 to +90 degrees
+        rotation = rotation_matrix(face, 90.0)
+        perm = MOVE_PERMS[face * 3]
+        split = geometry.quad_split[face, (0,)]
+        moving = geometry.quad_indices[face, (0,)][split::4] // 4
+        for source in moving:
+            key = tuple(np.round(np.hstack([rotation @ centers[source], rotation @ normals[source]]), 3))
+            target = keys[key]
+            assert perm[target] == source, f"face {face}: sticker {source} lands on {target}"
+
+    for name, face, layers, clockwise, perm in animation_steps("M E' S r 2F d' x y' z2"):
+        rotation = rotation_matrix(face, animation_angles(clockwise, 90.0)[-1])
+        moving = in_layer(geometry.sticker_coords, face, layers)
+        for source in range(54):
+            if not moving[source]:
+                assert perm[source] == source, f"{name}: static sticker {source} moves"
+                continue
+            key = tuple(np.round(np.hstack([rotation @ centers[source], rotation @ normals[source]]), 3))
+            target = keys[key]
+            assert perm[target] == source, f"{name}: sticker {source} lands on {target}"
+
+
+def test_quad_colors():
+    geometry = CubeGeometry()
+    palette = np.arange(18, dtype=np.float32).reshape(6, 3)
+    state = np.arange(54) // 9
+    colors = geometry.quad_colors(state, palette)
+    assert colors.shape == (216, 3)
+    assert np.array_equal(colors[4 * 9], palette[1])
+
+
+def test_offscreen_shows_three_faces():
+    """The default camera sees the up, front and right faces of a solved cube."""
+    renderer = OffscreenRenderer(64, 64, supersample=1)
+    pixel_map = renderer.pixel_map()
+    visible = np.unique(pixel_map[pixel_map < 54]) // 9
+    assert set(visible.tolist()) == {UP, FRONT, RIGHT}, f"visible faces {visible}"
+    assert (pixel_map == BACKGROUND_ID).any()
+
+
+def test_offscreen_batch_matches_single():
+    """Batched rendering through the coverage matrix equals rendering one state at a time."""
+    renderer = OffscreenRenderer(48, 40, batch_size=5)
+    states = scramble_states(12, 15, np.random.default_rng(0))
+    batch = renderer.render_states(states, RIGHT, 30.0)
+    assert batch.shape == (12, 40, 48, 3) and batch.dtype == np.uint8
+    for i in (0, 7, 11):
+        single = renderer.render_states(states[i], RIGHT, 30.0)
+        assert np.abs(batch[i].astype(int) - single).max() <= 1
+
+
+def test_offscreen_algorithm_frames():
+    """Animated frames follow CubeAnimator's schedule and end on the final state."""
+    renderer = OffscreenRenderer(32, 32)
+    solved = np.arange(54) // 9
+    frames = renderer.render_algorithm(solved, "R U'", speed=15.0)
+    expected = 1 + len(animation_angles(True, 15.0)) - 1 + len(animation_angles(False, 15.0)) - 1
+    assert len(frames) == expected, f"expected {expected} frames, got {len(frames)}"
+
+    final = solved[MOVE_PERMS[RIGHT * 3]][MOVE_PERMS[UP * 3 + 1]]
+    assert np.array_equal(frames[-1], renderer.render_states(final))
+
+    # Lowercase is a wide turn, and slices and rotations animate like the engine plays them
+    cube = Cube()
+    cube.execute_algorithm("r U M x")
+    frames = renderer.render_algorithm(solved, "r U M x", speed=45.0)
+    assert len(frames) == 1 + 4 * 2, f"expected 9 frames, got {len(frames)}"
+    assert np.array_equal(frames[-1], renderer.render_states(cube.state)), "last frame differs from the engine"
+    assert not np.array_equal(frames[-1], renderer.render_algorithm(solved, "R U M x", speed=90.0)[-1])
+    try:
+        renderer.render_algorithm(solved, "4R")
+        raise AssertionError("4R should be rejected on a 3x3")
+    except ValueError:
+        pass
+
+
+def test_png_export():
+    renderer = OffscreenRenderer(20, 10)
+    images = renderer.render_states(np.tile(np.arange(54) // 9, (2, 1)))
+    with tempfile.TemporaryDirectory() as workdir:
+        paths = save_frames(images, workdir)
+        assert len(paths) == 2
+        with open(paths[0], 'rb') as f:
+            data = f.read()
+    assert data.startswith(b'\x89PNG\r\n\x1a\n')
+    width, height = np.frombuffer(data[16:24], dtype='>u4')
+    assert (width, height) == (20, 10)
+    idat = data.index(b'IDAT')
+    length = int.from_bytes(data[idat - 4:idat], 'big')
+    raw = np.frombuffer(zlib.decompress(data[idat + 4:idat + 4 + length]), dtype=np.uint8).reshape(10, 61)
+    assert np.array_equal(raw[:, 1:].reshape(10, 20, 3), images[0])
+
+
+def test_frame_stats():
+    from utils.cube_visualizer import FrameStats
+    stats = FrameStats(window=4)
+    assert stats.summary() == "no frames"
+    for i in range(6):
+        stats.record(i * 0.1, i * 0.1 + 0.02)
+    assert abs(stats.fps() - 10.0) < 1e-6
+    assert "ms/frame" in stats.summary()
+
+
+def test_event_loop_redraws_only_when_dirty():
+    """Events that change nothing do not cause redraws; view changes do."""
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    import pygame
+    from environment.cube import Cube
+    from utils.cube_visualizer import Cube3DVisualizer
+
+    pygame.display.init()
+    try:
+        visualizer = Cube3DVisualizer()
+        handler = visualizer.event_handler
+        renders = []
+        visualizer._render_with_view_transform = lambda cube: renders.append(list(cube.state))
+
+        # Moving the mouse without dragging leaves the view clean
+        handler.view_state.dirty = False
+        pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(10, 10), rel=(1, 1), buttons=(0, 0, 0)))
+        assert handler.wait_for_events(10)
+        assert not handler.view_state.dirty
+        assert handler.wait_for_events(10), "timing out is not a quit"
+
+        pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_r, mod=0, unicode='r', scancode=0))
+        assert handler.wait_for_events(10) and handler.view_state.dirty
+
+        # One initial draw, then the quit event ends the loop
+        pygame.event.post(pygame.event.Event(pygame.MOUSEMOTION, pos=(20, 20), rel=(1, 1), buttons=(0, 0, 0)))
+        pygame.event.post(pygame.event.Event(pygame.QUIT))
+        visualizer._run_event_loop(Cube())
+        assert len(renders) == 1, f"expected a single redraw, got {len(renders)}"
+    finally:
+        pygame.display.quit()
+
+
+def test_import_budget():
+    """Importing the light packages stays fast and never loads the rendering stack."""
+    from utils.import_benchmark import run_benchmark
+    assert run_benchmark(repeats=3, verbose=True), "import budget exceeded"
+
+
+def test_lazy_utils_attributes():
+    """Parser and visualization entry points resolve without importing pygame."""
+    import subprocess
+    code = (
+        "import sys, utils\n"
+        "from utils import visualize_cube_3d, parse_moves_to_tuples\n"
+        "assert parse_moves_to_tuples(\"R U'\")\n"
+        "assert 'visualize_cube_3d' in dir(utils)\n"
+        "print('pygame' in sys.modules)\n"
+    )
+    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, '-c', code], cwd=project_root, check=True,
+                            capture_output=True, text=True).stdout
+    assert output.strip() == 'False', "pygame was imported"
+
+
+def test_memory_accounting():
+    """Bytes per state of the compact formats are exact, and shared buffers are counted once."""
+    from utils.memory import MemoryTracker, compare_representations, measure
+
+    rows = {row['name']: round(row['per_item']) for row in compare_representations(2000)}
+    assert rows['uint8 array'] == 54, rows
+    assert rows['RANK_DTYPE records'] == 16, rows
+    assert rows['packed colors'] == 21, rows
+    assert rows['packed ranks'] == 9, rows
+    assert rows['Cube.state lists'] <= 600, rows
+
+    array = np.zeros(1000, dtype=np.uint8)
+    assert measure(array, array[10:], array[::2])['heap'] < 1000 + 3 * 200
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, 'table.npy')
+        np.save(path, np.zeros(1 << 16, dtype=np.uint8))
+        table = np.load(path, mmap_mode='r')
+        memory = measure(table)
+        assert memory['mapped'] >= 1 << 16 and memory['heap'] < 4096, memory
+        del table, memory
+
+    tracker = MemoryTracker()
+    with tracker.phase('allocate'):
+        np.ones(1 << 20)
+    assert [row['phase'] for row in tracker.phases] == ['allocate']
+    assert tracker.phases[0]['seconds'] >= 0
+
+
+TESTS = [
+    test_geometry_layout,
+    test_layer_ranges,
+    test_animation_matches_moves,
+    test_quad_colors,
+    test_offscreen_shows_three_faces,
+    test_offscreen_batch_matches_single,
+    test_offscreen_algorithm_frames,
+    test_png_export,
+    test_frame_stats,
+    test_event_loop_redraws_only_when_dirty,
+    test_import_budget,
+    test_lazy_utils_attributes,
+    test_memory_accounting,
+]
+
+
+def run_all_tests():
+    """Run all utils tests."""
+    passed_tests = 0
+
+    for test in TESTS:
+        print(f"\n=== {test.__name__} ===")
+        try:
+            test()
+            passed_tests += 1
+            print(f"✓ {test.__name__} passed!")
+        except AssertionError as e:
+            print(f"Test failed: {e}")
+        except Exception as e:
+            print(f"Unexpected error in {test.__name__}: {e}")
+
+    print(f"\n=== Utils Test Summary ===")
+    print(f"Passed: {passed_tests}/{len(TESTS)}")
+    if passed_tests == len(TESTS):
+        print("All tests passed!")
+    else:
+        print(f"   {len(TESTS) - passed_tests} tests failed")
+
+
+def main():
+    """Main function for running tests."""
+    run_all_tests()
+
+
+if __name__ == "__main__":
+    main()